@@ -0,0 +1,180 @@
+"""
+Process-wide pool of headless Chrome instances for the Selenium-based directory scrapers.
+
+Starting Chrome (plus resolving the driver binary through webdriver-manager) costs
+seconds per page, which dominated Phase 1 for the Selenium-heavy universities.
+Browsers are started on first use, handed out with `browser()` and kept warm
+between checkouts. A browser is replaced after MAX_USES_PER_BROWSER checkouts or
+MAX_BROWSER_AGE seconds (Chrome slowly leaks memory), and whenever it fails its
+health check on return. ChromeDriverManager().install() runs once per process.
+
+Usage:
+    with browser() as driver:
+        driver.get(url)
+        html = driver.page_source
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+
+# At most this many Chrome processes at once; further checkouts wait for a free one
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+MAX_USES_PER_BROWSER = 50
+MAX_BROWSER_AGE = 30 * 60
+
+CHROME_ARGUMENTS = [
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--window-size=1920,1080",
+    "user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+]
+
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+
+def _chromedriver_path() -> str:
+    """Resolve (and download if needed) the chromedriver binary once per process."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+            logger.info(f"Using chromedriver at {_driver_path}")
+    return _driver_path
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of warm headless Chrome drivers.
+    checkout() blocks while all `size` browsers are in use.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = MAX_USES_PER_BROWSER,
+                 max_age: float = MAX_BROWSER_AGE):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.started = 0
+        self.recycled = 0
+        # LIFO so the most recently used (warmest) browser goes out first
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _start(self) -> Dict[str, Any]:
+        options = Options()
+        for argument in CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        driver = webdriver.Chrome(service=Service(_chromedriver_path()), options=options)
+        self.started += 1
+        return {"driver": driver, "created": time.monotonic(), "uses": 0}
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return entry["uses"] >= self.max_uses or time.monotonic() - entry["created"] > self.max_age
+
+    @staticmethod
+    def _quit(entry: Dict[str, Any]) -> None:
+        try:
+            entry["driver"].quit()
+        except Exception as e:
+            logger.debug(f"Error quitting browser: {e}")
+
+    def _take(self) -> Dict[str, Any]:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._start()
+
+    def _give_back(self, entry: Dict[str, Any]) -> None:
+        entry["uses"] += 1
+        if self._closed or self._expired(entry):
+            self.recycled += 1
+            self._quit(entry)
+            return
+        try:
+            # Health check + reset, so the next caller gets a blank page and no cookies
+            entry["driver"].delete_all_cookies()
+            entry["driver"].get("about:blank")
+        except Exception as e:
+            logger.warning(f"Dropping unhealthy browser: {e}")
+            self._quit(entry)
+            return
+        self._idle.put(entry)
+
+    @contextmanager
+    def checkout(self) -> Iterator[webdriver.Chrome]:
+        """Borrow a driver for the duration of the with block."""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        self._slots.acquire()
+        try:
+            entry = self._take()
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            yield entry["driver"]
+        finally:
+            self._give_back(entry)
+            self._slots.release()
+
+    def close(self) -> None:
+        """Quit every idle browser; browsers still checked out quit when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        if self.started:
+            logger.info(f"Browser pool closed: {self.started} browsers started, {self.recycled} recycled")
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """The process-wide pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = BrowserPool()
+    return _pool
+
+
+def configure_browser_pool(size: int) -> BrowserPool:
+    """Replace the process-wide pool with one of `size` browsers (call before scraping)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = BrowserPool(size=size)
+    return _pool
+
+
+def browser():
+    """Shortcut for get_browser_pool().checkout()."""
+    return get_browser_pool().checkout()
+
+
+def close_browser_pool() -> None:
+    """Shut down the process-wide pool (call once at the end of a run)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
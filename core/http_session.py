@@ -0,0 +1,155 @@
+"""
+Process-wide pooled HTTP session for the directory scrapers.
+
+Every scraper instance (and every Phase 1 lane thread) shares one requests.Session,
+so pages on the same host reuse kept-alive connections instead of paying a new
+TCP + TLS handshake each time. Responses are gzip/deflate compressed, plus brotli
+when the brotli package is installed (urllib3 only decodes br with it). requests
+speaks HTTP/1.1 only; keep-alive is where the saving comes from.
+
+fetch timing is recorded per request; log_fetch_stats() reports it together
+with how many connections were actually opened (counted by the session's
+connection classes as they connect), which is what reuse buys.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Distinct hosts kept in the pool, and kept-alive connections per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get("SCRAPER_POOL_CONNECTIONS", "32"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("SCRAPER_POOL_MAXSIZE", "8"))
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko)"
+
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {}
+
+
+def reset_fetch_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+        _stats.update({"requests": 0, "errors": 0, "seconds": 0.0, "bytes": 0, "connections": 0, "hosts": {}})
+
+
+def _count_connection() -> None:
+    with _stats_lock:
+        _stats["connections"] += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _count_connection()
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _count_connection()
+        super().connect()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count every new TCP (and TLS) connection for fetch_stats."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+def get_http_session() -> requests.Session:
+    """The shared session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = CountingHTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+                # Transient gateway errors only; 4xx and timeouts surface to the scraper as before
+                max_retries=Retry(total=2, connect=0, read=0, backoff_factor=0.5,
+                                  status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": _ACCEPT_ENCODING})
+            _session = session
+    return _session
+
+
+def timed_request(method: str, url: str, **kwargs) -> requests.Response:
+    """session.request() that records latency, size and failures for log_fetch_stats."""
+    start = time.perf_counter()
+    host = urlparse(url).hostname or ""
+    try:
+        response = get_http_session().request(method, url, **kwargs)
+    except requests.RequestException:
+        _record(host, time.perf_counter() - start, 0, error=True)
+        raise
+    _record(host, time.perf_counter() - start, len(response.content), error=not response.ok)
+    return response
+
+
+def _record(host: str, seconds: float, size: int, error: bool) -> None:
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["errors"] += int(error)
+        _stats["seconds"] += seconds
+        _stats["bytes"] += size
+        host_stats = _stats["hosts"].setdefault(host, [0, 0.0])
+        host_stats[0] += 1
+        host_stats[1] += seconds
+
+
+reset_fetch_stats()
+
+
+def fetch_stats() -> Dict[str, Any]:
+    """Totals since the last reset: requests, errors, seconds, bytes, connections opened, per-host."""
+    with _stats_lock:
+        return {**_stats, "hosts": {h: tuple(v) for h, v in _stats["hosts"].items()}}
+
+
+def log_fetch_stats(label: str = "HTTP") -> None:
+    stats = fetch_stats()
+    if not stats["requests"]:
+        return
+    avg_ms = 1000 * stats["seconds"] / stats["requests"]
+    logger.info(
+        f"{label}: {stats['requests']} requests ({stats['errors']} failed) to {len(stats['hosts'])} hosts, "
+        f"avg {avg_ms:.0f} ms, {stats['bytes'] / 1e6:.1f} MB, "
+        f"{stats['connections']} connections opened"
+    )
+    slowest = sorted(stats["hosts"].items(), key=lambda item: -item[1][1])[:5]
+    for host, (count, seconds) in slowest:
+        logger.info(f"  {host}: {count} requests, {seconds:.1f}s total, avg {1000 * seconds / count:.0f} ms")
@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional
 from bs4 import BeautifulSoup
+import json
 import requests
 import logging
 
+from .http_session import timed_request
+from .page_store import get_page_store, page_key
+
 logger = logging.getLogger(__name__)
 
 class BaseDirectoryScraper(ABC):
@@ -13,23 +17,113 @@ class BaseDirectoryScraper(ABC):
     and extract a raw, incomplete list of professors containing at minimum
     their Name and Profile URL.
     """
-    
+
+    # CSS selector that shows the directory has rendered, for Selenium-based scrapers
+    # (see core.page_ready.wait_until_ready). None = wait for DOM quiescence only.
+    READY_SELECTOR: Optional[str] = None
+
     def __init__(self, university_id: int):
         self.university_id = university_id
 
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Utility method to fetch and parse a directory page."""
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko)"
-        }
+        """Utility method to fetch and parse a directory page (pooled keep-alive session, see core.http_session)."""
+        store = get_page_store()
+        if store and store.replaying:
+            html = store.get(url)
+            if html is None:
+                logger.info(f"Page store miss, skipping {url}")
+                return None
+            return BeautifulSoup(html, 'html.parser')
         try:
-            response = requests.get(url, timeout=20, headers=headers)
+            response = timed_request("GET", url, timeout=20)
             response.raise_for_status()
+            if store:
+                store.record(url, response.text, source="directory")
             return BeautifulSoup(response.text, 'html.parser')
         except requests.RequestException as e:
             logger.error(f"Failed to fetch {url}: {e}")
             return None
 
+    def fetch_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                   payload: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> Optional[Any]:
+        """GET (or POST, when payload is given) a JSON endpoint. None on any failure."""
+        store = get_page_store()
+        key = page_key(url, params=params, payload=payload)
+        request_headers = {"Accept": "application/json", **(headers or {})}
+        try:
+            if store and store.replaying:
+                text = store.get(key)
+                return json.loads(text) if text is not None else None
+            if payload is None:
+                response = timed_request("GET", url, params=params, timeout=20, headers=request_headers)
+            else:
+                response = timed_request("POST", url, params=params, json=payload, timeout=20, headers=request_headers)
+            response.raise_for_status()
+            data = response.json()
+            if store:
+                store.record(key, response.text, source="json")
+            return data
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"JSON fetch failed for {url}: {e}")
+            return None
+
+    def scrape_without_browser(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
+        """
+        Fast path for directories that are normally rendered in a browser: read the
+        JSON/XHR endpoint behind the page (or its server-rendered HTML) over plain HTTP.
+        Scrapers that have one override this; [] means "use the browser".
+        """
+        return []
+
+    def scrape_with_browser_fallback(
+        self,
+        url: str,
+        faculty_id: int,
+        department_id: int,
+        browser_scrape: Callable[[str, int, int], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Try scrape_without_browser first; only start Selenium (browser_scrape) if it found nobody."""
+        try:
+            professors = self.scrape_without_browser(url, faculty_id, department_id)
+        except Exception as e:
+            logger.warning(f"HTTP fast path failed for {url}: {e}")
+            professors = []
+        if professors:
+            logger.info(f"HTTP fast path: {len(professors)} professors from {url}")
+            return professors
+        return browser_scrape(url, faculty_id, department_id)
+
+    def rendered_pages(self, url: str, browse: Callable[[str], Iterable[str]]) -> Iterator[str]:
+        """
+        Page sources of a browser-rendered directory, one per results page.
+        browse(url) drives Selenium and yields driver.page_source after each page
+        loads. With a page store configured the snapshots are recorded, or in
+        replay mode served from the store without starting a browser.
+        """
+        store = get_page_store()
+        if store and store.replaying:
+            part = 0
+            html = store.get(page_key(url, part))
+            if html is None:
+                logger.info(f"Page store miss, skipping {url}")
+            while html is not None:
+                yield html
+                part += 1
+                html = store.get(page_key(url, part))
+            return
+        for part, html in enumerate(browse(url)):
+            if store:
+                store.record(page_key(url, part), html, source="browser")
+            yield html
+
+    def rendered_html(self, url: str, load: Callable[[str], str]) -> str:
+        """rendered_pages() for a single-page load: load(url) returns the page source, "" on failure."""
+        def browse(page_url: str) -> Iterator[str]:
+            html = load(page_url)
+            if html:
+                yield html
+        return next(self.rendered_pages(url, browse), "")
+
     @abstractmethod
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
         """
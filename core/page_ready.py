@@ -0,0 +1,123 @@
+"""
+Readiness waits for the Selenium scrapers, replacing fixed time.sleep() calls.
+
+A page counts as ready once a scraper-declared CSS selector is present (when it
+has one) and the DOM has gone quiet: no nodes added/removed and no new network
+resources for `quiet_ms`. Quiescence is measured in the page by a
+MutationObserver plus the Resource Timing entry count, so a directory that
+renders in 300 ms isn't held for 6 s, and a slow one gets the time it needs (up to
+the timeout). Infinite-scroll listings are handled by scrolling until the number
+of anchors stops growing.
+"""
+import logging
+import time
+from typing import Optional
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_QUIET_MS = 500
+MAX_SCROLL_ROUNDS = 20
+
+# Resolves true once readyState is complete and nothing changed for quietMs, false on timeout.
+# Attribute changes are ignored: carousels and spinners flip classes forever.
+_DOM_QUIET_JS = """
+const quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+const start = Date.now();
+let last = start;
+let resources = performance.getEntriesByType('resource').length;
+const observer = new MutationObserver(() => { last = Date.now(); });
+observer.observe(document, {childList: true, subtree: true, characterData: true});
+(function check() {
+  const now = Date.now();
+  const count = performance.getEntriesByType('resource').length;
+  if (count !== resources) { resources = count; last = now; }
+  if (document.readyState === 'complete' && now - last >= quietMs) {
+    observer.disconnect();
+    done(true);
+  } else if (now - start >= timeoutMs) {
+    observer.disconnect();
+    done(false);
+  } else {
+    setTimeout(check, 50);
+  }
+})();
+"""
+
+
+def wait_for_dom_quiet(driver, quiet_ms: int = DEFAULT_QUIET_MS, timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Block until the DOM and network have been idle for quiet_ms. False if it never settled."""
+    try:
+        driver.set_script_timeout(timeout + 5)
+        return bool(driver.execute_async_script(_DOM_QUIET_JS, quiet_ms, int(timeout * 1000)))
+    except Exception as e:
+        logger.debug(f"DOM quiescence check failed: {e}")
+        return False
+
+
+def wait_for_selector(driver, selector: str, timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Block until an element matching the CSS selector exists. False on timeout."""
+    try:
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+        return True
+    except Exception:
+        logger.debug(f"Timed out after {timeout:.0f}s waiting for {selector}")
+        return False
+
+
+def _anchor_count(driver) -> int:
+    return driver.execute_script("return document.getElementsByTagName('a').length;")
+
+
+def scroll_until_stable(driver, quiet_ms: int = DEFAULT_QUIET_MS, timeout: float = DEFAULT_TIMEOUT,
+                        max_rounds: int = MAX_SCROLL_ROUNDS) -> int:
+    """
+    Scroll to the bottom until the anchor count stops growing (lazy-loaded and
+    infinite-scroll directories). Returns the final anchor count.
+    """
+    count = _anchor_count(driver)
+    for _ in range(max_rounds):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        wait_for_dom_quiet(driver, quiet_ms, timeout)
+        new_count = _anchor_count(driver)
+        if new_count <= count:
+            break
+        count = new_count
+    return count
+
+
+def wait_until_ready(driver, selector: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                     scroll: bool = False, quiet_ms: int = DEFAULT_QUIET_MS) -> bool:
+    """
+    Wait for a freshly loaded page: the selector (if any), then DOM quiescence,
+    then (with scroll=True) lazy loading. Returns False if the selector never appeared.
+    """
+    start = time.monotonic()
+    found = wait_for_selector(driver, selector, timeout) if selector else True
+    wait_for_dom_quiet(driver, quiet_ms, max(1.0, timeout - (time.monotonic() - start)))
+    if scroll:
+        scroll_until_stable(driver, quiet_ms, timeout)
+    return found
+
+
+def wait_for_page_change(driver, reference=None, selector: Optional[str] = None,
+                         timeout: float = DEFAULT_TIMEOUT, quiet_ms: int = DEFAULT_QUIET_MS) -> bool:
+    """
+    After a pagination click: wait for `reference` (an element from the old page) to
+    go stale, then for the new results (selector) and DOM quiescence.
+    Returns False if the old page never went away.
+    """
+    changed = True
+    if reference is not None:
+        try:
+            WebDriverWait(driver, timeout).until(EC.staleness_of(reference))
+        except Exception:
+            changed = False
+    if selector:
+        wait_for_selector(driver, selector, timeout)
+    wait_for_dom_quiet(driver, quiet_ms, timeout)
+    return changed
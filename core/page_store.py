@@ -0,0 +1,202 @@
+"""
+On-disk, content-addressed store of fetched HTML, so parser changes can be re-run
+without re-crawling.
+
+Layout under the store root (SCRAPER_PAGE_STORE, default ./page_store):
+    blobs/ab/abcdef...html.gz   gzip-compressed page, named by the SHA-256 of its text
+    index.sqlite                one row per fetch: url, fetched_at, sha256, source, size
+
+Identical pages (the same directory fetched twice, mirrored profiles) share one blob;
+every fetch still gets an index row, so the history of a URL is kept.
+
+Modes:
+    record  - fetches go to the network as usual and every page is stored
+    replay  - nothing touches the network; lookups come from the store and a URL
+              that was never recorded is a miss (callers skip it)
+Without a configured store (the default) scrapers and Phase 2 behave exactly as before.
+
+Usage:
+    configure_page_store("record")
+    store = get_page_store()
+    if store and store.replaying:
+        html = store.get(url)
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+PAGE_STORE_DIR = os.environ.get("SCRAPER_PAGE_STORE", "page_store")
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+PAGE_STORE_MODES = (MODE_RECORD, MODE_REPLAY)
+
+
+def page_key(url: str, part: int = 0, params: Optional[Dict[str, Any]] = None,
+             payload: Optional[Any] = None) -> str:
+    """
+    Index key for a fetch. Plain GETs are keyed by URL; query params, a POST body
+    and the results-page number of a browser-paginated directory are appended so
+    each distinct response gets its own entry.
+    """
+    key = url
+    if params:
+        key += ("&" if "?" in key else "?") + urlencode(sorted(params.items()), doseq=True)
+    if payload is not None:
+        body = json.dumps(payload, sort_keys=True).encode("utf-8")
+        key += f"#body={hashlib.sha256(body).hexdigest()[:16]}"
+    if part:
+        key += f"#page={part}"
+    return key
+
+
+class PageStore:
+    """
+    Gzip blobs keyed by SHA-256 plus a SQLite index by URL and fetch time.
+    Safe to share between threads; each process should open its own instance.
+    """
+
+    def __init__(self, root: str = PAGE_STORE_DIR, mode: str = MODE_RECORD):
+        if mode not in PAGE_STORE_MODES:
+            raise ValueError(f"Unknown page store mode: {mode}")
+        self.root = root
+        self.mode = mode
+        self.stats = {"stored": 0, "deduplicated": 0, "hits": 0, "misses": 0}
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                sha256 TEXT NOT NULL,
+                source TEXT NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_url_idx ON pages (url, fetched_at)")
+        self._db.commit()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.html.gz")
+
+    def put(self, url: str, html: str, source: str = "http") -> str:
+        """Store a fetched page and index it under url. Returns its SHA-256."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        fresh = not os.path.exists(path)
+        if fresh:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so a crash or a concurrent writer never leaves a truncated blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.stats["stored" if fresh else "deduplicated"] += 1
+            self._db.execute(
+                "INSERT INTO pages (url, fetched_at, sha256, source, size) VALUES (?, ?, ?, ?, ?)",
+                (url, time.time(), digest, source, len(data)),
+            )
+            self._db.commit()
+        return digest
+
+    def record(self, url: str, html: Optional[str], source: str = "http") -> None:
+        """put() when recording; a no-op otherwise. Storage errors never fail the fetch."""
+        if not self.recording or not html:
+            return
+        try:
+            self.put(url, html, source)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not store {url} in the page store: {e}")
+
+    def get(self, url: str, before: Optional[float] = None) -> Optional[str]:
+        """Most recent page stored under url (fetched before `before`, if given). None on a miss."""
+        query = "SELECT sha256 FROM pages WHERE url = ?"
+        params: list = [url]
+        if before is not None:
+            query += " AND fetched_at < ?"
+            params.append(before)
+        query += " ORDER BY fetched_at DESC LIMIT 1"
+        with self._lock:
+            row = self._db.execute(query, params).fetchone()
+        html = self._read_blob(row[0]) if row else None
+        with self._lock:
+            self.stats["hits" if html is not None else "misses"] += 1
+        return html
+
+    def _read_blob(self, digest: str) -> Optional[str]:
+        try:
+            with gzip.open(self._blob_path(digest), "rb") as f:
+                return f.read().decode("utf-8")
+        except (OSError, EOFError) as e:
+            logger.warning(f"Unreadable page store blob {digest}: {e}")
+            return None
+
+    def history(self, url: str) -> List[Tuple[float, str, str]]:
+        """Every fetch of url, oldest first: (fetched_at, sha256, source)."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT fetched_at, sha256, source FROM pages WHERE url = ? ORDER BY fetched_at", (url,)
+            ).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+        if any(self.stats.values()):
+            logger.info(
+                f"Page store ({self.mode}) {self.root}: {self.stats['stored']} pages stored, "
+                f"{self.stats['deduplicated']} deduplicated, {self.stats['hits']} hits, "
+                f"{self.stats['misses']} misses"
+            )
+
+
+_store: Optional[PageStore] = None
+_store_lock = threading.Lock()
+
+
+def configure_page_store(mode: str, root: str = PAGE_STORE_DIR) -> PageStore:
+    """Open the process-wide store in record or replay mode (call before scraping)."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = PageStore(root, mode)
+    logger.info(f"Page store: {mode} mode at {os.path.abspath(root)}")
+    return _store
+
+
+def get_page_store() -> Optional[PageStore]:
+    """The process-wide store, or None when none was configured."""
+    return _store
+
+
+def close_page_store() -> None:
+    """Close the process-wide store (call once at the end of a run)."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
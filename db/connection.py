@@ -1,5 +1,6 @@
 import os
 import logging
+import threading
 from pathlib import Path
 import psycopg2
 from psycopg2 import pool
@@ -11,31 +12,46 @@ logger = logging.getLogger(__name__)
 _env_path = Path(__file__).parent.parent / ".env"
 load_dotenv(_env_path)
 
-_pool: pool.SimpleConnectionPool | None = None
+# Phase 2/3 write from worker threads, so the pool must be thread-safe.
+POOL_MAX_CONNECTIONS = int(os.environ.get("DATABASE_POOL_MAX", "5"))
 
+_pool: pool.ThreadedConnectionPool | None = None
+_pool_lock = threading.Lock()
+# psycopg2 raises PoolError when the pool is exhausted; this makes callers wait instead.
+_slots = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
 
-def get_pool() -> pool.SimpleConnectionPool:
+
+def get_pool() -> pool.ThreadedConnectionPool:
     """Get or create the connection pool."""
     global _pool
-    if _pool is None or _pool.closed:
-        database_url = os.environ.get("DATABASE_URL")
-        if not database_url:
-            raise RuntimeError(
-                "DATABASE_URL not set. Create scraper/.env or set the env var."
-            )
-        _pool = pool.SimpleConnectionPool(minconn=1, maxconn=5, dsn=database_url)
-        logger.info("Database connection pool created.")
-    return _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            database_url = os.environ.get("DATABASE_URL")
+            if not database_url:
+                raise RuntimeError(
+                    "DATABASE_URL not set. Create scraper/.env or set the env var."
+                )
+            _pool = pool.ThreadedConnectionPool(minconn=1, maxconn=POOL_MAX_CONNECTIONS, dsn=database_url)
+            logger.info("Database connection pool created.")
+        return _pool
 
 
 def get_connection():
     """Get a connection from the pool. Caller must return it via put_connection()."""
-    return get_pool().getconn()
+    _slots.acquire()
+    try:
+        return get_pool().getconn()
+    except Exception:
+        _slots.release()
+        raise
 
 
 def put_connection(conn):
     """Return a connection to the pool."""
-    get_pool().putconn(conn)
+    try:
+        get_pool().putconn(conn)
+    finally:
+        _slots.release()
 
 
 def close_pool():
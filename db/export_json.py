@@ -1,25 +1,35 @@
 import json
 from scraper.db.repositories import get_professors_ready_for_ai
 from scraper.db.connection import close_pool
+from scraper.pipeline.profile_processor import DepartmentLineStats, condense_markdown
 
 def export_to_jsonl(filename="cloud_input.jsonl"):
     print("Packing the briefcase...")
     # Grab all professors who have Markdown but no AI extraction yet
-    rows = get_professors_ready_for_ai(limit=10000) 
-    
+    rows = get_professors_ready_for_ai(limit=10000)
+
+    # Count each department's shared template lines over the whole export first
+    department_stats = {}
+    for row in rows:
+        department_stats.setdefault(row["department_id"], DepartmentLineStats()).add(row["profile_markdown"])
+
     with open(filename, 'w') as f:
         for row in rows:
-            # We only send what the LLM needs: ID, Name, and Markdown
+            # We only send what the LLM needs: ID, Name, and the relevant parts of the Markdown
             briefcase_item = {
                 "id": row["id"],
+                "name": f"{row['first_name']} {row['last_name']}".strip(),
                 "first_name": row["first_name"],
                 "last_name": row["last_name"],
-                "profile_markdown": row["profile_markdown"]
+                "department": row["department_name"],
+                "profile_markdown": condense_markdown(
+                    row["profile_markdown"], stats=department_stats[row["department_id"]]
+                ),
             }
             f.write(json.dumps(briefcase_item) + "\n")
-            
+
     print(f"✅ Exported {len(rows)} profiles to {filename}")
     close_pool()
 
 if __name__ == "__main__":
-    export_to_jsonl()
\ No newline at end of file
+    export_to_jsonl()
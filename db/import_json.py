@@ -1,11 +1,11 @@
-import json
 import logging
 import sys
 from pathlib import Path
 from typing import Union
 
 from scraper.db.repositories import batch_update_professor_ai_data
-from scraper.pipeline.embedder import embed_batch
+from scraper.pipeline.embedder import embed_batch_array
+from scraper.pipeline.jsonl import iter_json_objects, chunked
 from scraper.db.connection import close_pool
 
 logger = logging.getLogger(__name__)
@@ -15,20 +15,8 @@ _DEFAULT_INPUT = _PROJECT_ROOT / "cloud_output.jsonl"
 
 _SKIP_MARKERS = {"[UNAVAILABLE]", "[ERROR]"}
 
-
-def _parse_jsonl(path: Path) -> list[dict]:
-    """Parse a file of concatenated JSON objects — handles compact or pretty-printed."""
-    content = path.read_text(encoding="utf-8")
-    decoder = json.JSONDecoder(strict=False)
-    records, idx = [], 0
-    while idx < len(content):
-        while idx < len(content) and content[idx] in " \t\n\r":
-            idx += 1
-        if idx >= len(content):
-            break
-        obj, idx = decoder.raw_decode(content, idx)
-        records.append(obj)
-    return records
+# Records read, embedded and written per step of the streaming import
+_CHUNK_SIZE = 500
 
 
 def _normalize_interests(interests: list[str]) -> list[str] | None:
@@ -40,57 +28,60 @@ def _normalize_interests(interests: list[str]) -> list[str] | None:
     return cleaned if cleaned else None
 
 
-def import_from_jsonl(filename: Union[str, Path, None] = None) -> None:
-    path = Path(filename) if filename else _DEFAULT_INPUT
-    if not path.exists():
-        logger.error(f"Input file not found: {path}")
-        return
-
-    logger.info(f"Reading briefcase: {path}")
-    records = _parse_jsonl(path)
-    logger.info(f"Parsed {len(records)} records.")
-
-    # Classify records
-    to_embed = []    # (record, cleaned_interests) — valid holistic string, needs embedding
-    no_embed = []    # records with [UNAVAILABLE]/[ERROR] holistic strings
+def _prepare_chunk(records: list[dict]) -> tuple[list[dict], int]:
+    """
+    Embed one chunk of records and build the DB rows for it.
+    Returns (rows, number of rows without an embedding).
+    """
+    to_embed = []    # rows with a valid holistic string, need an embedding
+    no_embed = []    # rows with [UNAVAILABLE]/[ERROR]/empty holistic strings
 
     for r in records:
         hs = (r.get("holistic_profile_string") or "").strip()
-        interests = _normalize_interests(r.get("unique_interests") or [])
-
+        row = {
+            "id": r["id"],
+            "unique_interests": _normalize_interests(r.get("unique_interests") or []),
+            "holistic_profile_string": hs or None,
+            "embedding": None,
+        }
         if hs in _SKIP_MARKERS or not hs:
-            no_embed.append({
-                "id": r["id"],
-                "unique_interests": interests,
-                "holistic_profile_string": hs or None,
-                "embedding": None,
-            })
+            no_embed.append(row)
         else:
-            to_embed.append((r["id"], interests, hs))
+            to_embed.append(row)
 
-    logger.info(f"  Will embed: {len(to_embed)} | Skip embedding: {len(no_embed)}")
+    if to_embed:
+        embeddings = embed_batch_array([row["holistic_profile_string"] for row in to_embed], show_progress_bar=False)
+        for row, emb in zip(to_embed, embeddings):
+            row["embedding"] = emb
+
+    return to_embed + no_embed, len(no_embed)
+
+
+def import_from_jsonl(filename: Union[str, Path, None] = None, chunk_size: int = _CHUNK_SIZE) -> None:
+    """
+    Stream the briefcase into the DB: read, embed and write chunk_size records at a
+    time, so memory stays flat and the first rows land after the first chunk.
+    """
+    path = Path(filename) if filename else _DEFAULT_INPUT
+    if not path.exists():
+        logger.error(f"Input file not found: {path}")
+        return
 
-    # Batch embed all valid holistic strings in one pass
-    texts = [hs for _, _, hs in to_embed]
-    logger.info(f"Generating {len(texts)} embeddings (this may take a moment)...")
-    embeddings = embed_batch(texts)
+    logger.info(f"Streaming briefcase: {path}")
+    total = skipped = none_count = 0
 
-    rows = [
-        {"id": pid, "unique_interests": interests, "holistic_profile_string": hs, "embedding": emb}
-        for (pid, interests, hs), emb in zip(to_embed, embeddings)
-    ] + no_embed
+    for records in chunked(iter_json_objects(path), chunk_size):
+        rows, chunk_skipped = _prepare_chunk(records)
+        batch_update_professor_ai_data(rows)
 
-    # Batch update DB in chunks of 500
-    chunk_size = 500
-    for i in range(0, len(rows), chunk_size):
-        chunk = rows[i: i + chunk_size]
-        batch_update_professor_ai_data(chunk)
-        logger.info(f"  Updated {min(i + chunk_size, len(rows))}/{len(rows)} rows")
+        total += len(rows)
+        skipped += chunk_skipped
+        none_count += sum(1 for r in rows if r["unique_interests"] is None)
+        logger.info(f"  Updated {total} rows so far ({skipped} without embeddings)")
 
-    none_count = sum(1 for r in rows if r["unique_interests"] is None)
     logger.info(
-        f"Import complete: {len(rows)} total | "
-        f"{len(no_embed)} without embeddings | "
+        f"Import complete: {total} total | "
+        f"{skipped} without embeddings | "
         f"{none_count} with null interests (NONE/empty)"
     )
     close_pool()
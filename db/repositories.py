@@ -1,16 +1,164 @@
+import io
 import logging
-from typing import Optional, List, Dict, Any
+import struct
+from collections import Counter
+from typing import Optional, List, Dict, Any, Sequence, Set, Tuple
 from .connection import get_connection, put_connection
 
 logger = logging.getLogger(__name__)
 
 
+# ============================================================
+# Schema
+# ============================================================
+
+# professors.pipeline_status values. The [UNAVAILABLE]/[ERROR] markdown sentinels
+# are still written for older tooling, but queues and counts only read the status.
+STATUS_NEW = 0          # discovered in Phase 1, page not downloaded yet
+STATUS_FETCHED = 1      # Markdown stored, waiting for Phase 3
+STATUS_EXTRACTED = 2    # LLM fields and embedding stored
+STATUS_UNAVAILABLE = 3  # page missing / no extractable text
+STATUS_ERROR = 4        # fetch failed, or Phase 3 gave up after max attempts
+
+PIPELINE_STATUS_NAMES = {
+    STATUS_NEW: "new",
+    STATUS_FETCHED: "fetched",
+    STATUS_EXTRACTED: "extracted",
+    STATUS_UNAVAILABLE: "unavailable",
+    STATUS_ERROR: "error",
+}
+
+# Queue predicates, shared by the queries and the partial indexes that serve them.
+_MISSING_MARKDOWN = f"pipeline_status = {STATUS_NEW}"
+_READY_FOR_AI = f"pipeline_status = {STATUS_FETCHED}"
+# Rows with a real stored page (no [UNAVAILABLE]/[ERROR] sentinels): the refresh re-crawl set
+_REFRESHABLE = f"pipeline_status IN ({STATUS_FETCHED}, {STATUS_EXTRACTED})"
+
+
+def ensure_pipeline_schema() -> None:
+    """
+    Add the pipeline bookkeeping columns if they don't exist yet.
+    Safe to call on every startup.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            # HTTP validators for conditional re-crawls
+            cur.execute("""
+                ALTER TABLE professors
+                ADD COLUMN IF NOT EXISTS http_etag text,
+                ADD COLUMN IF NOT EXISTS http_last_modified text,
+                ADD COLUMN IF NOT EXISTS last_crawled_at timestamptz
+            """)
+            # Work-queue leases so several orchestrators can share the Phase 2/3 backlog
+            cur.execute("""
+                ALTER TABLE professors
+                ADD COLUMN IF NOT EXISTS lease_owner text,
+                ADD COLUMN IF NOT EXISTS lease_expires_at timestamptz
+            """)
+            # Explicit pipeline state, so queues never look inside profile_markdown
+            cur.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'professors' AND column_name = 'pipeline_status'
+            """)
+            needs_backfill = cur.fetchone() is None
+            cur.execute("""
+                ALTER TABLE professors
+                ADD COLUMN IF NOT EXISTS pipeline_status smallint NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS pipeline_attempts smallint NOT NULL DEFAULT 0,
+                ADD COLUMN IF NOT EXISTS pipeline_error text
+            """)
+            if needs_backfill:
+                # One-off: derive the status from the old sentinel/NULL conventions
+                cur.execute(f"""
+                    UPDATE professors SET pipeline_status = CASE
+                        WHEN profile_markdown IS NULL THEN {STATUS_NEW}
+                        WHEN profile_markdown = '[UNAVAILABLE]' THEN {STATUS_UNAVAILABLE}
+                        WHEN profile_markdown = '[ERROR]' THEN {STATUS_ERROR}
+                        WHEN unique_interests IS NULL THEN {STATUS_FETCHED}
+                        ELSE {STATUS_EXTRACTED}
+                    END
+                """)
+            # Department boilerplate learning: per-line page counts, and which pages are already stripped
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS department_boilerplate (
+                    department_id integer NOT NULL REFERENCES departments(id) ON DELETE CASCADE,
+                    line_hash bigint NOT NULL,
+                    page_count integer NOT NULL,
+                    PRIMARY KEY (department_id, line_hash)
+                )
+            """)
+            cur.execute("ALTER TABLE departments ADD COLUMN IF NOT EXISTS boilerplate_pages integer NOT NULL DEFAULT 0")
+            cur.execute("ALTER TABLE professors ADD COLUMN IF NOT EXISTS boilerplate_stripped boolean NOT NULL DEFAULT false")
+            # Line fingerprints a page last contributed to department_boilerplate (NULL = never
+            # counted), so a re-crawled page replaces its old contribution instead of adding to it
+            cur.execute("ALTER TABLE professors ADD COLUMN IF NOT EXISTS boilerplate_lines bigint[]")
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS professors_boilerplate_pending_idx
+                ON professors (department_id) WHERE NOT boilerplate_stripped
+            """)
+            # One partial index per state: keyset queue reads (id > cursor ORDER BY id) and
+            # get_counts become index-only scans over just the rows in that state.
+            cur.execute("DROP INDEX IF EXISTS professors_missing_markdown_idx, professors_ready_for_ai_idx")
+            for status, name in PIPELINE_STATUS_NAMES.items():
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS professors_status_{name}_idx
+                    ON professors (id) WHERE pipeline_status = {status}
+                """)
+            cur.execute(f"CREATE INDEX IF NOT EXISTS professors_refreshable_idx ON professors (id) WHERE {_REFRESHABLE}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
 # ============================================================
 # Taxonomy CRUD
 # ============================================================
 
+# In-process id cache so existing taxonomy rows never take the write path.
+# Keys mirror the unique constraints: name, (university_id, name), (faculty_id, name).
+_university_ids: Dict[str, int] = {}
+_faculty_ids: Dict[Tuple[int, str], int] = {}
+_department_ids: Dict[Tuple[int, str], int] = {}
+
+
+def preload_taxonomy_cache() -> None:
+    """Fill the taxonomy cache with one SELECT per table (call once at startup)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT name, id FROM universities")
+            _university_ids.update(cur.fetchall())
+
+            cur.execute("SELECT university_id, name, id FROM faculties")
+            _faculty_ids.update(((uni_id, name), fac_id) for uni_id, name, fac_id in cur.fetchall())
+
+            cur.execute("SELECT faculty_id, name, id FROM departments")
+            _department_ids.update(((fac_id, name), dept_id) for fac_id, name, dept_id in cur.fetchall())
+        logger.info(
+            f"Taxonomy cache loaded: {len(_university_ids)} universities, "
+            f"{len(_faculty_ids)} faculties, {len(_department_ids)} departments"
+        )
+    finally:
+        put_connection(conn)
+
+
+def clear_taxonomy_cache() -> None:
+    """Drop all cached taxonomy ids (e.g. after rows were deleted out of band)."""
+    _university_ids.clear()
+    _faculty_ids.clear()
+    _department_ids.clear()
+
+
 def get_or_create_university(name: str, short_name: Optional[str] = None) -> int:
-    """Insert university if not exists, return its id."""
+    """Return the university id, inserting the row on a cache miss."""
+    cached = _university_ids.get(name)
+    if cached is not None:
+        return cached
+
     conn = get_connection()
     try:
         with conn.cursor() as cur:
@@ -25,6 +173,7 @@ def get_or_create_university(name: str, short_name: Optional[str] = None) -> int
             )
             row = cur.fetchone()
             conn.commit()
+            _university_ids[name] = row[0]
             return row[0]
     except Exception:
         conn.rollback()
@@ -34,7 +183,11 @@ def get_or_create_university(name: str, short_name: Optional[str] = None) -> int
 
 
 def get_or_create_faculty(university_id: int, name: str) -> int:
-    """Insert faculty if not exists, return its id."""
+    """Return the faculty id, inserting the row on a cache miss."""
+    cached = _faculty_ids.get((university_id, name))
+    if cached is not None:
+        return cached
+
     conn = get_connection()
     try:
         with conn.cursor() as cur:
@@ -49,6 +202,7 @@ def get_or_create_faculty(university_id: int, name: str) -> int:
             )
             row = cur.fetchone()
             conn.commit()
+            _faculty_ids[(university_id, name)] = row[0]
             return row[0]
     except Exception:
         conn.rollback()
@@ -58,7 +212,11 @@ def get_or_create_faculty(university_id: int, name: str) -> int:
 
 
 def get_or_create_department(university_id: int, faculty_id: int, name: str) -> int:
-    """Insert department if not exists, return its id."""
+    """Return the department id, inserting the row on a cache miss."""
+    cached = _department_ids.get((faculty_id, name))
+    if cached is not None:
+        return cached
+
     conn = get_connection()
     try:
         with conn.cursor() as cur:
@@ -73,6 +231,7 @@ def get_or_create_department(university_id: int, faculty_id: int, name: str) ->
             )
             row = cur.fetchone()
             conn.commit()
+            _department_ids[(faculty_id, name)] = row[0]
             return row[0]
     except Exception:
         conn.rollback()
@@ -81,6 +240,84 @@ def get_or_create_department(university_id: int, faculty_id: int, name: str) ->
         put_connection(conn)
 
 
+# ============================================================
+# Vector writes (binary COPY)
+# ============================================================
+
+# COPY BINARY framing: signature, flags, header-extension length ... tuples ... trailer
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
+
+
+def encode_vector_copy(ids: Sequence[int], vectors) -> bytes:
+    """
+    Encode (id bigint, vec vector) rows as a COPY ... (FORMAT binary) stream.
+    pgvector's binary form is int16 dim, int16 unused, then dim float4 values,
+    all big-endian. The whole payload is built with one numpy structured array,
+    so vectors never pass through Python floats or text.
+    """
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim != 2:
+        raise ValueError(f"Expected a 2-D array of vectors, got shape {vectors.shape}")
+    n, dim = vectors.shape
+    if len(ids) != n:
+        raise ValueError(f"{len(ids)} ids for {n} vectors")
+
+    row = np.dtype([
+        ("nfields", ">i2"),
+        ("id_len", ">i4"), ("id", ">i8"),
+        ("vec_len", ">i4"), ("dim", ">i2"), ("unused", ">i2"), ("values", ">f4", (dim,)),
+    ])
+    tuples = np.empty(n, dtype=row)
+    tuples["nfields"] = 2
+    tuples["id_len"] = 8
+    tuples["id"] = ids
+    tuples["vec_len"] = 4 + 4 * dim
+    tuples["dim"] = dim
+    tuples["unused"] = 0
+    tuples["values"] = vectors
+    return _PGCOPY_HEADER + tuples.tobytes() + _PGCOPY_TRAILER
+
+
+def copy_vectors(cur, ids: Sequence[int], vectors, column: str = "embedding") -> None:
+    """
+    Write vectors into professors.<column> on an open cursor (caller commits).
+    Streams them into a temp staging table with binary COPY, then one UPDATE ... FROM.
+    """
+    if len(ids) == 0:
+        return
+    from psycopg2 import sql
+
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS _vector_stage (id bigint, vec vector) ON COMMIT DELETE ROWS")
+    cur.copy_expert(
+        "COPY _vector_stage (id, vec) FROM STDIN WITH (FORMAT binary)",
+        io.BytesIO(encode_vector_copy(ids, vectors)),
+    )
+    cur.execute(
+        sql.SQL("UPDATE professors p SET {} = s.vec FROM _vector_stage s WHERE p.id = s.id").format(
+            sql.Identifier(column)
+        )
+    )
+    # ON COMMIT only fires at commit; clear now in case the caller copies again first
+    cur.execute("TRUNCATE _vector_stage")
+
+
+def write_embeddings(ids: Sequence[int], vectors, column: str = "embedding") -> None:
+    """Bulk-write vectors (numpy array or list of lists) for the given professor ids."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            copy_vectors(cur, ids, vectors, column)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
 # ============================================================
 # Professor CRUD
 # ============================================================
@@ -125,6 +362,66 @@ def upsert_professor(
         put_connection(conn)
 
 
+def bulk_upsert_professors(
+    professors: List[Dict[str, Any]],
+    university_id: int,
+    faculty_id: int,
+    department_id: int,
+) -> Dict[str, int]:
+    """
+    Bulk version of upsert_professor for a whole department (Phase 1).
+    Takes the list returned by scrape_directory and merges it into professors
+    in a single INSERT ... ON CONFLICT statement and a single commit.
+    Returns a {profile_url: professor_id} mapping.
+    """
+    # ON CONFLICT can't touch the same row twice in one statement, so dedupe by URL (last wins)
+    values_by_url: Dict[str, tuple] = {}
+    for prof in professors:
+        profile_url = prof.get("profile_url")
+        if not profile_url:
+            continue
+        values_by_url[profile_url] = (
+            prof.get("first_name") or "",
+            prof.get("last_name") or "",
+            profile_url,
+            university_id,
+            faculty_id,
+            department_id,
+        )
+    if not values_by_url:
+        return {}
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            from psycopg2.extras import execute_values
+            rows = execute_values(
+                cur,
+                """
+                INSERT INTO professors
+                    (first_name, last_name, profile_url, university_id, faculty_id, department_id)
+                VALUES %s
+                ON CONFLICT (profile_url) DO UPDATE SET
+                    first_name = EXCLUDED.first_name,
+                    last_name = EXCLUDED.last_name,
+                    university_id = EXCLUDED.university_id,
+                    faculty_id = EXCLUDED.faculty_id,
+                    department_id = EXCLUDED.department_id
+                RETURNING profile_url, id
+                """,
+                list(values_by_url.values()),
+                page_size=len(values_by_url),
+                fetch=True,
+            )
+        conn.commit()
+        return {profile_url: prof_id for profile_url, prof_id in rows}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
 def update_professor_profile(
     professor_id: int,
     email: Optional[str] = None,
@@ -135,11 +432,17 @@ def update_professor_profile(
     profile_markdown: Optional[str] = None,
     bio: Optional[str] = None,
     accepting_students: Optional[str] = None,
+    http_etag: Optional[str] = None,
+    http_last_modified: Optional[str] = None,
 ) -> None:
     """
     Update a professor row with Phase 2 (Markdown) or Phase 3 (NLP) data.
     Uses COALESCE so we only update the fields that are passed in.
+    Writing profile_markdown also stamps last_crawled_at, advances pipeline_status and
+    queues the page for the department boilerplate pass.
     """
+    status = _status_for_write(profile_markdown, unique_interests)
+    advanced = status in (STATUS_FETCHED, STATUS_EXTRACTED)
     conn = get_connection()
     try:
         with conn.cursor() as cur:
@@ -149,32 +452,171 @@ def update_professor_profile(
                     email = COALESCE(%s, email),
                     unique_interests = COALESCE(%s, unique_interests),
                     holistic_profile_string = COALESCE(%s, holistic_profile_string),
-                    embedding = COALESCE(%s, embedding),
                     content_hash = COALESCE(%s, content_hash),
                     profile_markdown = COALESCE(%s, profile_markdown),
                     bio = COALESCE(%s, bio),
                     accepting_students = COALESCE(%s, accepting_students),
+                    http_etag = COALESCE(%s, http_etag),
+                    http_last_modified = COALESCE(%s, http_last_modified),
+                    last_crawled_at = CASE
+                        WHEN %s IS NOT NULL THEN now()
+                        ELSE last_crawled_at
+                    END,
+                    boilerplate_stripped = CASE
+                        WHEN %s IS NOT NULL THEN false
+                        ELSE boilerplate_stripped
+                    END,
                     search_vector = CASE
                         WHEN %s IS NOT NULL
                         THEN to_tsvector('english', %s)
                         ELSE search_vector
-                    END
+                    END,
+                    pipeline_status = COALESCE(%s, pipeline_status),
+                    pipeline_attempts = CASE WHEN %s THEN 0 ELSE pipeline_attempts END,
+                    pipeline_error = CASE WHEN %s THEN NULL ELSE pipeline_error END
                 WHERE id = %s
                 """,
                 (
                     email,
                     unique_interests,
                     holistic_profile_string,
-                    str(embedding) if embedding else None,
                     content_hash,
                     profile_markdown,
                     bio,
                     accepting_students,
+                    http_etag,
+                    http_last_modified,
+                    profile_markdown,
+                    profile_markdown,
                     holistic_profile_string,
                     holistic_profile_string,
+                    status,
+                    advanced,
+                    advanced,
                     professor_id,
                 ),
             )
+            if embedding is not None and len(embedding):
+                copy_vectors(cur, [professor_id], [embedding])
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
+def _status_for_write(profile_markdown: Optional[str], unique_interests: Optional[List[str]]) -> Optional[int]:
+    """pipeline_status implied by an update_professor_profile call (None = unchanged)."""
+    if unique_interests is not None:
+        return STATUS_EXTRACTED
+    if profile_markdown == "[UNAVAILABLE]":
+        return STATUS_UNAVAILABLE
+    if profile_markdown == "[ERROR]":
+        return STATUS_ERROR
+    if profile_markdown is not None:
+        return STATUS_FETCHED
+    return None
+
+
+def record_pipeline_failure(
+    professor_id: int,
+    error: str,
+    status: Optional[int] = None,
+    profile_markdown: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+) -> None:
+    """
+    Record a failed Phase 2/3 attempt: bumps pipeline_attempts and stores the error.
+    status moves the row to that state (None keeps it queued); with max_attempts the
+    row is parked as STATUS_ERROR once it has failed that many times.
+    profile_markdown optionally writes the legacy sentinel as well.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE professors SET
+                    pipeline_attempts = pipeline_attempts + 1,
+                    pipeline_error = %s,
+                    pipeline_status = CASE
+                        WHEN %s::int IS NOT NULL AND pipeline_attempts + 1 >= %s::int THEN {STATUS_ERROR}
+                        ELSE COALESCE(%s::smallint, pipeline_status)
+                    END,
+                    profile_markdown = COALESCE(%s, profile_markdown)
+                WHERE id = %s
+                """,
+                (error[:1000], max_attempts, max_attempts, status, profile_markdown, professor_id),
+            )
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
+def update_http_validators(professor_id: int, http_etag: Optional[str], http_last_modified: Optional[str]) -> None:
+    """
+    Record a re-crawl that found the page unchanged (304, or same content_hash).
+    Overwrites the validators with whatever the server sent this time.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE professors SET
+                    http_etag = %s,
+                    http_last_modified = %s,
+                    last_crawled_at = now()
+                WHERE id = %s
+                """,
+                (http_etag, http_last_modified, professor_id),
+            )
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
+def replace_professor_markdown(
+    professor_id: int,
+    profile_markdown: str,
+    content_hash: str,
+    email: Optional[str],
+    http_etag: Optional[str],
+    http_last_modified: Optional[str],
+) -> None:
+    """
+    Store a re-crawled page whose content changed.
+    Clears unique_interests so the row re-enters the Phase 3 queue; the previous
+    AI fields keep serving search until Phase 3 overwrites them.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE professors SET
+                    profile_markdown = %s,
+                    content_hash = %s,
+                    email = COALESCE(%s, email),
+                    http_etag = %s,
+                    http_last_modified = %s,
+                    last_crawled_at = now(),
+                    boilerplate_stripped = false,
+                    unique_interests = NULL,
+                    pipeline_status = %s,
+                    pipeline_attempts = 0,
+                    pipeline_error = NULL
+                WHERE id = %s
+                """,
+                (profile_markdown, content_hash, email, http_etag, http_last_modified, STATUS_FETCHED, professor_id),
+            )
             conn.commit()
     except Exception:
         conn.rollback()
@@ -183,29 +625,43 @@ def update_professor_profile(
         put_connection(conn)
 
 
-def batch_update_professor_ai_data(rows: list[dict]) -> None:
+def batch_update_professor_ai_data(rows: list[dict], overwrite: bool = True) -> None:
     """
-    Bulk force-overwrite AI extraction results (Phase 3 import).
+    Bulk write AI extraction results.
     Each dict: {id, unique_interests, holistic_profile_string, embedding, bio, accepting_students}
-    All fields are optional except id.
+    All fields are optional except id. Embeddings (lists or numpy rows) are sent with
+    binary COPY rather than as text.
+    overwrite=True (the GPU import) force-overwrites every field: rows written without
+    interests go back to the Phase 3 queue. overwrite=False (the Phase 3 batcher) keeps
+    stored values for fields a result left out, like update_professor_profile does.
     """
+    def assign(column: str) -> str:
+        return "%s" if overwrite else f"COALESCE(%s, {column})"
+
+    demote = f"WHEN pipeline_status = {STATUS_EXTRACTED} THEN {STATUS_FETCHED}" if overwrite else ""
+    with_vectors = [r for r in rows if r.get("embedding") is not None]
     conn = get_connection()
     try:
         with conn.cursor() as cur:
             from psycopg2.extras import execute_batch
             execute_batch(
                 cur,
-                """
+                f"""
                 UPDATE professors SET
-                    unique_interests        = %s,
-                    holistic_profile_string = %s,
-                    embedding               = %s,
-                    bio                     = %s,
-                    accepting_students      = %s,
+                    unique_interests        = {assign("unique_interests")},
+                    holistic_profile_string = {assign("holistic_profile_string")},
+                    embedding               = CASE WHEN %s THEN NULL ELSE embedding END,
+                    bio                     = {assign("bio")},
+                    accepting_students      = {assign("accepting_students")},
                     search_vector           = CASE
                         WHEN %s IS NOT NULL
                         THEN to_tsvector('english', %s)
                         ELSE search_vector
+                    END,
+                    pipeline_status         = CASE
+                        WHEN %s THEN {STATUS_EXTRACTED}
+                        {demote}
+                        ELSE pipeline_status
                     END
                 WHERE id = %s
                 """,
@@ -213,17 +669,19 @@ def batch_update_professor_ai_data(rows: list[dict]) -> None:
                     (
                         r.get("unique_interests"),
                         r.get("holistic_profile_string"),
-                        str(r["embedding"]) if r.get("embedding") else None,
+                        overwrite and r.get("embedding") is None,
                         r.get("bio"),
                         r.get("accepting_students"),
                         r.get("holistic_profile_string"),
                         r.get("holistic_profile_string"),
+                        r.get("unique_interests") is not None,
                         r["id"],
                     )
                     for r in rows
                 ],
                 page_size=200,
             )
+            copy_vectors(cur, [r["id"] for r in with_vectors], [r["embedding"] for r in with_vectors])
         conn.commit()
     except Exception:
         conn.rollback()
@@ -232,23 +690,33 @@ def batch_update_professor_ai_data(rows: list[dict]) -> None:
         put_connection(conn)
 
 
-def get_professors_missing_markdown(limit: int = 100, university_id: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Fetch professors that haven't had their HTML downloaded yet (Phase 2 worker)."""
+def get_professors_missing_markdown(
+    limit: int = 100,
+    university_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch professors that haven't had their HTML downloaded yet (Phase 2 worker).
+    Pass after_id to page past rows that are already in flight.
+    """
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            query = """
+            query = f"""
                 SELECT p.id, p.first_name, p.last_name, p.profile_url,
                        p.university_id, p.faculty_id, p.department_id,
                        d.name as department_name, p.content_hash
                 FROM professors p
                 JOIN departments d ON d.id = p.department_id
-                WHERE p.profile_markdown IS NULL
+                WHERE {_MISSING_MARKDOWN}
             """
             params: list = []
             if university_id is not None:
                 query += " AND p.university_id = %s"
                 params.append(university_id)
+            if after_id is not None:
+                query += " AND p.id > %s"
+                params.append(after_id)
             query += " ORDER BY p.id LIMIT %s"
             params.append(limit)
 
@@ -259,28 +727,69 @@ def get_professors_missing_markdown(limit: int = 100, university_id: Optional[in
         put_connection(conn)
 
 
-def get_professors_ready_for_ai(limit: int = 100, university_id: Optional[int] = None) -> List[Dict[str, Any]]:
+def get_professors_ready_for_ai(
+    limit: int = 100,
+    university_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
     """
     Fetch professors that have Markdown, but haven't been processed by the LLM yet (Phase 3 worker).
     Excludes profiles where the Markdown fetch failed (marked as [UNAVAILABLE] or [ERROR]).
+    Pass the last id of the previous batch as after_id to page through the backlog.
     """
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            query = """
+            query = f"""
                 SELECT p.id, p.first_name, p.last_name, p.profile_url,
                        p.university_id, p.faculty_id, p.department_id,
                        d.name as department_name, p.profile_markdown
                 FROM professors p
                 JOIN departments d ON d.id = p.department_id
-                WHERE p.profile_markdown IS NOT NULL
-                  AND p.profile_markdown NOT IN ('[UNAVAILABLE]', '[ERROR]')
-                  AND p.unique_interests IS NULL
+                WHERE {_READY_FOR_AI}
             """
             params: list = []
             if university_id is not None:
                 query += " AND p.university_id = %s"
                 params.append(university_id)
+            if after_id is not None:
+                query += " AND p.id > %s"
+                params.append(after_id)
+            query += " ORDER BY p.id LIMIT %s"
+            params.append(limit)
+
+            cur.execute(query, params)
+            columns = [desc[0] for desc in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+    finally:
+        put_connection(conn)
+
+
+def get_professors_for_refresh(
+    limit: int = 500,
+    university_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch already-crawled professors with their stored validators (incremental re-crawl).
+    Selected by pipeline_status, so the markdown column is never read and sentinel rows are skipped.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            query = f"""
+                SELECT p.id, p.first_name, p.last_name, p.profile_url,
+                       p.content_hash, p.http_etag, p.http_last_modified
+                FROM professors p
+                WHERE {_REFRESHABLE}
+            """
+            params: list = []
+            if university_id is not None:
+                query += " AND p.university_id = %s"
+                params.append(university_id)
+            if after_id is not None:
+                query += " AND p.id > %s"
+                params.append(after_id)
             query += " ORDER BY p.id LIMIT %s"
             params.append(limit)
 
@@ -348,13 +857,315 @@ def get_counts() -> Dict[str, int]:
                 cur.execute(f"SELECT count(*) FROM {table}")
                 counts[table] = cur.fetchone()[0]
             
-            # Add specific pipeline counts to help you debug
-            cur.execute("SELECT count(*) FROM professors WHERE profile_markdown IS NOT NULL")
-            counts["markdown_downloaded"] = cur.fetchone()[0]
-            
-            cur.execute("SELECT count(*) FROM professors WHERE unique_interests IS NOT NULL")
-            counts["ai_processed"] = cur.fetchone()[0]
-            
+            # Per-state pipeline counts (each one an index-only scan on its partial index)
+            for status, name in PIPELINE_STATUS_NAMES.items():
+                cur.execute("SELECT count(*) FROM professors WHERE pipeline_status = %s", (status,))
+                counts[f"status_{name}"] = cur.fetchone()[0]
+
+            counts["markdown_downloaded"] = counts["professors"] - counts["status_new"]
+            counts["ai_processed"] = counts["status_extracted"]
+
             return counts
     finally:
-        put_connection(conn)
\ No newline at end of file
+        put_connection(conn)
+
+
+# ============================================================
+# Work-queue leases
+# ============================================================
+
+# Rows whose lease is missing or expired are claimable. A worker that dies
+# simply stops renewing, and its rows come back once the lease runs out.
+_LEASE_FREE = "(p.lease_expires_at IS NULL OR p.lease_expires_at < now())"
+
+
+def _claim_professors(
+    queue_predicate: str,
+    columns: str,
+    worker_id: str,
+    limit: int,
+    university_id: Optional[int],
+    lease_seconds: int,
+    after_id: Optional[int],
+) -> List[Dict[str, Any]]:
+    """
+    Atomically lease up to `limit` queue rows to worker_id.
+    FOR UPDATE SKIP LOCKED lets concurrent claimers pass over each other's rows
+    instead of blocking, so every caller gets a disjoint batch.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            query = f"""
+                WITH claimable AS (
+                    SELECT p.id
+                    FROM professors p
+                    WHERE {queue_predicate}
+                      AND {_LEASE_FREE}
+            """
+            params: list = []
+            if university_id is not None:
+                query += " AND p.university_id = %s"
+                params.append(university_id)
+            if after_id is not None:
+                query += " AND p.id > %s"
+                params.append(after_id)
+            query += f"""
+                    ORDER BY p.id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE professors p
+                SET lease_owner = %s,
+                    lease_expires_at = now() + make_interval(secs => %s)
+                FROM claimable c, departments d
+                WHERE p.id = c.id AND d.id = p.department_id
+                RETURNING {columns}
+            """
+            params.extend([limit, worker_id, lease_seconds])
+
+            cur.execute(query, params)
+            columns_out = [desc[0] for desc in cur.description]
+            rows = [dict(zip(columns_out, row)) for row in cur.fetchall()]
+        conn.commit()
+        return sorted(rows, key=lambda r: r["id"])
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
+def claim_professors_missing_markdown(
+    worker_id: str,
+    limit: int = 100,
+    university_id: Optional[int] = None,
+    lease_seconds: int = 600,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Lease a batch of Phase 2 rows (no Markdown yet). Same columns as get_professors_missing_markdown."""
+    return _claim_professors(
+        _MISSING_MARKDOWN,
+        """p.id, p.first_name, p.last_name, p.profile_url,
+           p.university_id, p.faculty_id, p.department_id,
+           d.name as department_name, p.content_hash""",
+        worker_id, limit, university_id, lease_seconds, after_id,
+    )
+
+
+def claim_professors_ready_for_ai(
+    worker_id: str,
+    limit: int = 100,
+    university_id: Optional[int] = None,
+    lease_seconds: int = 1800,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Lease a batch of Phase 3 rows. Same columns as get_professors_ready_for_ai."""
+    return _claim_professors(
+        _READY_FOR_AI,
+        """p.id, p.first_name, p.last_name, p.profile_url,
+           p.university_id, p.faculty_id, p.department_id,
+           d.name as department_name, p.profile_markdown""",
+        worker_id, limit, university_id, lease_seconds, after_id,
+    )
+
+
+def renew_professor_leases(worker_id: str, ids: Sequence[int], lease_seconds: int) -> int:
+    """
+    Push out the expiry of leases worker_id still holds on `ids` (long-running batches).
+    Rows another worker has re-claimed meanwhile are left alone. Returns the number renewed.
+    """
+    if not ids:
+        return 0
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE professors
+                SET lease_expires_at = now() + make_interval(secs => %s)
+                WHERE lease_owner = %s AND id = ANY(%s)
+            """, (lease_seconds, worker_id, list(ids)))
+            renewed = cur.rowcount
+        conn.commit()
+        return renewed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
+def release_professor_leases(worker_id: str) -> int:
+    """Drop every lease held by worker_id (end of run). Returns the number released."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE professors
+                SET lease_owner = NULL, lease_expires_at = NULL
+                WHERE lease_owner = %s
+            """, (worker_id,))
+            released = cur.rowcount
+        conn.commit()
+        return released
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
+
+
+# ============================================================
+# Department boilerplate
+# ============================================================
+
+# Pages whose stored markdown hasn't been through the boilerplate pass yet
+_BOILERPLATE_PENDING = f"""
+    NOT p.boilerplate_stripped
+    AND p.pipeline_status IN ({STATUS_FETCHED}, {STATUS_EXTRACTED})
+"""
+
+
+def get_departments_pending_boilerplate(university_id: Optional[int] = None) -> List[int]:
+    """Departments with at least one stored page that the boilerplate pass hasn't seen."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            query = f"SELECT DISTINCT p.department_id FROM professors p WHERE {_BOILERPLATE_PENDING}"
+            params: list = []
+            if university_id is not None:
+                query += " AND p.university_id = %s"
+                params.append(university_id)
+            cur.execute(query + " ORDER BY p.department_id", params)
+            return [row[0] for row in cur.fetchall()]
+    finally:
+        put_connection(conn)
+
+
+def get_pending_boilerplate_pages(
+    department_id: int,
+) -> List[Tuple[int, str, Optional[str], Optional[List[int]]]]:
+    """
+    (id, profile_markdown, content_hash, counted_lines) of a department's pages not yet
+    stripped. counted_lines are the fingerprints a re-crawled page was counted with
+    before, None for a page never counted.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT p.id, p.profile_markdown, p.content_hash, p.boilerplate_lines FROM professors p
+                WHERE p.department_id = %s AND {_BOILERPLATE_PENDING}
+                ORDER BY p.id
+                """,
+                (department_id,),
+            )
+            return cur.fetchall()
+    finally:
+        put_connection(conn)
+
+
+def get_department_boilerplate_counts(department_id: int, min_share: float = 0.0) -> Tuple[Dict[int, int], int]:
+    """
+    ({line_hash: page_count}, pages counted so far) for one department. With min_share,
+    only lines found on at least that share of the pages are returned.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT boilerplate_pages FROM departments WHERE id = %s", (department_id,))
+            row = cur.fetchone()
+            pages = row[0] if row else 0
+            cur.execute(
+                "SELECT line_hash, page_count FROM department_boilerplate "
+                "WHERE department_id = %s AND page_count >= %s",
+                (department_id, pages * min_share),
+            )
+            return dict(cur.fetchall()), pages
+    finally:
+        put_connection(conn)
+
+
+def save_department_boilerplate(
+    department_id: int,
+    stripped: List[Tuple[int, str, Optional[str], Set[int]]],
+) -> int:
+    """
+    One transaction per department: store the stripped markdown of each page
+    (id, markdown, content_hash, line fingerprints) and fold the fingerprints of the
+    pages that UPDATE actually matched into the department's line counts.
+    A page counted before (a re-crawl) swaps its previous fingerprints for the new
+    ones and is not added to the page total again, so counts track the current pages
+    rather than how often they were crawled. Pages re-crawled in the meantime
+    (content_hash moved on) or already stripped by another run are neither written
+    nor counted. The department row is locked first so concurrent boilerplate passes
+    over one department run one after the other. Returns the number of pages stored.
+    """
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            from psycopg2.extras import execute_values
+            cur.execute("SELECT id FROM departments WHERE id = %s FOR UPDATE", (department_id,))
+            cur.execute(
+                "SELECT id, boilerplate_lines FROM professors WHERE id = ANY(%s) AND NOT boilerplate_stripped FOR UPDATE",
+                ([prof_id for prof_id, _, _, _ in stripped],),
+            )
+            previous = dict(cur.fetchall())
+            updated = execute_values(
+                cur,
+                """
+                UPDATE professors AS p SET
+                    profile_markdown = v.markdown,
+                    boilerplate_stripped = true,
+                    boilerplate_lines = v.lines
+                FROM (VALUES %s) AS v(id, markdown, content_hash, lines)
+                WHERE p.id = v.id AND p.content_hash IS NOT DISTINCT FROM v.content_hash
+                  AND NOT p.boilerplate_stripped
+                RETURNING p.id
+                """,
+                [(prof_id, markdown, content_hash, sorted(fingerprints))
+                 for prof_id, markdown, content_hash, fingerprints in stripped],
+                template="(%s, %s, %s, %s::bigint[])",
+                page_size=200,
+                fetch=True,
+            )
+            counted = {row[0] for row in updated}
+            line_counts: Counter = Counter()
+            new_pages = 0
+            for prof_id, _, _, fingerprints in stripped:
+                if prof_id not in counted:
+                    continue
+                line_counts.update(fingerprints)
+                if previous.get(prof_id) is None:
+                    new_pages += 1
+                else:
+                    line_counts.subtract(previous[prof_id])
+            changed = {h: n for h, n in line_counts.items() if n}
+            if changed:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO department_boilerplate (department_id, line_hash, page_count)
+                    VALUES %s
+                    ON CONFLICT (department_id, line_hash)
+                    DO UPDATE SET page_count = department_boilerplate.page_count + EXCLUDED.page_count
+                    """,
+                    [(department_id, h, n) for h, n in changed.items()],
+                    page_size=1000,
+                )
+                cur.execute(
+                    "DELETE FROM department_boilerplate WHERE department_id = %s AND page_count <= 0",
+                    (department_id,),
+                )
+            cur.execute(
+                "UPDATE departments SET boilerplate_pages = boilerplate_pages + %s WHERE id = %s",
+                (new_pages, department_id),
+            )
+        conn.commit()
+        return len(counted)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_connection(conn)
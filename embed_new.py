@@ -12,9 +12,8 @@ import time
 
 import cohere
 from dotenv import load_dotenv
-from psycopg2.extras import execute_batch
-
 from db.connection import get_connection, put_connection, close_pool
+from db.repositories import write_embeddings
 
 load_dotenv()
 
@@ -87,18 +86,8 @@ def main():
 
         embeddings = embed_one_batch(client, batch_texts)
 
-        conn = get_connection()
-        try:
-            with conn.cursor() as cur:
-                execute_batch(
-                    cur,
-                    "UPDATE professors SET embedding_new = %s WHERE id = %s",
-                    [(str(emb), pid) for emb, pid in zip(embeddings, batch_ids)],
-                    page_size=100,
-                )
-            conn.commit()
-        finally:
-            put_connection(conn)
+        # Binary COPY of float32 vectors instead of str(list) per row
+        write_embeddings(batch_ids, embeddings, column="embedding_new")
 
         total_done += len(batch_rows)
         logger.info(f"  {total_done}/{len(rows)} embedded and stored")
@@ -18,11 +18,8 @@ import re
 import sys
 import time
 
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md_convert
-
 from db.connection import get_connection, put_connection, close_pool
-from pipeline.profile_processor import ProfileProcessor
+from pipeline.profile_processor import ProfileProcessor, DepartmentLineStats
 
 logging.basicConfig(
     level=logging.INFO,
@@ -84,27 +81,28 @@ def fetch_professors(university: str | None = None, limit: int = 10000) -> list[
 _state = {"current_delay": 2.0}
 
 
-def process_one(row: dict, processor: ProfileProcessor, max_retries: int = 3) -> dict | None:
-    """Fetch HTML and convert to markdown for a single professor."""
+def process_one(row: dict, processor: ProfileProcessor, max_retries: int = 3,
+                department_stats: DepartmentLineStats | None = None) -> dict | None:
+    """
+    Fetch HTML and convert to markdown for a single professor. The markdown is
+    condensed to its relevant sections, so the GPU box only prefills what matters.
+    """
     prof_id = row["id"]
     name = row["name"]
     url = row["website"]
 
     for attempt in range(max_retries):
         try:
-            _, html, _ = processor.fetch_and_hash(url)
+            html = processor._fetch_html(url)
             if not html:
                 logger.warning(f"  [{prof_id}] {name} — fetch failed")
                 return None
 
-            email = processor.extract_email(html)
-
-            soup = BeautifulSoup(html, "html.parser")
-            for tag in soup(["script", "style", "nav", "footer", "header", "aside", "meta", "noscript"]):
-                tag.decompose()
-            markdown = md_convert(str(soup), strip=["a", "img", "table"]).strip()
-            if len(markdown) > 10000:
-                markdown = markdown[:10000]
+            page = processor.process_html(html)
+            markdown = page["markdown"]
+            if department_stats is not None:
+                department_stats.add(markdown)
+            markdown = processor.condense_markdown(markdown, department_stats)
 
             return {
                 "id": prof_id,
@@ -112,7 +110,7 @@ def process_one(row: dict, processor: ProfileProcessor, max_retries: int = 3) ->
                 "university": row["university"],
                 "faculty": row["faculty"],
                 "department": row["department"],
-                "email": email,
+                "email": page["email"],
                 "profile_markdown": markdown,
             }
 
@@ -165,11 +163,14 @@ def run_export(university: str | None, limit: int, delay: float):
     _state["current_delay"] = delay
     ok_streak = 0
     ok_count = 0
+    # Running per-department line counts; template text is recognised once a few pages are in
+    department_stats: dict[tuple, DepartmentLineStats] = {}
 
     # Append mode so we don't overwrite previous progress
     with open(out_file, "a") as f:
         for i, row in enumerate(rows, 1):
-            result = process_one(row, processor)
+            stats = department_stats.setdefault((row["university"], row["department"]), DepartmentLineStats())
+            result = process_one(row, processor, department_stats=stats)
 
             if result:
                 f.write(json.dumps(result, ensure_ascii=False) + "\n")
@@ -8,13 +8,14 @@ Usage:
     python import_from_gpu.py
     python import_from_gpu.py cloud_output.jsonl
 """
-import json
 import logging
 import sys
 from pathlib import Path
 
 from db.connection import get_connection, put_connection, close_pool
-from pipeline.embedder import embed_batch
+from db.repositories import copy_vectors
+from pipeline.embedder import embed_batch_array
+from pipeline.jsonl import iter_json_objects, chunked
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,20 +26,15 @@ logging.basicConfig(
 logger = logging.getLogger("import_from_gpu")
 
 _SKIP_MARKERS = {"[UNAVAILABLE]", "[ERROR]", ""}
-
-
-def parse_jsonl(path: Path) -> list[dict]:
-    records = []
-    with path.open("r") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                records.append(json.loads(line))
-    return records
+CHUNK_SIZE = 500  # records read + embedded + written per step
 
 
 def batch_update(rows: list[dict]) -> None:
-    """Update professors in Supabase with extraction results + embeddings."""
+    """
+    Update professors in Supabase with extraction results + embeddings.
+    Embeddings go over as binary float32 (COPY) in the same transaction.
+    """
+    with_vectors = [r for r in rows if r.get("embedding") is not None]
     conn = get_connection()
     try:
         with conn.cursor() as cur:
@@ -51,7 +47,7 @@ def batch_update(rows: list[dict]) -> None:
                     bio = %s,
                     accepting_students = %s,
                     holistic_profile_string = %s,
-                    embedding = %s,
+                    embedding = CASE WHEN %s THEN NULL ELSE embedding END,
                     email = COALESCE(%s, email)
                 WHERE id = %s
                 """,
@@ -61,7 +57,7 @@ def batch_update(rows: list[dict]) -> None:
                         r.get("bio"),
                         r.get("accepting_students"),
                         r.get("holistic_profile_string"),
-                        r.get("embedding"),
+                        r.get("embedding") is None,
                         r.get("llm_email"),
                         r["id"],
                     )
@@ -69,6 +65,7 @@ def batch_update(rows: list[dict]) -> None:
                 ],
                 page_size=200,
             )
+            copy_vectors(cur, [r["id"] for r in with_vectors], [r["embedding"] for r in with_vectors])
         conn.commit()
     except Exception:
         conn.rollback()
@@ -77,16 +74,8 @@ def batch_update(rows: list[dict]) -> None:
         put_connection(conn)
 
 
-def run_import(input_file: str):
-    path = Path(input_file)
-    if not path.exists():
-        logger.error(f"File not found: {path}")
-        return
-
-    records = parse_jsonl(path)
-    logger.info(f"Loaded {len(records)} records from {path}")
-
-    # Split into embeddable vs skip
+def prepare_chunk(records: list[dict]) -> tuple[list[dict], int]:
+    """Embed one chunk of records; returns (rows for batch_update, number embedded)."""
     to_embed = []
     to_skip = []
 
@@ -111,26 +100,33 @@ def run_import(input_file: str):
         else:
             to_embed.append(entry)
 
-    logger.info(f"Will embed: {len(to_embed)} | Skip: {len(to_skip)}")
-
-    # Batch embed
     if to_embed:
         texts = [r["holistic_profile_string"] for r in to_embed]
-        logger.info(f"Generating {len(texts)} embeddings...")
-        embeddings = embed_batch(texts)
+        embeddings = embed_batch_array(texts, show_progress_bar=False)
         for entry, emb in zip(to_embed, embeddings):
-            entry["embedding"] = str(emb)
+            entry["embedding"] = emb
+
+    return to_embed + to_skip, len(to_embed)
+
+
+def run_import(input_file: str, chunk_size: int = CHUNK_SIZE):
+    """Stream the file: read, embed and write chunk_size records at a time."""
+    path = Path(input_file)
+    if not path.exists():
+        logger.error(f"File not found: {path}")
+        return
 
-    all_rows = to_embed + to_skip
+    logger.info(f"Streaming records from {path}")
+    total = embedded = 0
 
-    # Batch update in chunks
-    chunk_size = 500
-    for i in range(0, len(all_rows), chunk_size):
-        chunk = all_rows[i : i + chunk_size]
-        batch_update(chunk)
-        logger.info(f"  Updated {min(i + chunk_size, len(all_rows))}/{len(all_rows)}")
+    for records in chunked(iter_json_objects(path), chunk_size):
+        rows, chunk_embedded = prepare_chunk(records)
+        batch_update(rows)
+        total += len(rows)
+        embedded += chunk_embedded
+        logger.info(f"  Updated {total} ({embedded} with embeddings)")
 
-    logger.info(f"Import complete: {len(to_embed)} with embeddings, {len(to_skip)} skipped")
+    logger.info(f"Import complete: {embedded} with embeddings, {total - embedded} skipped")
     close_pool()
 
 
@@ -1,13 +1,26 @@
 import json
+import asyncio
+import functools
 import logging
+import multiprocessing
+import os
+import socket
+import threading
 import time
 from typing import Dict, Type, Optional
 import concurrent.futures
 from pathlib import Path
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
 
 from scraper.core.interfaces import BaseDirectoryScraper
+from scraper.core.browser_pool import close_browser_pool, configure_browser_pool
+from scraper.core.http_session import log_fetch_stats, reset_fetch_stats
+from scraper.core.page_store import (
+    PAGE_STORE_DIR,
+    PAGE_STORE_MODES,
+    close_page_store,
+    configure_page_store,
+    get_page_store,
+)
 from scraper.universities.uottawa import UOttawaDirectoryScraper
 from scraper.universities.carleton import CarletonDirectoryScraper
 from scraper.universities.uwaterloo import UWaterlooDirectoryScraper
@@ -23,22 +36,59 @@ from scraper.universities.ualberta import UAlbertaDirectoryScraper
 from scraper.universities.ucalgary import UCalgaryDirectoryScraper
 from scraper.universities.generic import GenericDirectoryScraper  # works on any directory page
 
-from scraper.pipeline.profile_processor import ProfileProcessor
-from scraper.pipeline.embedder import embed_text
+from scraper.pipeline.profile_processor import (
+    ProfileProcessor,
+    DepartmentLineStats,
+    DEPARTMENT_LINE_SHARE,
+    page_line_fingerprints,
+    process_page_html,
+    strip_boilerplate,
+)
+from scraper.pipeline.async_fetcher import AsyncProfileFetcher
+from scraper.pipeline.embedder import embed_text, EmbeddingBatcher
 from scraper.db.repositories import (
     get_or_create_university,
     get_or_create_faculty,
     get_or_create_department,
-    upsert_professor,
+    bulk_upsert_professors,
     update_professor_profile,
-    get_professors_missing_markdown,
-    get_professors_ready_for_ai,
+    batch_update_professor_ai_data,
+    record_pipeline_failure,
+    STATUS_UNAVAILABLE,
+    STATUS_ERROR,
+    update_http_validators,
+    replace_professor_markdown,
+    claim_professors_missing_markdown,
+    claim_professors_ready_for_ai,
+    release_professor_leases,
+    renew_professor_leases,
+    get_professors_for_refresh,
     get_counts,
+    get_departments_pending_boilerplate,
+    get_pending_boilerplate_pages,
+    get_department_boilerplate_counts,
+    save_department_boilerplate,
+    ensure_pipeline_schema,
+    preload_taxonomy_cache,
 )
 from scraper.db.connection import close_pool
 
 logger = logging.getLogger(__name__)
 
+# Async Phase 2 keeps up to `window` claimed rows in flight; leases on the ones still
+# unwritten are renewed every PHASE2_LEASE_RENEW_SECONDS so a slow host never lets them expire
+PHASE2_LEASE_SECONDS = 1800
+PHASE2_LEASE_RENEW_SECONDS = PHASE2_LEASE_SECONDS // 3
+# Phase 3 failures before a row is parked as STATUS_ERROR instead of retried on the next run
+MAX_AI_ATTEMPTS = 3
+# Departments whose line statistics Phase 3 keeps around (claims come in id order,
+# so a department's professors arrive close together)
+MAX_DEPARTMENT_STATS = 64
+# Boilerplate pass: a line on more than this share of a department's pages is template text,
+# judged only once the department has at least BOILERPLATE_MIN_PAGES stored pages
+BOILERPLATE_SHARE = 0.6
+BOILERPLATE_MIN_PAGES = 5
+
 SCRAPER_REGISTRY: Dict[str, Type[BaseDirectoryScraper]] = {
     "University of Ottawa": UOttawaDirectoryScraper,
     "Carleton University": CarletonDirectoryScraper,
@@ -64,20 +114,29 @@ SCRAPER_REGISTRY: Dict[str, Type[BaseDirectoryScraper]] = {
 }
 
 class ScraperOrchestrator:
-    def __init__(self, universities_json_path: str):
+    def __init__(self, universities_json_path: str, cpu_workers: Optional[int] = None,
+                 worker_id: Optional[str] = None):
         self.json_path = Path(universities_json_path)
         self.processor = ProfileProcessor()
+        # Lease owner for the shared Phase 2/3 queues; unique per process across machines
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # Phase 2 CPU stage (HTML parse/convert), sized to the cores by default
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self._cpu_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._cpu_pool_lock = threading.Lock()
 
     # ============================================================
     # PHASE 1: Directory Traversal → DB (Discover URLs)
     # ============================================================
-    def run_phase1(self, university_filter: Optional[str] = None):
-        """Scrape directories and upsert basic info (names, urls, IDs)."""
-        start = time.time()
+    def _phase1_jobs(self, university_filter: Optional[str] = None) -> list:
+        """
+        Flatten universities.json into one job per directory URL, resolving the
+        taxonomy ids up front (in this thread) so the scrape workers only read.
+        """
         with open(self.json_path, "r") as f:
             data = json.load(f)
 
-        total_inserted = 0
+        jobs = []
         for uni_name, faculties in data.items():
             if university_filter and uni_name != university_filter:
                 continue
@@ -88,19 +147,67 @@ class ScraperOrchestrator:
                 continue
 
             uni_id = get_or_create_university(uni_name)
-            scraper = scraper_class(university_id=uni_id)
-            logger.info(f"=== Phase 1: {uni_name} ===")
-
             for fac_name, fac_data in faculties.items():
                 fac_id = get_or_create_faculty(uni_id, fac_name)
                 if isinstance(fac_data, str):
-                    dept_id = get_or_create_department(uni_id, fac_id, fac_name)
-                    total_inserted += self._scrape_and_insert(scraper, fac_data, uni_id, fac_id, dept_id, fac_name)
+                    departments = {fac_name: fac_data}
                 elif isinstance(fac_data, dict):
-                    for dept_name, dept_url in fac_data.items():
-                        dept_id = get_or_create_department(uni_id, fac_id, dept_name)
-                        total_inserted += self._scrape_and_insert(scraper, dept_url, uni_id, fac_id, dept_id, dept_name)
+                    departments = fac_data
+                else:
+                    continue
+                for dept_name, dept_url in departments.items():
+                    jobs.append({
+                        "uni_name": uni_name,
+                        "scraper_class": scraper_class,
+                        "url": dept_url,
+                        "uni_id": uni_id,
+                        "fac_id": fac_id,
+                        "dept_id": get_or_create_department(uni_id, fac_id, dept_name),
+                        "dept_name": dept_name,
+                    })
+        return jobs
+
+    def _run_phase1_lane(self, uni_name: str, jobs: list) -> int:
+        """Scrape one university's directories back to back (never two at once against its sites)."""
+        # One scraper per lane: scrapers keep per-run state and aren't thread-safe
+        scraper = jobs[0]["scraper_class"](university_id=jobs[0]["uni_id"])
+        inserted = 0
+        for job in jobs:
+            inserted += self._scrape_and_insert(scraper, job["url"], job["uni_id"], job["fac_id"],
+                                                job["dept_id"], job["dept_name"])
+        logger.info(f"=== Phase 1: {uni_name} done ({len(jobs)} directories, {inserted} inserted) ===")
+        return inserted
+
+    def run_phase1(self, university_filter: Optional[str] = None, max_workers: int = 8):
+        """
+        Scrape directories and upsert basic info (names, urls, IDs).
+        Directories are grouped into one lane per university, so the subdomains of one
+        university (faculty sites often share its servers) are never scraped at once;
+        lanes run in parallel on max_workers threads while each lane scrapes its
+        directories one at a time. Selenium scrapes are further capped by the browser
+        pool size. Longest lanes start first, so the run takes about as long as the
+        slowest university.
+        """
+        start = time.time()
+        reset_fetch_stats()
+        lanes: Dict[str, list] = {}
+        for job in self._phase1_jobs(university_filter):
+            lanes.setdefault(job["uni_name"], []).append(job)
 
+        logger.info(f"=== Phase 1: {sum(len(j) for j in lanes.values())} directories in {len(lanes)} universities ===")
+        total_inserted = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._run_phase1_lane, uni_name, jobs): uni_name
+                for uni_name, jobs in sorted(lanes.items(), key=lambda lane: -len(lane[1]))
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    total_inserted += future.result()
+                except Exception as e:
+                    logger.error(f"Phase 1 lane {futures[future]} failed: {e}")
+
+        log_fetch_stats("Phase 1 directory fetches")
         logger.info(f"--- Phase 1 Complete: {total_inserted} inserted in {time.time() - start:.1f}s ---")
 
     def _scrape_and_insert(self, scraper, url, uni_id, fac_id, dept_id, dept_name) -> int:
@@ -110,27 +217,61 @@ class ScraperOrchestrator:
             logger.error(f"Scraper error for {dept_name}: {e}")
             return 0
 
-        inserted = 0
-        for prof in professors:
-            try:
-                upsert_professor(
-                    first_name=prof["first_name"],
-                    last_name=prof["last_name"],
-                    profile_url=prof["profile_url"],
-                    university_id=uni_id,
-                    faculty_id=fac_id,
-                    department_id=dept_id,
-                )
-                inserted += 1
-            except Exception as e:
-                logger.error(f"DB error for {prof.get('profile_url', '?')}: {e}")
-        return inserted
+        if not professors:
+            return 0
+
+        # One statement and one commit per department instead of one per professor
+        try:
+            ids_by_url = bulk_upsert_professors(professors, uni_id, fac_id, dept_id)
+        except Exception as e:
+            logger.error(f"DB error for {dept_name} ({len(professors)} professors): {e}")
+            return 0
+        return len(ids_by_url)
 
     # ============================================================
     # PHASE 2: Fetch & Markdown (Network Bound)
     # ============================================================
+    def _get_cpu_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        Process pool for HTML parsing/conversion, so it doesn't serialize on the GIL with network I/O.
+        Created once under a lock (the fetch threads all ask for it); workers start from a
+        forkserver so they don't inherit this process's threads, DB pool or open sockets.
+        """
+        with self._cpu_pool_lock:
+            if self._cpu_pool is None:
+                self._cpu_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.cpu_workers, mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._cpu_pool
+
+    def close(self):
+        """Shut down the Phase 2 CPU pool."""
+        with self._cpu_pool_lock:
+            if self._cpu_pool is not None:
+                self._cpu_pool.shutdown(wait=True)
+                self._cpu_pool = None
+
     def _fetch_single_markdown(self, row: dict, force: bool = False) -> dict:
-        """Fetches HTML, converts to clean Markdown, saves to DB."""
+        """Fetches HTML (this thread), converts it in the CPU pool, saves to DB."""
+        store = get_page_store()
+        try:
+            if store and store.replaying:
+                html = store.get(row["profile_url"])
+                if html is None:
+                    # Never recorded: leave the row for a real crawl
+                    return {"processed": 0, "skipped": 1, "failed": 0}
+            else:
+                html = self.processor._fetch_html(row["profile_url"])
+                if store:
+                    store.record(row["profile_url"], html, source="profile")
+            page = self._get_cpu_pool().submit(process_page_html, html).result() if html else None
+        except Exception as e:
+            return self._mark_phase2_error(row, e)
+        return self._store_markdown(row, page)
+
+    def _store_markdown(self, row: dict, page: Optional[dict],
+                        http_etag: Optional[str] = None, http_last_modified: Optional[str] = None) -> dict:
+        """Saves a processed page (shared by sync and async Phase 2). page is None when the fetch failed."""
         prof_id = row["id"]
         prof_name = f"{row['first_name']} {row['last_name']}".strip()
         profile_url = row["profile_url"]
@@ -138,11 +279,14 @@ class ScraperOrchestrator:
         status = {"processed": 0, "skipped": 0, "failed": 0}
 
         try:
-            raw_text, html, new_hash = self.processor.fetch_and_hash(profile_url)
-            
-            if not html or not new_hash:
+            if not page or not page["content_hash"]:
                 # Page doesn't exist or timed out. Mark it so it leaves the queue.
-                update_professor_profile(professor_id=prof_id, profile_markdown="[UNAVAILABLE]")
+                record_pipeline_failure(
+                    prof_id,
+                    error="no page" if not page else "no extractable text",
+                    status=STATUS_UNAVAILABLE,
+                    profile_markdown="[UNAVAILABLE]",
+                )
                 logger.warning(f"  → [UNAVAILABLE] {prof_name} ({profile_url})")
                 status["failed"] = 1
                 return status
@@ -150,68 +294,385 @@ class ScraperOrchestrator:
             # REMOVED the hash skip check! 
             # If they are in this queue, they are missing Markdown. We MUST process them.
 
-            # Extract email from raw HTML
-            email = self.processor.extract_email(html)
-
-            # Clean and convert to Markdown
-            soup = BeautifulSoup(html, 'html.parser')
-            for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'meta', 'noscript']):
-                tag.decompose()
-            clean_md = md(str(soup), strip=['a', 'img', 'table']).strip()
-            
-            if len(clean_md) > 10000:
-                clean_md = clean_md[:10000]
-
             # Save everything to the database
             update_professor_profile(
                 professor_id=prof_id, 
-                content_hash=new_hash,
-                profile_markdown=clean_md,
-                email=email
+                content_hash=page["content_hash"],
+                profile_markdown=page["markdown"],
+                email=page["email"],
+                http_etag=http_etag,
+                http_last_modified=http_last_modified,
             )
             logger.info(f"  → [SUCCESS] Saved Markdown for {prof_name}")
             status["processed"] = 1
             
         except Exception as e:
-            logger.error(f"Phase 2 error for {prof_name}: {e}")
-            # CRITICAL: Prevent the infinite loop by marking the row as a hard error
-            try:
-                update_professor_profile(professor_id=prof_id, profile_markdown="[ERROR]")
-            except Exception as db_err:
-                logger.error(f"  → DB Error while saving failure state: {db_err}")
-            status["failed"] = 1
+            return self._mark_phase2_error(row, e)
 
         return status
 
+    def _mark_phase2_error(self, row: dict, error: Exception) -> dict:
+        """Marks a row as [ERROR] so it leaves the Phase 2 queue."""
+        prof_name = f"{row['first_name']} {row['last_name']}".strip()
+        logger.error(f"Phase 2 error for {prof_name}: {error}")
+        # CRITICAL: Prevent the infinite loop by marking the row as a hard error
+        try:
+            record_pipeline_failure(row["id"], error=str(error), status=STATUS_ERROR, profile_markdown="[ERROR]")
+        except Exception as db_err:
+            logger.error(f"  → DB Error while saving failure state: {db_err}")
+        return {"processed": 0, "skipped": 0, "failed": 1}
+
+    def _store_refresh(self, row: dict, status: Optional[int], page: Optional[dict],
+                       http_etag: Optional[str], http_last_modified: Optional[str]) -> dict:
+        """
+        Re-crawl bookkeeping for one professor. Unchanged pages (304, or same Trafilatura
+        hash) only get their validators refreshed, so they skip Markdown conversion, LLM
+        extraction and re-embedding. Failed fetches leave the stored profile untouched.
+        """
+        prof_id = row["id"]
+        prof_name = f"{row['first_name']} {row['last_name']}".strip()
+        result = {"processed": 0, "skipped": 0, "failed": 0}
+
+        try:
+            if status == 304:
+                # 304s often omit the validators; keep the stored ones in that case.
+                update_http_validators(prof_id, http_etag or row["http_etag"],
+                                       http_last_modified or row["http_last_modified"])
+                result["skipped"] = 1
+                return result
+
+            if status != 200 or not page:
+                logger.warning(f"  → [REFRESH FAILED] {prof_name} ({row['profile_url']}): HTTP {status}")
+                result["failed"] = 1
+                return result
+
+            if not page["content_hash"]:
+                logger.warning(f"  → [REFRESH FAILED] {prof_name}: no extractable text, keeping stored profile")
+                result["failed"] = 1
+                return result
+
+            if page["unchanged"]:
+                update_http_validators(prof_id, http_etag, http_last_modified)
+                result["skipped"] = 1
+                return result
+
+            replace_professor_markdown(
+                professor_id=prof_id,
+                profile_markdown=page["markdown"],
+                content_hash=page["content_hash"],
+                email=page["email"],
+                http_etag=http_etag,
+                http_last_modified=http_last_modified,
+            )
+            logger.info(f"  → [CHANGED] Re-saved Markdown for {prof_name}")
+            result["processed"] = 1
+
+        except Exception as e:
+            logger.error(f"Refresh error for {prof_name}: {e}")
+            result["failed"] = 1
+
+        return result
+
     def run_phase2(self, batch_size: int = 50, university_filter: Optional[str] = None, force: bool = False, max_workers: int = 10):
-        """Downloads profiles and converts them to Markdown concurrently."""
+        """
+        Downloads profiles and converts them to Markdown concurrently.
+        max_workers threads do the network I/O; parsing runs in the CPU process pool.
+        """
         start = time.time()
         processed = skipped = failed = 0
         uni_id = get_or_create_university(university_filter) if university_filter else None
 
-        while True:
-            # You will need a new DB query here: get_professors_missing_markdown()
-            rows = get_professors_missing_markdown(limit=batch_size, university_id=uni_id) # Update this repository function
-            if not rows:
-                break
-                
-            logger.info(f"Phase 2: Downloading batch of {len(rows)} profiles...")
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(self._fetch_single_markdown, row, force) for row in rows]
-                for future in concurrent.futures.as_completed(futures):
-                    res = future.result()
-                    processed += res["processed"]
-                    skipped += res["skipped"]
-                    failed += res["failed"]
+        last_id = 0
+        try:
+            while True:
+                # Leased to this worker, so other orchestrators skip these rows.
+                # The keyset cursor guarantees each row is visited at most once per run.
+                rows = claim_professors_missing_markdown(self.worker_id, limit=batch_size, university_id=uni_id,
+                                                         after_id=last_id)
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+
+                logger.info(f"Phase 2: Downloading batch of {len(rows)} profiles...")
+
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [executor.submit(self._fetch_single_markdown, row, force) for row in rows]
+                    for future in concurrent.futures.as_completed(futures):
+                        res = future.result()
+                        processed += res["processed"]
+                        skipped += res["skipped"]
+                        failed += res["failed"]
+        finally:
+            release_professor_leases(self.worker_id)
+
+        logger.info(f"--- Phase 2 Complete: {processed} fetched | {skipped} skipped | {failed} failed "
+                    f"in {time.time() - start:.1f}s ---")
+
+    def run_phase2_async(self, university_filter: Optional[str] = None, max_concurrency: int = 500,
+                         per_host: int = 4, window: int = 2000, db_workers: int = 4):
+        """
+        Async Phase 2: one shared keep-alive HTTP client with a global and a per-host
+        concurrency cap. Keeps up to `window` profiles queued across all universities,
+        refilling from the DB as they finish instead of waiting on the slowest page of a batch.
+        """
+        start = time.time()
+        uni_id = get_or_create_university(university_filter) if university_filter else None
+        totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+        try:
+            asyncio.run(self._phase2_async_loop(uni_id, totals, max_concurrency, per_host, window, db_workers))
+        finally:
+            release_professor_leases(self.worker_id)
+
+        logger.info(
+            f"--- Phase 2 (async) Complete: {totals['processed']} fetched | {totals['skipped']} skipped | "
+            f"{totals['failed']} failed in {time.time() - start:.1f}s ---"
+        )
+
+    def run_refresh(self, university_filter: Optional[str] = None, force: bool = False,
+                    max_concurrency: int = 500, per_host: int = 4, window: int = 2000, db_workers: int = 4):
+        """
+        Incremental re-crawl of already-downloaded profiles using conditional GETs
+        (stored ETag / Last-Modified) and the stored content_hash. Only changed pages are
+        re-converted and sent back to the Phase 3 queue. --force ignores both caches.
+        """
+        start = time.time()
+        uni_id = get_or_create_university(university_filter) if university_filter else None
+        totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+        asyncio.run(self._phase2_async_loop(uni_id, totals, max_concurrency, per_host, window, db_workers,
+                                            refresh=True, force=force))
+
+        logger.info(
+            f"--- Refresh Complete: {totals['processed']} changed | {totals['skipped']} unchanged | "
+            f"{totals['failed']} failed in {time.time() - start:.1f}s ---"
+        )
+
+    def run_reprocess(self, university_filter: Optional[str] = None, force: bool = False,
+                      page_store_dir: str = PAGE_STORE_DIR, db_workers: int = 4):
+        """
+        Re-run Phase 2 parsing on the HTML recorded in the page store instead of the
+        network (after a change to markdown cleanup or email extraction). Profiles
+        with no recorded page are skipped. Like refresh, pages whose text hash is
+        unchanged are left alone unless force is set.
+        """
+        store = get_page_store()
+        if not (store and store.replaying):
+            store = configure_page_store("replay", page_store_dir)
+        start = time.time()
+        uni_id = get_or_create_university(university_filter) if university_filter else None
+        totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+        asyncio.run(self._phase2_async_loop(uni_id, totals, max_concurrency=1, per_host=1, window=2000,
+                                            db_workers=db_workers, refresh=True, force=force))
+
+        logger.info(
+            f"--- Reprocess Complete: {totals['processed']} changed | {totals['skipped']} skipped "
+            f"({store.stats['misses']} not in the page store) | {totals['failed']} failed in {time.time() - start:.1f}s ---"
+        )
+
+    async def _phase2_async_loop(self, uni_id: Optional[int], totals: dict, max_concurrency: int,
+                                 per_host: int, window: int, db_workers: int,
+                                 refresh: bool = False, force: bool = False):
+        """
+        Three stages connected by bounded queues:
+          network (async fetches) → CPU (parse/clean/convert/hash in the process pool) → DB writes.
+        A full queue pauses the stage in front of it, so network concurrency and
+        parsing throughput scale independently without unbounded buffering.
+        """
+        loop = asyncio.get_running_loop()
+        cpu_pool = self._get_cpu_pool()
+        db_executor = concurrent.futures.ThreadPoolExecutor(max_workers=db_workers)
+        cpu_queue: asyncio.Queue = asyncio.Queue(maxsize=self.cpu_workers * 4)
+        db_queue: asyncio.Queue = asyncio.Queue(maxsize=db_workers * 4)
+        if refresh:
+            get_rows = get_professors_for_refresh
+        else:
+            def get_rows(limit: int, university_id: Optional[int], after_id: int) -> list:
+                return claim_professors_missing_markdown(self.worker_id, limit=limit, university_id=university_id,
+                                                         lease_seconds=PHASE2_LEASE_SECONDS, after_id=after_id)
+        use_validators = refresh and not force
+        store = get_page_store()
+        pending: set = set()
+        # Claimed rows not written back yet (refresh reads don't lease)
+        leased: set = set()
+        next_renewal = time.monotonic() + PHASE2_LEASE_RENEW_SECONDS
+        last_id = 0
+        exhausted = False
+
+        async def network_stage(row: dict):
+            try:
+                if store and store.replaying:
+                    # Stored page in place of the network; None (a miss) is skipped downstream
+                    html = await loop.run_in_executor(db_executor, store.get, row["profile_url"])
+                    fetched = None
+                    if html is not None:
+                        fetched = (200, html, row.get("http_etag"), row.get("http_last_modified"))
+                else:
+                    fetched = await fetcher.fetch_conditional(
+                        row["profile_url"],
+                        etag=row["http_etag"] if use_validators else None,
+                        last_modified=row["http_last_modified"] if use_validators else None,
+                    )
+                    if store and fetched[0] == 200:
+                        await loop.run_in_executor(db_executor, store.record, row["profile_url"], fetched[1], "profile")
+            except Exception as e:
+                fetched = e
+            await cpu_queue.put((row, fetched))
+
+        async def cpu_stage():
+            while True:
+                row, fetched = await cpu_queue.get()
+                page = None
+                try:
+                    if fetched and not isinstance(fetched, Exception) and fetched[0] == 200 and fetched[1]:
+                        previous_hash = row["content_hash"] if use_validators else None
+                        page = await loop.run_in_executor(cpu_pool, process_page_html, fetched[1], previous_hash)
+                except Exception as e:
+                    fetched = e
+                await db_queue.put((row, fetched, page))
+                cpu_queue.task_done()
+
+        def save(row: dict, fetched, page: Optional[dict]) -> dict:
+            if fetched is None:
+                return {"processed": 0, "skipped": 1, "failed": 0}
+            if isinstance(fetched, Exception):
+                if refresh:
+                    logger.error(f"Refresh error for {row['profile_url']}: {fetched}")
+                    return {"processed": 0, "skipped": 0, "failed": 1}
+                return self._mark_phase2_error(row, fetched)
+            status, _, etag, last_modified = fetched
+            if refresh:
+                return self._store_refresh(row, status, page, etag, last_modified)
+            return self._store_markdown(row, page, etag, last_modified)
+
+        async def db_stage():
+            while True:
+                row, fetched, page = await db_queue.get()
+                try:
+                    res = await loop.run_in_executor(db_executor, save, row, fetched, page)
+                    for key in totals:
+                        totals[key] += res[key]
+                finally:
+                    leased.discard(row["id"])
+                    db_queue.task_done()
+
+        async def renew_leases():
+            ids = list(leased)
+            try:
+                renewed = await loop.run_in_executor(
+                    db_executor, renew_professor_leases, self.worker_id, ids, PHASE2_LEASE_SECONDS,
+                )
+            except Exception as e:
+                logger.error(f"Phase 2 (async): lease renewal failed: {e}")
+                return
+            if renewed < len(ids):
+                logger.warning(f"Phase 2 (async): renewed {renewed} of {len(ids)} leases; "
+                               f"the rest expired and were re-claimed by another worker")
+
+        stage_workers = [asyncio.create_task(cpu_stage()) for _ in range(self.cpu_workers)]
+        stage_workers += [asyncio.create_task(db_stage()) for _ in range(db_workers)]
+
+        try:
+            async with AsyncProfileFetcher(max_concurrency=max_concurrency, per_host=per_host) as fetcher:
+                while pending or not exhausted:
+                    if not exhausted and len(pending) <= window // 2:
+                        rows = await loop.run_in_executor(
+                            db_executor,
+                            functools.partial(
+                                get_rows, limit=window - len(pending), university_id=uni_id, after_id=last_id,
+                            ),
+                        )
+                        if rows:
+                            last_id = rows[-1]["id"]
+                            if not refresh:
+                                leased.update(row["id"] for row in rows)
+                            pending.update(asyncio.create_task(network_stage(row)) for row in rows)
+                            logger.info(f"Phase 2 (async): queued {len(rows)} profiles, {len(pending)} in flight")
+                        else:
+                            exhausted = True
+                    if leased and time.monotonic() >= next_renewal:
+                        await renew_leases()
+                        next_renewal = time.monotonic() + PHASE2_LEASE_RENEW_SECONDS
+                    if not pending:
+                        continue
+
+                    # Wake up at least once per renewal interval even if no fetch finishes
+                    done, pending = await asyncio.wait(pending, timeout=PHASE2_LEASE_RENEW_SECONDS,
+                                                       return_when=asyncio.FIRST_COMPLETED)
+
+            await cpu_queue.join()
+            await db_queue.join()
+        finally:
+            for worker in stage_workers:
+                worker.cancel()
+            await asyncio.gather(*stage_workers, return_exceptions=True)
+            db_executor.shutdown(wait=True)
+
+    # ============================================================
+    # Department boilerplate pass (between Phase 2 and Phase 3)
+    # ============================================================
+    def run_boilerplate(self, university_filter: Optional[str] = None, share: float = BOILERPLATE_SHARE,
+                        min_pages: int = BOILERPLATE_MIN_PAGES):
+        """
+        Learns each department's template lines (menus rendered as lists, footers and
+        cookie banners that survived tag stripping) from line fingerprint counts across
+        its pages, and strips every line found on more than `share` of them from the
+        stored markdown. Counts accumulate in department_boilerplate, so pages added by
+        later runs are judged against everything seen before; a re-crawled page replaces
+        its earlier lines rather than being counted again. Departments with fewer than
+        min_pages pages are left pending until more arrive.
+        """
+        start = time.time()
+        uni_id = get_or_create_university(university_filter) if university_filter else None
+        departments = get_departments_pending_boilerplate(uni_id)
+        pages_done = chars_before = chars_after = 0
 
-        logger.info(f"--- Phase 2 Complete: {processed} fetched | {failed} failed in {time.time() - start:.1f}s ---")
+        for dept_id in departments:
+            pages = get_pending_boilerplate_pages(dept_id)
+            if not pages:
+                continue
+
+            counts, total = get_department_boilerplate_counts(dept_id)
+            fingerprints = [page_line_fingerprints(markdown) for _, markdown, _, _ in pages]
+            # Re-crawled pages were counted before: they swap their old lines for the new ones
+            total += sum(1 for _, _, _, counted_lines in pages if counted_lines is None)
+            if total < min_pages:
+                continue
+            for (_, _, _, counted_lines), page_lines in zip(pages, fingerprints):
+                for line_hash in counted_lines or ():
+                    counts[line_hash] = counts.get(line_hash, 0) - 1
+                for line_hash in page_lines:
+                    counts[line_hash] = counts.get(line_hash, 0) + 1
+
+            boilerplate = {line_hash for line_hash, n in counts.items() if n > share * total}
+            stripped = []
+            for (prof_id, markdown, content_hash, _), page_lines in zip(pages, fingerprints):
+                clean = strip_boilerplate(markdown, boilerplate)
+                stripped.append((prof_id, clean, content_hash, page_lines))
+                chars_before += len(markdown)
+                chars_after += len(clean)
+
+            # Only pages unchanged since they were read and not stripped by another run are stored and counted
+            pages_done += save_department_boilerplate(dept_id, stripped)
+            logger.info(f"  Department {dept_id}: {len(boilerplate)} boilerplate lines over {total} pages")
+
+        saved = 100 * (1 - chars_after / chars_before) if chars_before else 0.0
+        logger.info(
+            f"--- Boilerplate pass Complete: {pages_done} pages in {len(departments)} departments, "
+            f"{saved:.0f}% of markdown removed in {time.time() - start:.1f}s ---"
+        )
 
     # ============================================================
     # PHASE 3: AI Sprint & Embeddings (Compute Bound)
     # ============================================================
-    def _ai_extract_single(self, row: dict) -> dict:
-        """Passes Markdown to Ollama and generates the vector embedding."""
+    def _ai_extract_single(self, row: dict, batcher: Optional[EmbeddingBatcher] = None,
+                           department_stats: Optional[DepartmentLineStats] = None) -> dict:
+        """
+        Passes Markdown to Ollama and generates the vector embedding.
+        With a batcher the result is queued for batched embedding + bulk write instead.
+        department_stats lets the processor drop the department's template text.
+        """
         prof_id = row["id"]
         prof_name = f"{row['first_name']} {row['last_name']}".strip()
         markdown = row.get("profile_markdown")
@@ -224,9 +685,18 @@ class ScraperOrchestrator:
 
         try:
             # Let the processor handle the Qwen 3.5 call
-            result = self.processor.extract_with_llm(markdown, prof_name) 
+            result = self.processor.extract_with_llm(markdown, prof_name, department_stats)
             
-            if result:
+            if result and batcher and result.get("holistic_profile_string"):
+                batcher.submit(result["holistic_profile_string"], {
+                    "id": prof_id,
+                    "unique_interests": result.get("unique_interests"),
+                    "holistic_profile_string": result["holistic_profile_string"],
+                    "bio": result.get("bio"),
+                    "accepting_students": result.get("accepting_students"),
+                })
+                status["processed"] = 1
+            elif result:
                 holistic_string = result.get("holistic_profile_string")
                 embedding = embed_text(holistic_string) if holistic_string else None
 
@@ -242,34 +712,96 @@ class ScraperOrchestrator:
                 status["processed"] = 1
             else:
                 status["failed"] = 1
+                self._mark_phase3_failure(prof_id, "LLM returned no result")
                 
         except Exception as e:
             logger.error(f"Phase 3 error for {prof_name}: {e}")
             status["failed"] = 1
+            self._mark_phase3_failure(prof_id, str(e))
 
         return status
 
-    def run_phase3(self, batch_size: int = 20, university_filter: Optional[str] = None, max_workers: int = 2):
-        """Runs the LLM and embedding models on the downloaded Markdown."""
+    @staticmethod
+    def _store_ai_batch(items: list):
+        """
+        EmbeddingBatcher sink: one bulk UPDATE for a batch of extracted + embedded professors.
+        Fields the LLM left out keep their stored values, as on the unbatched path.
+        """
+        batch_update_professor_ai_data([{**payload, "embedding": embedding} for payload, embedding in items],
+                                       overwrite=False)
+
+    def _on_embed_batch_error(self, payloads: list, error: Exception):
+        for payload in payloads:
+            self._mark_phase3_failure(payload["id"], f"embedding: {error}")
+
+    def _mark_phase3_failure(self, prof_id: int, error: str):
+        """Counts a failed extraction; the row stays queued until MAX_AI_ATTEMPTS."""
+        try:
+            record_pipeline_failure(prof_id, error=error, max_attempts=MAX_AI_ATTEMPTS)
+        except Exception as db_err:
+            logger.error(f"  → DB Error while saving failure state: {db_err}")
+
+    def run_phase3(self, batch_size: int = 20, university_filter: Optional[str] = None, max_workers: int = 2,
+                   embed_batch_size: int = 64, embed_wait_ms: int = 200):
+        """
+        Runs the LLM and embedding models on the downloaded Markdown.
+        LLM results are embedded in micro-batches (up to embed_batch_size strings, or
+        whatever arrived within embed_wait_ms) and written with one bulk UPDATE per batch.
+        """
         start = time.time()
         processed = failed = 0
         uni_id = get_or_create_university(university_filter) if university_filter else None
-
-        while True:
-            # You will need a DB query: get_professors_ready_for_ai() -> where markdown is not null but interests are null
-            rows = get_professors_ready_for_ai(university_id=uni_id) # Update this repository function to fetch AI-ready rows
-            if not rows:
-                break
-                
-            logger.info(f"Phase 3: AI Extracting batch of {len(rows)}...")
-            
-            # Keep max_workers low (1-3) here so you don't overload your GPU VRAM with Ollama requests
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(self._ai_extract_single, row) for row in rows]
-                for future in concurrent.futures.as_completed(futures):
-                    res = future.result()
-                    processed += res["processed"]
-                    failed += res["failed"]
+        batcher = EmbeddingBatcher(
+            self._store_ai_batch,
+            max_batch=embed_batch_size,
+            max_wait_ms=embed_wait_ms,
+            on_error=self._on_embed_batch_error,
+        )
+
+        department_stats: Dict[int, Optional[DepartmentLineStats]] = {}
+        last_id = 0
+        try:
+            while True:
+                # Keyset cursor: rows whose extraction failed are left behind instead of
+                # coming back every iteration, so the loop always terminates.
+                rows = claim_professors_ready_for_ai(self.worker_id, limit=batch_size, university_id=uni_id,
+                                                     after_id=last_id)
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+
+                # Template lines come from the counts the boilerplate pass stored for the whole
+                # department; a batch holds too few of its pages to tell them apart. Departments
+                # that pass hasn't judged yet are condensed without them.
+                current = {row["department_id"] for row in rows}
+                if len(department_stats) > MAX_DEPARTMENT_STATS:
+                    department_stats = {k: v for k, v in department_stats.items() if k in current}
+                for dept_id in current - department_stats.keys():
+                    counts, pages = get_department_boilerplate_counts(dept_id, min_share=DEPARTMENT_LINE_SHARE)
+                    department_stats[dept_id] = (
+                        DepartmentLineStats.from_counts(counts, pages) if pages >= BOILERPLATE_MIN_PAGES else None
+                    )
+
+                logger.info(f"Phase 3: AI Extracting batch of {len(rows)}...")
+
+                # Keep max_workers low (1-3) here so you don't overload your GPU VRAM with Ollama requests
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = [
+                        executor.submit(self._ai_extract_single, row, batcher, department_stats[row["department_id"]])
+                        for row in rows
+                    ]
+                    for future in concurrent.futures.as_completed(futures):
+                        res = future.result()
+                        processed += res["processed"]
+                        failed += res["failed"]
+        finally:
+            # Flush pending embeddings before the leases go back
+            batcher.close()
+            release_professor_leases(self.worker_id)
+
+        # Rows that were extracted but lost in a failed embedding batch
+        processed -= batcher.failed
+        failed += batcher.failed
 
         logger.info(f"--- Phase 3 Complete: {processed} AI extracted | {failed} failed in {time.time() - start:.1f}s ---")
 
@@ -280,20 +812,65 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
     parser = argparse.ArgumentParser(description="FindMyProfessor 3-Phase Orchestrator")
-    parser.add_argument("--phase", choices=["1", "2", "3", "all"], default="all", help="Which phase to run")
+    parser.add_argument("--phase", choices=["1", "2", "3", "all", "refresh", "reprocess", "boilerplate"],
+                        default="all",
+                        help="Which phase to run ('refresh' = incremental re-crawl of Phase 2, "
+                             "'reprocess' = re-run Phase 2 parsing on pages in the page store, "
+                             "'boilerplate' = only the department template-stripping pass)")
     parser.add_argument("--university", type=str, default=None, help="Filter to a single university")
     parser.add_argument("--force", action="store_true", help="Ignore hash caches")
+    parser.add_argument("--scrape-workers", type=int, default=8, help="Phase 1: universities scraped in parallel")
+    parser.add_argument("--browsers", type=int, default=None,
+                        help="Phase 1: headless Chrome instances in the browser pool (default: BROWSER_POOL_SIZE)")
     parser.add_argument("--max-workers", type=int, default=10, help="Workers for Phase 2 (Network)")
+    parser.add_argument("--async-fetch", action="store_true", help="Run Phase 2 on the asyncio fetch engine")
+    parser.add_argument("--max-concurrency", type=int, default=500, help="Async Phase 2: total requests in flight")
+    parser.add_argument("--per-host", type=int, default=4, help="Async Phase 2: requests in flight per hostname")
+    parser.add_argument("--cpu-workers", type=int, default=None, help="Processes for Phase 2 HTML parsing (default: all cores)")
     parser.add_argument("--ai-workers", type=int, default=2, help="Workers for Phase 3 (GPU)")
+    parser.add_argument("--embed-batch", type=int, default=64, help="Phase 3: max strings per embedding batch")
+    parser.add_argument("--embed-wait-ms", type=int, default=200, help="Phase 3: max wait to fill an embedding batch")
+    parser.add_argument("--boilerplate-share", type=float, default=BOILERPLATE_SHARE,
+                        help="Strip lines found on more than this share of a department's pages")
+    parser.add_argument("--page-store", choices=PAGE_STORE_MODES, default=None,
+                        help="Phases 1-2: 'record' saves every fetched page, 'replay' reads them back "
+                             "instead of the network (pages never recorded are skipped)")
+    parser.add_argument("--page-store-dir", type=str, default=PAGE_STORE_DIR,
+                        help="Page store location (default: $SCRAPER_PAGE_STORE or ./page_store)")
+    parser.add_argument("--worker-id", type=str, default=None,
+                        help="Lease owner name when several orchestrators share one DB (default: hostname:pid)")
 
     args = parser.parse_args()
-    orchestrator = ScraperOrchestrator("scraper/universities.json")
+    orchestrator = ScraperOrchestrator("scraper/universities.json", cpu_workers=args.cpu_workers,
+                                       worker_id=args.worker_id)
+    ensure_pipeline_schema()
+    preload_taxonomy_cache()
+    if args.page_store:
+        configure_page_store(args.page_store, args.page_store_dir)
 
     if args.phase in ("1", "all"):
-        orchestrator.run_phase1(args.university)
+        if args.browsers:
+            configure_browser_pool(args.browsers)
+        orchestrator.run_phase1(args.university, max_workers=args.scrape_workers)
     if args.phase in ("2", "all"):
-        orchestrator.run_phase2(university_filter=args.university, force=args.force, max_workers=args.max_workers)
-    if args.phase in ("3", "all"):
-        orchestrator.run_phase3(university_filter=args.university, max_workers=args.ai_workers)
-
+        if args.async_fetch:
+            orchestrator.run_phase2_async(university_filter=args.university, max_concurrency=args.max_concurrency,
+                                          per_host=args.per_host)
+        else:
+            orchestrator.run_phase2(university_filter=args.university, force=args.force, max_workers=args.max_workers)
+    if args.phase == "refresh":
+        orchestrator.run_refresh(university_filter=args.university, force=args.force,
+                                 max_concurrency=args.max_concurrency, per_host=args.per_host)
+    if args.phase == "reprocess":
+        orchestrator.run_reprocess(university_filter=args.university, force=args.force,
+                                   page_store_dir=args.page_store_dir)
+    if args.phase in ("2", "refresh", "reprocess", "all", "boilerplate"):
+        orchestrator.run_boilerplate(university_filter=args.university, share=args.boilerplate_share)
+    if args.phase in ("3", "refresh", "reprocess", "all"):
+        orchestrator.run_phase3(university_filter=args.university, max_workers=args.ai_workers,
+                                embed_batch_size=args.embed_batch, embed_wait_ms=args.embed_wait_ms)
+
+    orchestrator.close()
+    close_browser_pool()
+    close_page_store()
     close_pool()
\ No newline at end of file
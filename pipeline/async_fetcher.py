@@ -0,0 +1,124 @@
+"""
+Shared asyncio HTTP client for Phase 2 profile downloads.
+
+A single aiohttp session (keep-alive connection pooling) is shared by every
+fetch. Two limits apply on top of it:
+  - a global cap on requests in flight across all universities
+  - a per-hostname cap so no single university web server gets hammered
+
+Requests queued behind a busy host wait on that host's semaphore only, so they
+never hold a global slot that another university could be using.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# (status, html, etag, last_modified)
+FetchResult = Tuple[Optional[int], Optional[str], Optional[str], Optional[str]]
+
+
+def _retry_after_seconds(resp: aiohttp.ClientResponse, attempt: int) -> float:
+    """Honour a numeric Retry-After header, otherwise back off exponentially."""
+    header = resp.headers.get("Retry-After", "")
+    if header.isdigit():
+        return min(60.0, float(header))
+    return min(60.0, 2.0 ** (attempt + 1))
+
+
+class AsyncProfileFetcher:
+    """
+    Async counterpart of ProfileProcessor._fetch_html.
+    Use as an async context manager so the pooled session is closed on exit.
+    """
+
+    def __init__(self, max_concurrency: int = 500, per_host: int = 4,
+                 timeout: int = 30, max_retries: int = 3):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncProfileFetcher":
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            headers={"User-Agent": USER_AGENT},
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname or ""
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Fetch HTML for a profile URL. Returns None on failure, like _fetch_html."""
+        status, html, _, _ = await self.fetch_conditional(url)
+        return html if status == 200 else None
+
+    async def fetch_conditional(self, url: str, etag: Optional[str] = None,
+                                last_modified: Optional[str] = None) -> FetchResult:
+        """
+        GET with If-None-Match / If-Modified-Since when validators are known.
+        Returns (status, html, etag, last_modified). status is None on network failure,
+        html is None unless status is 200.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async with self._host_semaphore(url):
+            for attempt in range(self.max_retries):
+                async with self._global:
+                    try:
+                        async with self._session.get(url, headers=headers, allow_redirects=True) as resp:
+                            if resp.status != 429:
+                                validators = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                                if resp.status == 304:
+                                    return 304, None, *validators
+                                resp.raise_for_status()
+                                return 200, await resp.text(errors="replace"), *validators
+                            wait = _retry_after_seconds(resp, attempt)
+                    except aiohttp.ClientResponseError as e:
+                        logger.warning(f"Failed to fetch {url}: {e}")
+                        return e.status, None, None, None
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        logger.warning(f"Failed to fetch {url}: {e}")
+                        return None, None, None, None
+
+                # 429: sleep while still holding the host slot so the whole host backs off,
+                # but outside the global semaphore so other universities keep going.
+                logger.warning(f"429 for {url}, backing off {wait:.0f}s (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(wait)
+
+        logger.warning(f"Failed to fetch {url}: still rate limited after {self.max_retries} attempts")
+        return 429, None, None, None
@@ -4,6 +4,19 @@ GPU cloud worker for LLM extraction (Asyncio Version).
 Reads cloud_input.jsonl (professor markdown exported locally),
 runs structured extraction via llama.cpp server, writes cloud_output.jsonl.
 
+With --adaptive the number of in-flight requests is tuned at runtime (AIMD on
+completion tokens/sec, back-off on rising latency and on errors) between
+--min-parallel and --max-parallel instead of having to match llama-server's -np by hand.
+
+Results are appended to the output as they complete (fsync'd periodically), so
+a crash or preemption loses at most the last few rows. Re-running with the same
+--output resumes: keys already in the file are skipped, [ERROR] rows are retried.
+
+Failed extractions (non-200, timeouts, unparseable output) are requeued within the
+run with exponential backoff. After --max-attempts the input record goes to a
+dead-letter file (default <output>.dead.jsonl) instead of an [ERROR] row, so it can
+be fed back in later with --input. Resumed runs skip rows already dead-lettered.
+
 Usage on GPU machine:
     1. pip install aiohttp
     2. Start llama-server with your model (ensure -np matches --parallel)
@@ -16,38 +29,21 @@ import logging
 import sys
 import argparse
 import asyncio
+import random
 import aiohttp
 
+from .extraction_request import PROFILE_TOKEN_BUDGET, approx_truncate, build_payload, needs_token_count
+
 LLAMA_BASE_URL = os.environ.get("LLAMA_BASE_URL", "http://localhost:8000") # Defaulted to 8000 for llama.cpp
 
-EXTRACTION_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "name": {
-            "type": "string",
-            "description": "The professor's full name."
-        },
-        "email": {
-            "type": "string",
-            "description": "The professor's email address if found in the text, otherwise 'NA'."
-        },
-        "bio": {
-            "type": "string",
-            "description": "A concise 2-3 sentence summary of their academic background and core focus."
-        },
-        "interests": {
-            "type": "array",
-            "items": {"type": "string"},
-            "maxItems": 10,
-            "description": "A list of 1 to 4 word research interests."
-        },
-        "accepting_students": {
-            "type": "string",
-            "enum": ["Yes", "No", "NA"],
-            "description": "Whether the professor explicitly mentions accepting new graduate students. 'Yes' if actively recruiting, 'No' if explicitly full, 'NA' if completely unmentioned."
-        }
-    },
-    "required": ["name", "email", "bio", "interests", "accepting_students"]
+# Sampling settings for extraction requests (the prompt itself lives in extraction_request)
+SAMPLING = {
+    "temperature": 1.0,
+    "top_p": 1.0,
+    "top_k": 20,
+    "min_p": 0.0,
+    "presence_penalty": 2.0,
+    "repetition_penalty": 1.0,
 }
 
 def setup_logger():
@@ -64,7 +60,19 @@ def setup_logger():
 
 logger = setup_logger()
 
-def _empty_result(record_key, key_field="id", status="[UNAVAILABLE]"):
+def _record_key(data):
+    """(key_field, key) for a record: DB-backed records use id, new scrapes use profile_url."""
+    if "id" in data:
+        return "id", data["id"]
+    return "profile_url", data["profile_url"]
+
+RETRY_BASE_DELAY = 2.0   # seconds before the first retry, doubled per attempt
+RETRY_MAX_DELAY = 60.0
+
+def _empty_result(record_key, key_field="id", status="[UNAVAILABLE]", error=None):
+    if error:
+        # Only read by the retry logic; never written to the output
+        return {key_field: record_key, "holistic_profile_string": status, "error": error}
     return {
         key_field: record_key,
         "bio": None,
@@ -74,149 +82,425 @@ def _empty_result(record_key, key_field="id", status="[UNAVAILABLE]"):
         "llm_email": None
     }
 
-async def process_single_row(session, semaphore, data_line, current_idx, total_lines):
-    # The semaphore acts as a strict bottleneck, ensuring we NEVER exceed your --parallel limit
-    async with semaphore:
-        try:
-            data = json.loads(data_line) if isinstance(data_line, str) else data_line
-            # Support both DB-backed records (id) and new scrapes (profile_url)
-            if "id" in data:
-                record_key = data["id"]
-                key_field = "id"
-            else:
-                record_key = data["profile_url"]
-                key_field = "profile_url"
-            prof_name = data["name"]
-            faculty = data.get("faculty", "")
-            department = data.get("department", "")
-            clean_markdown = data["profile_markdown"]
-        except KeyError as e:
-            logger.error(f"Malformed JSON line, missing key: {e}")
-            return None
-
-        if not clean_markdown or clean_markdown in ["[UNAVAILABLE]", "[ERROR]"]:
-            logger.warning(f"Skipping {record_key} ({prof_name}) - Markdown unavailable.")
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for llama-server.
+    Every "round" (as many completions as the current limit) the completion-token
+    throughput is compared with the previous round: while it holds up the limit grows
+    by one; once it drops we've pushed past the GPU's knee and step back by one.
+    A saturated server often keeps throughput flat while requests just queue longer,
+    so the limit also steps back when throughput has stopped growing and the round's
+    median latency per completion token is more than latency_tolerance times the
+    best seen so far.
+    Non-200s and timeouts cut the limit multiplicatively, once per round of
+    requests: failures from requests sent before the last cut are not counted again.
+    """
+
+    def __init__(self, initial, min_limit=1, max_limit=64, decrease_factor=0.7, hold_rounds=3,
+                 latency_tolerance=1.5, clock=time.monotonic):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.decrease_factor = decrease_factor
+        self.hold_rounds = hold_rounds
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._in_flight = 0
+        self._epoch = 0
+        self._hold = 0
+        self._cond = asyncio.Condition()
+        self._last_rate = None
+        self._best_latency = None
+        self._reset_window(clock())
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_tokens = 0
+        self._window_done = 0
+        self._window_latencies = []
+
+    async def acquire(self):
+        """Wait for a free slot. Returns a ticket to pass back to release()."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            return self._epoch, self._clock()
+
+    async def release(self, ticket, ok, tokens=1):
+        """Free the slot and feed back the outcome: ok=False for non-200/timeouts, tokens from usage."""
+        async with self._cond:
+            self._in_flight -= 1
+            self._update(ticket, ok, tokens)
+            self._cond.notify_all()
+
+    def _set_limit(self, new_limit, reason):
+        new_limit = max(self.min_limit, min(new_limit, self.max_limit))
+        if new_limit != self.limit:
+            logger.info(f"Adaptive concurrency: {self.limit} -> {new_limit} ({reason})")
+            self.limit = new_limit
+
+    def _update(self, ticket, ok, tokens):
+        now = self._clock()
+        epoch, started = ticket
+        if not ok:
+            if epoch == self._epoch:
+                self._epoch += 1
+                self._hold = self.hold_rounds
+                self._last_rate = None
+                self._set_limit(int(self.limit * self.decrease_factor), "server error/timeout")
+                self._reset_window(now)
+            return
+
+        self._window_tokens += tokens
+        self._window_done += 1
+        # Per completion token, so long and short answers are comparable
+        self._window_latencies.append((now - started) / max(tokens, 1))
+        if self._window_done < max(4, self.limit):
+            return
+
+        rate = self._window_tokens / max(now - self._window_start, 1e-6)
+        latency = sorted(self._window_latencies)[len(self._window_latencies) // 2]
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        queueing = (latency > self._best_latency * self.latency_tolerance
+                    and self._last_rate is not None and rate < self._last_rate * 1.05)
+        if self._hold:
+            self._hold -= 1
+        elif queueing:
+            self._set_limit(self.limit - 1, f"p50 {latency * 1000:.0f} ms/token, "
+                                            f"best {self._best_latency * 1000:.0f}, {rate:.0f} tok/s")
+        elif self._last_rate is None or rate >= self._last_rate * 0.95:
+            self._set_limit(self.limit + 1, f"{rate:.0f} tok/s")
+        elif rate < self._last_rate * 0.9:
+            self._set_limit(self.limit - 1, f"{rate:.0f} tok/s, was {self._last_rate:.0f}")
+        self._last_rate = rate
+        self._reset_window(now)
+
+async def process_single_row(session, data_line, current_idx, total_lines, limiter=None):
+    # Concurrency is bounded by the worker pool in run_cloud_sprint (one request per worker),
+    # and additionally by the adaptive limiter when one is passed
+    try:
+        data = json.loads(data_line) if isinstance(data_line, str) else data_line
+        # Support both DB-backed records (id) and new scrapes (profile_url)
+        key_field, record_key = _record_key(data)
+        prof_name = data["name"]
+        faculty = data.get("faculty", "")
+        department = data.get("department", "")
+        clean_markdown = data["profile_markdown"]
+    except KeyError as e:
+        logger.error(f"Malformed JSON line, missing key: {e}")
+        return None
+
+    if not clean_markdown or clean_markdown in ["[UNAVAILABLE]", "[ERROR]"]:
+        logger.warning(f"Skipping {record_key} ({prof_name}) - Markdown unavailable.")
+        return _empty_result(record_key, key_field)
+
+    try:
+        # Static prompt prefix first (prompt-cache hit), token-budgeted profile last
+        profile_text = await _budget_profile_text(session, clean_markdown)
+        payload = build_payload(prof_name, profile_text, **SAMPLING)
+        status, body = await _request_completion(session, payload, limiter)
+
+        # Catch actual server overload errors before attempting to parse JSON
+        if status != 200:
+            logger.error(f"Server returned {status} for {record_key}. Server said: {body}")
+            return _empty_result(record_key, key_field, "[ERROR]", error=f"HTTP {status}: {body[:200]}")
+
+        raw = body["choices"][0]["message"]["content"]
+        data_out = json.loads(raw)
+
+        interests = [i.strip() for i in data_out.get("interests", []) if i.strip()][:10]
+        bio = data_out.get("bio", "").strip()
+        accepting = data_out.get("accepting_students", "NA")
+        llm_email = data_out.get("email", "").strip()
+
+        if not interests and not bio:
+            logger.warning(f"{record_key} ({prof_name}) - Empty extraction.")
             return _empty_result(record_key, key_field)
 
-        prompt = (
-            f"Extract structured information about Professor {prof_name} "
-            f"from the following profile page content.\n\n"
-            f"Profile:\n{clean_markdown[:10000]}"
-        )
-
-        payload = {
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a precise academic profile extractor. "
-                        "Return only valid JSON matching the provided schema. "
-                        "For interests, use 1-4 word phrases only. "
-                        "For accepting_students, output exactly 'Yes', 'No', or 'NA'."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": 1.0,
-            "top_p": 1.0,
-            "top_k": 20,
-            "min_p": 0.0,
-            "presence_penalty": 2.0,
-            "repetition_penalty": 1.0,
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": {"name": "extraction", "strict": True, "schema": EXTRACTION_SCHEMA},
-            },
+        kw_str = ", ".join(interests)
+        holistic = f"Professor {prof_name}, {faculty}, {department}. Research interests: {kw_str}."
+
+        logger.info(f"[{current_idx}/{total_lines}] {record_key} ({prof_name}) — {len(interests)} interests, accepting={accepting}")
+
+        return {
+            key_field: record_key,
+            "bio": bio,
+            "unique_interests": interests,
+            "accepting_students": accepting,
+            "holistic_profile_string": holistic,
+            "llm_email": llm_email if llm_email and llm_email != "NA" else None,
         }
 
-        try:
-            # We use aiohttp instead of requests here to keep it entirely asynchronous
-            async with session.post(
-                f"{LLAMA_BASE_URL}/v1/chat/completions",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=600)
-            ) as resp:
-                
-                # Catch actual server overload errors before attempting to parse JSON
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    logger.error(f"Server returned {resp.status} for ID {prof_id}. Server said: {error_text}")
-                    return _empty_result(prof_id, "[ERROR]")
-
-                raw_json = await resp.json()
-                raw = raw_json["choices"][0]["message"]["content"]
-                data_out = json.loads(raw)
-
-                interests = [i.strip() for i in data_out.get("interests", []) if i.strip()][:10]
-                bio = data_out.get("bio", "").strip()
-                accepting = data_out.get("accepting_students", "NA")
-                llm_email = data_out.get("email", "").strip()
-
-                if not interests and not bio:
-                    logger.warning(f"{record_key} ({prof_name}) - Empty extraction.")
-                    return _empty_result(record_key, key_field)
-
-                kw_str = ", ".join(interests)
-                holistic = f"Professor {prof_name}, {faculty}, {department}. Research interests: {kw_str}."
-
-                logger.info(f"[{current_idx}/{total_lines}] {record_key} ({prof_name}) — {len(interests)} interests, accepting={accepting}")
-
-                return {
-                    key_field: record_key,
-                    "bio": bio,
-                    "unique_interests": interests,
-                    "accepting_students": accepting,
-                    "holistic_profile_string": holistic,
-                    "llm_email": llm_email if llm_email and llm_email != "NA" else None,
-                }
+    except Exception as e:
+        logger.error(f"Inference failed for {record_key} ({prof_name}): {e}")
+        return _empty_result(record_key, key_field, "[ERROR]", error=f"{type(e).__name__}: {e}")
+
+_tokenize_supported = None  # unknown until the first /tokenize call
+
+async def _budget_profile_text(session, text, max_tokens=PROFILE_TOKEN_BUDGET):
+    """
+    Cut text to max_tokens with llama-server's /tokenize + /detokenize (exact for the
+    loaded model); chars/4 if the server has no tokenizer endpoint.
+    """
+    global _tokenize_supported
+    if not needs_token_count(text, max_tokens):
+        return text
 
+    if _tokenize_supported is not False:
+        try:
+            timeout = aiohttp.ClientTimeout(total=30)
+            async with session.post(f"{LLAMA_BASE_URL}/tokenize", json={"content": text}, timeout=timeout) as resp:
+                resp.raise_for_status()
+                tokens = (await resp.json())["tokens"]
+            _tokenize_supported = True
+            if len(tokens) <= max_tokens:
+                return text
+            async with session.post(f"{LLAMA_BASE_URL}/detokenize", json={"tokens": tokens[:max_tokens]},
+                                    timeout=timeout) as resp:
+                resp.raise_for_status()
+                return (await resp.json())["content"]
         except Exception as e:
-            logger.error(f"Inference failed for {record_key} ({prof_name}): {e}")
-            return _empty_result(record_key, key_field, "[ERROR]")
+            if _tokenize_supported is None:
+                logger.warning(f"No usable /tokenize on {LLAMA_BASE_URL} ({e}); budgeting by characters")
+                _tokenize_supported = False
+
+    return approx_truncate(text, max_tokens)
 
-async def run_cloud_sprint(input_file="cloud_input.jsonl", output_file="cloud_output.jsonl", parallel=24):
+async def _request_completion(session, payload, limiter=None):
+    """
+    POST one chat completion. Returns (status, parsed JSON body or error text).
+    With a limiter, the request holds a limiter slot and its outcome (status,
+    completion tokens) is fed back to it.
+    """
+    ticket = await limiter.acquire() if limiter else None
+    ok, tokens = False, 1
     try:
-        with open(input_file, 'r') as f:
-            lines = f.readlines()
-    except FileNotFoundError:
+        # We use aiohttp instead of requests here to keep it entirely asynchronous
+        async with session.post(
+            f"{LLAMA_BASE_URL}/v1/chat/completions",
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=600)
+        ) as resp:
+            if resp.status != 200:
+                return resp.status, await resp.text()
+            body = await resp.json()
+            ok = True
+            tokens = (body.get("usage") or {}).get("completion_tokens") or 1
+            return 200, body
+    finally:
+        if limiter:
+            await limiter.release(ticket, ok, tokens)
+
+def load_done_keys(output_file):
+    """
+    Keys already written to a previous run's output. [ERROR] rows don't count, so they
+    are retried. A torn last line (crash mid-write) is truncated away so appends
+    start on a clean line.
+    """
+    done = set()
+    if not os.path.exists(output_file):
+        return done
+
+    good_end = 0
+    with open(output_file, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                res = json.loads(raw)
+            except ValueError:
+                break
+            good_end += len(raw)
+            if res.get("holistic_profile_string") != "[ERROR]":
+                done.add(_record_key(res)[1])
+
+    if good_end < os.path.getsize(output_file):
+        logger.warning(f"Truncating partial record at end of {output_file} (byte {good_end})")
+        with open(output_file, "r+b") as f:
+            f.truncate(good_end)
+    return done
+
+class CheckpointWriter:
+    """
+    Appends one JSON line per result; flushes every write, fsyncs every N rows or T seconds.
+    The file is only created on the first write.
+    """
+
+    def __init__(self, output_file, fsync_every=50, fsync_interval=5.0):
+        self.output_file = output_file
+        self.f = None
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.written = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, res):
+        if self.f is None:
+            self.f = open(self.output_file, "a", encoding="utf-8")
+        self.f.write(json.dumps(res, ensure_ascii=False) + "\n")
+        self.f.flush()
+        self.written += 1
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self.f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self.f is None:
+            return
+        self.f.flush()
+        self.sync()
+        self.f.close()
+
+def _iter_input(input_file, done):
+    """Lazily yield (line_no, record) for input rows not already in `done`."""
+    with open(input_file, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logger.error(f"Malformed JSON on line {line_no}, skipped")
+                continue
+            # Rows missing both keys still go through so process_single_row logs them
+            if data.get("id", data.get("profile_url")) in done:
+                continue
+            yield line_no, data
+
+def _retry_delay(attempt):
+    """Exponential backoff with jitter for the given (1-based) failed attempt."""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+
+async def run_cloud_sprint(input_file="cloud_input.jsonl", output_file="cloud_output.jsonl", parallel=24,
+                           fsync_every=50, adaptive=False, min_parallel=1, max_parallel=64,
+                           max_attempts=3, dead_letter_file=None):
+    """
+    Streaming scheduler: the input is read lazily into a bounded queue and exactly
+    `parallel` workers pull from it, each keeping one request in flight and appending
+    its result the moment it finishes. Memory is constant in the input size.
+    With adaptive=True there are max_parallel workers and an AdaptiveLimiter (starting
+    at `parallel`) decides how many of them may have a request in flight.
+    Failed rows are put back on the queue after a backoff, up to max_attempts, then
+    written to dead_letter_file.
+    """
+    dead_letter_file = dead_letter_file or f"{output_file}.dead.jsonl"
+    if not os.path.exists(input_file):
         logger.critical(f"Input file '{input_file}' not found.")
         return
 
-    total_lines = len(lines)
+    # Resume: skip anything a previous (crashed) run already finished or dead-lettered,
+    # unless the dead-letter file is itself being fed back in
+    done = load_done_keys(output_file)
+    if done:
+        logger.info(f"Resuming: {len(done)} profiles already in {output_file}")
+    dead_keys = load_done_keys(dead_letter_file)
+    if dead_keys and os.path.abspath(dead_letter_file) != os.path.abspath(input_file):
+        logger.info(f"Skipping {len(dead_keys)} profiles already dead-lettered in {dead_letter_file}")
+        done |= dead_keys
+
+    # One cheap streaming pass so progress logs can show [n/total]
+    with open(input_file, 'r') as f:
+        total_lines = sum(1 for line in f if line.strip())
+
+    limiter = None
+    if adaptive:
+        limiter = AdaptiveLimiter(parallel, min_limit=min_parallel, max_limit=max_parallel)
+        parallel = max_parallel
+        logger.info(f"Adaptive concurrency between {min_parallel} and {max_parallel}, starting at {limiter.limit}")
+
     logger.info(f"Starting Async GPU Sprint on {total_lines} profiles (parallel={parallel})...")
     start_time = time.time()
 
-    # The semaphore restricts concurrent connections to perfectly match your server capacity
-    semaphore = asyncio.Semaphore(parallel)
+    queue = asyncio.Queue(maxsize=parallel * 2)
     
     # We configure the TCPConnector to allow the high parallel limit without throttling
     connector = aiohttp.TCPConnector(limit=parallel)
-    
-    async with aiohttp.ClientSession(connector=connector) as session:
-        # Fire off all tasks. The semaphore ensures only 'parallel' number run at once.
-        tasks = [
-            process_single_row(session, semaphore, line, i+1, total_lines) 
-            for i, line in enumerate(lines)
-        ]
-        
-        # Wait for everything to finish
-        raw_results = await asyncio.gather(*tasks)
-
-    # Filter out Nones and sort
-    results = [r for r in raw_results if r is not None]
-    results.sort(key=lambda r: r.get("id", r.get("profile_url", "")))
+    writer = CheckpointWriter(output_file, fsync_every=fsync_every)
+    dead_writer = CheckpointWriter(dead_letter_file, fsync_every=1)
+    retries = set()
+    retried = 0
+    # First unexpected worker exception (e.g. a failed output write); stops the run once the queue drains
+    fatal = []
+
+    async def requeue_later(item, delay):
+        # The original queue item stays unfinished until its retry is back on the queue,
+        # so queue.join() can't return while a retry is still sleeping.
+        try:
+            await asyncio.sleep(delay)
+            await queue.put(item)
+        finally:
+            queue.task_done()
 
+    async def worker(session):
+        nonlocal retried
+        while True:
+            line_no, data, attempt = await queue.get()
+            requeued = False
+            try:
+                if fatal:
+                    # Draining the queue after a fatal error so queue.join() returns
+                    continue
+                res = await process_single_row(session, data, line_no, total_lines, limiter)
+                if res is None:
+                    continue
+                error = res.pop("error", None)
+                if not error:
+                    writer.write(res)
+                elif attempt < max_attempts:
+                    delay = _retry_delay(attempt)
+                    logger.warning(f"Retrying line {line_no} in {delay:.0f}s (attempt {attempt + 1}/{max_attempts})")
+                    task = asyncio.create_task(requeue_later((line_no, data, attempt + 1), delay))
+                    retries.add(task)
+                    task.add_done_callback(retries.discard)
+                    requeued = True
+                    retried += 1
+                else:
+                    logger.error(f"Giving up on line {line_no} after {attempt} attempts: {error}")
+                    key = _record_key(data)[1]
+                    if key not in dead_keys:
+                        dead_writer.write({**data, "_error": error, "_attempts": attempt})
+                        dead_keys.add(key)
+            except Exception as e:
+                logger.error(f"Worker failed on line {line_no}, stopping the sprint: {e!r}")
+                fatal.append(e)
+            finally:
+                if not requeued:
+                    queue.task_done()
+    
     try:
-        with open(output_file, 'w') as f:
-            for res in results:
-                f.write(json.dumps(res, ensure_ascii=False) + "\n")
-    except Exception as e:
-        logger.critical(f"Failed to write output file: {e}")
-        return
+        async with aiohttp.ClientSession(connector=connector) as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(parallel)]
+            try:
+                # put() blocks while the queue is full, so reading never runs ahead of the GPU
+                for line_no, data in _iter_input(input_file, done):
+                    if fatal:
+                        break
+                    await queue.put((line_no, data, 1))
+                await queue.join()
+                if fatal:
+                    raise fatal[0]
+            finally:
+                for task in [*workers, *retries]:
+                    task.cancel()
+                await asyncio.gather(*workers, *retries, return_exceptions=True)
+    finally:
+        writer.close()
+        dead_writer.close()
 
     elapsed = time.time() - start_time
-    rate = len(results) / elapsed if elapsed > 0 else 0
-    logger.info(f"Done! {len(results)} profiles in {elapsed:.1f}s ({rate:.1f} profiles/sec)")
+    rate = writer.written / elapsed if elapsed > 0 else 0
+    logger.info(f"Done! {writer.written} profiles in {elapsed:.1f}s ({rate:.1f} profiles/sec)")
+    if limiter:
+        logger.info(f"Adaptive concurrency settled at {limiter.limit}")
+    if retried or dead_writer.written:
+        logger.info(f"Retries: {retried} | dead-lettered: {dead_writer.written} ({dead_letter_file})")
     logger.info(f"Output: {output_file}")
 
 if __name__ == "__main__":
@@ -224,7 +508,17 @@ if __name__ == "__main__":
     parser.add_argument("--input", default="cloud_input.jsonl", help="Input JSONL file")
     parser.add_argument("--output", default="cloud_output.jsonl", help="Output JSONL file")
     parser.add_argument("--parallel", type=int, default=24, help="Parallel requests to llama-server")
+    parser.add_argument("--fsync-every", type=int, default=50, help="fsync the output after this many results")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Tune in-flight requests at runtime (starts at --parallel)")
+    parser.add_argument("--min-parallel", type=int, default=1, help="Adaptive mode: lower concurrency bound")
+    parser.add_argument("--max-parallel", type=int, default=64, help="Adaptive mode: upper concurrency bound")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Extraction attempts per row before dead-lettering")
+    parser.add_argument("--dead-letter", default=None, help="Dead-letter JSONL (default: <output>.dead.jsonl)")
     args = parser.parse_args()
 
     # Execute the async event loop
-    asyncio.run(run_cloud_sprint(args.input, args.output, args.parallel))
\ No newline at end of file
+    asyncio.run(run_cloud_sprint(args.input, args.output, args.parallel, args.fsync_every,
+                                 adaptive=args.adaptive, min_parallel=args.min_parallel,
+                                 max_parallel=args.max_parallel, max_attempts=args.max_attempts,
+                                 dead_letter_file=args.dead_letter))
\ No newline at end of file
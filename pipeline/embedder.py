@@ -4,12 +4,16 @@ Uses all-MiniLM-L6-v2 (384 dimensions) to encode holistic_profile_string
 into vector embeddings for semantic search.
 """
 import logging
+import queue
+import threading
 import time
-from typing import List, Tuple
+from typing import Any, Callable, List, Optional, Tuple
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from scraper.db.connection import get_connection, put_connection
+from scraper.db.repositories import write_embeddings
 
 logger = logging.getLogger(__name__)
 
@@ -33,16 +37,102 @@ def embed_text(text: str) -> List[float]:
     return model.encode(text, normalize_embeddings=True).tolist()
 
 
-def embed_batch(texts: List[str], batch_size: int = 64) -> List[List[float]]:
-    """Embed a batch of texts efficiently."""
+def embed_batch_array(texts: List[str], batch_size: int = 64, show_progress_bar: bool = True) -> np.ndarray:
+    """Embed a batch of texts into a (len(texts), 384) float32 array, ready for write_embeddings."""
     model = get_model()
-    embeddings = model.encode(
+    return model.encode(
         texts,
         batch_size=batch_size,
-        show_progress_bar=True,
+        show_progress_bar=show_progress_bar,
         normalize_embeddings=True,
-    )
-    return [e.tolist() for e in embeddings]
+        convert_to_numpy=True,
+    ).astype(np.float32, copy=False)
+
+
+def embed_batch(texts: List[str], batch_size: int = 64, show_progress_bar: bool = True) -> List[List[float]]:
+    """Embed a batch of texts efficiently."""
+    return [e.tolist() for e in embed_batch_array(texts, batch_size, show_progress_bar)]
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batcher for callers that produce one text at a time (Phase 3 workers).
+    Threads submit (text, payload); a single background thread encodes up to
+    max_batch texts per model call, or whatever arrived within max_wait_ms of the
+    first one, then hands [(payload, embedding), ...] to `sink` for one bulk write.
+    Embeddings are float32 numpy rows; write them with the binary vector path.
+    Only the batcher thread touches the model, so workers never contend on it.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        sink: Callable[[List[Tuple[Any, np.ndarray]]], None],
+        max_batch: int = 64,
+        max_wait_ms: int = 200,
+        on_error: Optional[Callable[[List[Any], Exception], None]] = None,
+    ):
+        self.sink = sink
+        self.on_error = on_error
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.written = 0
+        self.failed = 0
+        # Bounded so producers slow down if encoding falls behind
+        self._queue: queue.Queue = queue.Queue(maxsize=max_batch * 4)
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, payload: Any) -> None:
+        self._queue.put((text, payload))
+
+    def close(self) -> None:
+        """Flush everything submitted so far and stop the background thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def __enter__(self) -> "EmbeddingBatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Any]]) -> None:
+        texts = [text for text, _ in batch]
+        payloads = [payload for _, payload in batch]
+        try:
+            embeddings = embed_batch_array(texts, batch_size=len(texts), show_progress_bar=False)
+            self.sink(list(zip(payloads, embeddings)))
+            self.written += len(batch)
+            logger.info(f"  → Embedded & stored batch of {len(batch)}")
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+            self.failed += len(batch)
+            if self.on_error:
+                self.on_error(payloads, e)
 
 
 def fetch_professors_needing_embeddings(
@@ -73,33 +163,12 @@ def fetch_professors_needing_embeddings(
 
 def update_embedding(professor_id: int, embedding: List[float]):
     """Store a single embedding in the database."""
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE professors SET embedding = %s WHERE id = %s",
-                (str(embedding), professor_id),
-            )
-        conn.commit()
-    finally:
-        put_connection(conn)
+    write_embeddings([professor_id], [embedding])
 
 
 def update_embeddings_batch(updates: List[Tuple[List[float], int]]):
-    """Store embeddings in batch (more efficient)."""
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            from psycopg2.extras import execute_batch
-            execute_batch(
-                cur,
-                "UPDATE professors SET embedding = %s WHERE id = %s",
-                [(str(emb), pid) for emb, pid in updates],
-                page_size=100,
-            )
-        conn.commit()
-    finally:
-        put_connection(conn)
+    """Store embeddings in batch (binary COPY, see db.repositories.write_embeddings)."""
+    write_embeddings([pid for _, pid in updates], [emb for emb, _ in updates])
 
 
 def run_embedding_pipeline(
@@ -123,18 +192,16 @@ def run_embedding_pipeline(
     texts = [r[1] for r in rows]
 
     # Batch encode
-    embeddings = embed_batch(texts, batch_size=batch_size)
+    embeddings = embed_batch_array(texts, batch_size=batch_size)
 
     # Batch update DB
     logger.info(f"Storing {len(embeddings)} embeddings in database...")
-    updates = list(zip(embeddings, ids))
 
     # Process in chunks of 500 to avoid huge transactions
     chunk_size = 500
-    for i in range(0, len(updates), chunk_size):
-        chunk = updates[i : i + chunk_size]
-        update_embeddings_batch(chunk)
-        logger.info(f"  Stored {min(i + chunk_size, len(updates))}/{len(updates)}")
+    for i in range(0, len(ids), chunk_size):
+        write_embeddings(ids[i : i + chunk_size], embeddings[i : i + chunk_size])
+        logger.info(f"  Stored {min(i + chunk_size, len(ids))}/{len(ids)}")
 
     elapsed = time.time() - start
     logger.info(
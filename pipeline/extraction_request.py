@@ -0,0 +1,99 @@
+"""
+Shared LLM extraction request for Phase 3 (ProfileProcessor) and the GPU cloud worker.
+
+The system prompt and the opening of the user message are byte-identical for every
+professor, and everything that varies (profile text, name) comes last. llama.cpp
+can then reuse the cached KV prefix of a slot (`cache_prompt`) and only prefill the
+profile itself.
+
+The profile body is budgeted in tokens, not characters. Callers count with the
+server's /tokenize endpoint when it is available and fall back to a chars/4
+estimate otherwise.
+
+Stdlib only: the cloud worker runs on a bare GPU box.
+"""
+import os
+
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {
+            "type": "string",
+            "description": "The professor's full name."
+        },
+        "email": {
+            "type": "string",
+            "description": "The professor's email address if found in the text, otherwise 'NA'."
+        },
+        "bio": {
+            "type": "string",
+            "description": "A concise 2-3 sentence summary of their academic background and core focus."
+        },
+        "interests": {
+            "type": "array",
+            "items": {"type": "string"},
+            "maxItems": 10,
+            "description": "A list of 1 to 4 word research interests."
+        },
+        "accepting_students": {
+            "type": "string",
+            "enum": ["Yes", "No", "NA"],
+            "description": "Whether the professor explicitly mentions accepting new graduate students. 'Yes' if actively recruiting, 'No' if explicitly full, 'NA' if completely unmentioned."
+        }
+    },
+    "required": ["name", "email", "bio", "interests", "accepting_students"]
+}
+
+SYSTEM_PROMPT = (
+    "You are a precise academic profile extractor. "
+    "Return only valid JSON matching the provided schema. "
+    "For interests, use 1-4 word phrases only. "
+    "For accepting_students, output exactly 'Yes', 'No', or 'NA'."
+)
+
+# Static head of the user turn; part of the cached prefix
+USER_PREFIX = (
+    "Extract structured information about the professor named at the end "
+    "from the following profile page content.\n\n"
+    "Profile:\n"
+)
+
+# Token budget for the profile body (~ the old 10,000 character cut for English text)
+PROFILE_TOKEN_BUDGET = int(os.environ.get("LLM_PROFILE_TOKEN_BUDGET", "2500"))
+
+# Used when the server can't tokenize for us
+APPROX_CHARS_PER_TOKEN = 4
+# No real text packs fewer characters than this into a token, so anything at or under
+# budget * MIN_CHARS_PER_TOKEN fits without asking the tokenizer
+MIN_CHARS_PER_TOKEN = 2
+
+
+def needs_token_count(text: str, max_tokens: int = PROFILE_TOKEN_BUDGET) -> bool:
+    """False when text is certainly within budget, so the /tokenize round trip can be skipped."""
+    return len(text) > max_tokens * MIN_CHARS_PER_TOKEN
+
+
+def approx_truncate(text: str, max_tokens: int = PROFILE_TOKEN_BUDGET) -> str:
+    """Fallback budget cut (chars/4) for servers without /tokenize."""
+    return text[: max_tokens * APPROX_CHARS_PER_TOKEN]
+
+
+def build_messages(prof_name: str, profile_text: str) -> list[dict]:
+    """Chat messages with the static prefix first and the per-professor parts last."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{USER_PREFIX}{profile_text}\n\nProfessor: {prof_name}"},
+    ]
+
+
+def build_payload(prof_name: str, profile_text: str, **sampling) -> dict:
+    """Full /v1/chat/completions body for one profile (already within the token budget)."""
+    return {
+        "messages": build_messages(prof_name, profile_text),
+        **sampling,
+        "cache_prompt": True,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "extraction", "strict": True, "schema": EXTRACTION_SCHEMA},
+        },
+    }
@@ -0,0 +1,59 @@
+"""
+Streaming readers for the cloud_input / cloud_output briefcase files.
+
+Stdlib only, so the GPU worker can use it too. Files are read in fixed-size text
+chunks and decoded with JSONDecoder.raw_decode, which accepts one-object-per-line
+JSONL as well as concatenated pretty-printed objects. Memory stays flat
+regardless of file size.
+"""
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Union
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_objects(path: Union[str, Path], chunk_chars: int = 1 << 20) -> Iterator[Any]:
+    """Yield every top-level JSON value in the file, reading chunk_chars at a time."""
+    decoder = json.JSONDecoder(strict=False)
+    buf, idx, eof = "", 0, False
+
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            while idx < len(buf) and buf[idx] in _WHITESPACE:
+                idx += 1
+
+            if idx >= len(buf):
+                if eof:
+                    return
+                buf, idx = f.read(chunk_chars), 0
+                eof = not buf
+                continue
+
+            try:
+                obj, end = decoder.raw_decode(buf, idx)
+            except json.JSONDecodeError:
+                # Most likely an object split across the chunk boundary: read more and retry
+                if eof:
+                    raise
+                more = f.read(chunk_chars)
+                eof = not more
+                buf, idx = buf[idx:] + more, 0
+                continue
+
+            yield obj
+            idx = end
+            # Drop consumed text now and then so the buffer doesn't grow with the file
+            if idx > chunk_chars:
+                buf, idx = buf[idx:], 0
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most `size` items."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
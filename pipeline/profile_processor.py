@@ -3,46 +3,117 @@ import json
 import hashlib
 import logging
 import os
-from typing import Dict, Any, Optional, Tuple
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
 from bs4 import BeautifulSoup
-from markdownify import markdownify as md
+from markdownify import MarkdownConverter, markdownify as md
 
 import requests as http_requests
 import trafilatura
 
+from .extraction_request import (
+    APPROX_CHARS_PER_TOKEN,
+    PROFILE_TOKEN_BUDGET,
+    approx_truncate,
+    build_payload,
+    needs_token_count,
+)
+
 logger = logging.getLogger(__name__)
 
 LLAMA_BASE_URL = os.environ.get("LLAMA_BASE_URL", "http://localhost:6969")
 
-EXTRACTION_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "name": {
-            "type": "string",
-            "description": "The professor's full name."
-        },
-        "email": {
-            "type": "string",
-            "description": "The professor's email address if found in the text, otherwise 'NA'."
-        },
-        "bio": {
-            "type": "string",
-            "description": "A concise 2-3 sentence summary of their academic background and core focus."
-        },
-        "interests": {
-            "type": "array",
-            "items": {"type": "string"},
-            "maxItems": 10,
-            "description": "A list of 1 to 4 word research interests."
-        },
-        "accepting_students": {
-            "type": "string",
-            "enum": ["Yes", "No", "NA"],
-            "description": "Whether the professor explicitly mentions accepting new graduate students. 'Yes' if actively recruiting, 'No' if explicitly full, 'NA' if completely unmentioned."
+# Layout tags that never carry profile content
+LAYOUT_TAGS = ['script', 'style', 'nav', 'footer', 'header', 'aside', 'meta', 'noscript']
+# Storage cap (the same as before condensing existed). Longer pages are condensed
+# down to it rather than cut, so a research section past the menus still gets stored.
+MAX_MARKDOWN_CHARS = 10000
+
+_markdown_converter = MarkdownConverter(strip=['a', 'img', 'table'])
+
+
+def _email_from_soup(soup: BeautifulSoup) -> Optional[str]:
+    """Find the first mailto link, decoding Cloudflare email protection if needed."""
+    for link in soup.find_all("a", href=True):
+        href = link['href']
+
+        # 1. Standard mailto
+        if "mailto:" in href.lower():
+            return href.split(":", 1)[-1].strip()
+
+        # 2. Cloudflare encoded
+        elif "email-protection#" in href:
+            try:
+                encoded = href.split("#")[1]
+                hex_bytes = bytes.fromhex(encoded)
+                key = hex_bytes[0]
+                decoded_email = ''.join(chr(b ^ key) for b in hex_bytes[1:])
+                return decoded_email
+            except Exception as e:
+                logger.debug(f"Failed to decode cloudflare email: {e}")
+
+    return None
+
+
+def hash_page_text(html: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extract the main text with Trafilatura and compute its SHA-256 hash.
+    Returns (raw_text, content_hash) or (None, None) if no text could be extracted.
+    """
+    raw_text = trafilatura.extract(html, favor_recall=True)
+    if not raw_text:
+        return None, None
+
+    content_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+    return raw_text, content_hash
+
+
+def process_page_html(html: str, previous_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Phase 2 page-processing stage shared by the orchestrator, export_for_gpu
+    and scrape_new_unis. A changed page is parsed twice, on purpose:
+      - Trafilatura builds its own lxml tree for the raw text and content hash.
+        That parse is a few ms; unchanged pages stop after it.
+      - The email and the cleaned Markdown share one html.parser BeautifulSoup
+        tree. markdownify only walks BeautifulSoup trees, and html.parser is the
+        parser it always used: lxml repairs malformed HTML differently and would
+        change the stored Markdown. Building the soup, not parsing, is the cost,
+        so an lxml-backed soup would save little.
+
+    Module-level (not a method) so the orchestrator can run it in a process pool.
+    If previous_hash matches the new content hash the page is unchanged: Markdown
+    conversion is skipped and email/markdown come back as None.
+
+    Returns {raw_text, content_hash, email, markdown, unchanged}. raw_text/content_hash
+    are None when Trafilatura finds no main text.
+    """
+    raw_text, content_hash = hash_page_text(html)
+    if previous_hash is not None and content_hash == previous_hash:
+        return {
+            "raw_text": raw_text,
+            "content_hash": content_hash,
+            "email": None,
+            "markdown": None,
+            "unchanged": True,
         }
-    },
-    "required": ["name", "email", "bio", "interests", "accepting_students"]
-}
+
+    soup = BeautifulSoup(html, 'html.parser')
+    email = _email_from_soup(soup)
+
+    for tag in soup(LAYOUT_TAGS):
+        tag.decompose()
+    markdown = _markdown_converter.convert_soup(soup).strip()
+    if len(markdown) > MAX_MARKDOWN_CHARS:
+        # A page without headings can come back from condensing unchanged: cut it as before
+        markdown = condense_markdown(markdown, MAX_MARKDOWN_CHARS // APPROX_CHARS_PER_TOKEN)[:MAX_MARKDOWN_CHARS]
+
+    return {
+        "raw_text": raw_text,
+        "content_hash": content_hash,
+        "email": email,
+        "markdown": markdown,
+        "unchanged": False,
+    }
 
 
 def _llm_chat(messages: list[dict], json_schema: dict | None = None, temperature: float = 0.1) -> str:
@@ -56,7 +127,11 @@ def _llm_chat(messages: list[dict], json_schema: dict | None = None, temperature
             "type": "json_schema",
             "json_schema": {"name": "extraction", "strict": True, "schema": json_schema},
         }
+    return _llm_complete(payload)
+
 
+def _llm_complete(payload: dict) -> str:
+    """POST a prepared /v1/chat/completions body and return the message content."""
     resp = http_requests.post(
         f"{LLAMA_BASE_URL}/v1/chat/completions",
         json=payload,
@@ -66,6 +141,286 @@ def _llm_chat(messages: list[dict], json_schema: dict | None = None, temperature
     return resp.json()["choices"][0]["message"]["content"]
 
 
+# None until the first /tokenize call tells us whether the server has one
+_tokenize_supported: Optional[bool] = None
+
+
+def _budget_profile_text(text: str, max_tokens: int = PROFILE_TOKEN_BUDGET) -> str:
+    """
+    Cut text to max_tokens using llama.cpp's /tokenize + /detokenize, so the cut is exact
+    for the loaded model. Falls back to chars/4 when the server has no tokenizer endpoint.
+    """
+    global _tokenize_supported
+    if not needs_token_count(text, max_tokens):
+        return text
+
+    if _tokenize_supported is not False:
+        try:
+            resp = http_requests.post(f"{LLAMA_BASE_URL}/tokenize", json={"content": text}, timeout=30)
+            resp.raise_for_status()
+            tokens = resp.json()["tokens"]
+            _tokenize_supported = True
+            if len(tokens) <= max_tokens:
+                return text
+            resp = http_requests.post(f"{LLAMA_BASE_URL}/detokenize", json={"tokens": tokens[:max_tokens]}, timeout=30)
+            resp.raise_for_status()
+            return resp.json()["content"]
+        except Exception as e:
+            if _tokenize_supported is None:
+                logger.warning(f"No usable /tokenize on {LLAMA_BASE_URL} ({e}); budgeting by characters")
+                _tokenize_supported = False
+
+    return approx_truncate(text, max_tokens)
+
+
+# --- Markdown condensation -------------------------------------------------
+# University templates put sidebar menus, course lists and news blocks ahead of
+# the research section, so a plain prefix cut often drops the part the prompt
+# needs. Split the page at headings, score each section, and pack the best
+# ones (in page order) into the token budget.
+
+_ATX_HEADING = re.compile(r"^#{1,6}\s+(.*?)\s*#*\s*$")
+_SETEXT_UNDERLINE = re.compile(r"^(=+|-+)\s*$")
+_BOLD_HEADING = re.compile(r"^\*\*([^*]{2,80})\*\*:?\s*$")
+_LIST_ITEM = re.compile(r"^(?:[*+-]|\d+\.)\s+")
+
+# (pattern, weight) matched against a section's heading
+_HEADING_SIGNALS = [
+    (re.compile(r"\bresearch\b"), 3.0),
+    (re.compile(r"\binterests?\b|\bexpertise\b|\bspeciali[sz]"), 3.0),
+    (re.compile(r"\bbiography\b|\bbio\b|\babout\b|\bbackground\b|\bprofile\b|\boverview\b"), 2.0),
+    (re.compile(r"\bstudents?\b|\bsupervis|\bopportunit|\bjoin\b|\bprospective\b"), 2.0),
+    (re.compile(r"\bfocus\b|\bareas?\b|\btopics?\b|\bprojects?\b"), 1.5),
+    (re.compile(r"\blab(oratory)?\b|\bgroup\b|\beducation\b|\bpublications?\b"), 1.0),
+    (re.compile(r"\bcourses?\b|\bteaching\b|\bnews\b|\bevents?\b|\badmissions?\b|\bprograms?\b"), -2.0),
+    (re.compile(r"\bmenu\b|\bquick links\b|\bnavigation\b|\bsite ?map\b|\brelated\b|\bshare\b|\bfollow\b|\bsocial\b"), -4.0),
+]
+# Body text hints (per match, capped) that a section is about the person's work
+_BODY_SIGNALS = re.compile(
+    r"\bresearch\w*|\binterests?\b|\bph\.?d\b|\bgraduate students?\b|\bsupervis\w*|\bexpertise\b|\blaboratory\b"
+)
+_BOILERPLATE_BODY = re.compile(r"©|\bcopyright\b|\ball rights reserved\b|\bprivacy\b|\bcookies?\b")
+
+# Sections at or below this score are dropped even when the budget has room
+CONDENSE_DROP_SCORE = -2.0
+# A line found on at least this share of a department's pages is template text
+DEPARTMENT_LINE_SHARE = 0.5
+# Too few pages to tell template text from a coincidence
+DEPARTMENT_MIN_PAGES = 3
+
+
+def line_fingerprint(line: str) -> int:
+    """
+    Stable signed 64-bit hash of a whitespace/case-normalized line (fits a BIGINT,
+    and unlike hash() it is the same in every process and run).
+    """
+    key = " ".join(line.lower().split()).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big", signed=True)
+
+
+def _heading_lines(lines: List[str]) -> set:
+    """Indices of heading lines (ATX, setext text + underline, bold labels) and horizontal rules."""
+    headings = set()
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if _SETEXT_UNDERLINE.match(stripped) or _ATX_HEADING.match(stripped) or _BOLD_HEADING.match(stripped):
+            headings.add(i)
+        elif (stripped and i + 1 < len(lines) and _SETEXT_UNDERLINE.match(lines[i + 1].strip())
+              and not _LIST_ITEM.match(stripped)):
+            headings.add(i)
+    return headings
+
+
+def page_line_fingerprints(markdown: str) -> set:
+    """
+    Distinct fingerprints of a page's content lines. Headings are left out: the
+    same "Research Interests" heading on every page is structure, not boilerplate.
+    """
+    lines = markdown.splitlines()
+    headings = _heading_lines(lines)
+    return {
+        line_fingerprint(line)
+        for i, line in enumerate(lines)
+        if i not in headings and len(line.strip()) > 2
+    }
+
+
+def strip_boilerplate(markdown: str, boilerplate: set) -> str:
+    """
+    Drop content lines whose fingerprint is in `boilerplate` (see
+    get_department_boilerplate). Headings stay. A page that would be left with no
+    content at all is returned unchanged rather than stored empty.
+    """
+    if not markdown or not boilerplate:
+        return markdown
+
+    lines = markdown.splitlines()
+    headings = _heading_lines(lines)
+    kept = []
+    content = False
+    for i, line in enumerate(lines):
+        if i not in headings and len(line.strip()) > 2:
+            if line_fingerprint(line) in boilerplate:
+                continue
+            content = True
+        kept.append(line)
+
+    if not content:
+        return markdown
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+class DepartmentLineStats:
+    """
+    How many of a department's pages contain each (normalized) markdown line.
+    Lines shared by most pages are menus, contact blocks and footers of the
+    department template rather than anything about the professor.
+    """
+
+    def __init__(self):
+        self.pages = 0
+        self.counts: Counter = Counter()
+
+    @classmethod
+    def from_counts(cls, counts: Dict[int, int], pages: int) -> "DepartmentLineStats":
+        """Stats from counts already persisted by the boilerplate pass."""
+        stats = cls()
+        stats.pages = pages
+        stats.counts = Counter(counts)
+        return stats
+
+    def add(self, markdown: str) -> None:
+        if not markdown:
+            return
+        self.pages += 1
+        self.counts.update(page_line_fingerprints(markdown))
+
+    def shared_fraction(self, lines: List[str]) -> float:
+        """Share of `lines` that appear on most of the department's pages."""
+        if self.pages < DEPARTMENT_MIN_PAGES or not lines:
+            return 0.0
+        threshold = self.pages * DEPARTMENT_LINE_SHARE
+        shared = sum(1 for line in lines if self.counts[line_fingerprint(line)] >= threshold)
+        return shared / len(lines)
+
+
+def split_markdown_sections(markdown: str) -> List[Dict[str, Any]]:
+    """
+    Split markdown at headings: ATX (`# ...`), setext (markdownify's default for
+    h1/h2: a line underlined with === or ---) and whole-line bold labels.
+    Returns [{heading, lines}] in page order; `lines` includes the heading itself.
+    The first section (text before any heading) has heading "".
+    """
+    lines = markdown.splitlines()
+    sections = [{"heading": "", "lines": []}]
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        heading = None
+        take = 1
+
+        atx = _ATX_HEADING.match(stripped)
+        bold = _BOLD_HEADING.match(stripped)
+        if atx:
+            heading = atx.group(1)
+        elif (stripped and i + 1 < len(lines) and _SETEXT_UNDERLINE.match(lines[i + 1].strip())
+              and not _LIST_ITEM.match(stripped)):
+            heading, take = stripped, 2
+        elif bold:
+            heading = bold.group(1)
+
+        if heading is not None:
+            sections.append({"heading": heading, "lines": lines[i:i + take]})
+        else:
+            sections[-1]["lines"].append(line)
+        i += take
+
+    return [s for s in sections if any(line.strip() for line in s["lines"])]
+
+
+def score_markdown_section(section: Dict[str, Any], stats: Optional[DepartmentLineStats] = None) -> float:
+    """Relevance of one section to the extraction prompt. Higher is better; negative is noise."""
+    heading = section["heading"].lower()
+    body = [line.strip() for line in section["lines"][1 if heading else 0:] if line.strip()]
+    body = [line for line in body if not _SETEXT_UNDERLINE.match(line)]
+    if not body:
+        # A bare heading still tells the model what follows, but on its own it's noise
+        return CONDENSE_DROP_SCORE
+
+    score = sum(weight for pattern, weight in _HEADING_SIGNALS if pattern.search(heading))
+
+    text = " ".join(body).lower()
+    score += 0.5 * min(len(_BODY_SIGNALS.findall(text)), 6)
+    if _BOILERPLATE_BODY.search(text):
+        score -= 2.0
+
+    # Links are stripped during conversion, so menus show up as runs of short list items
+    short_items = sum(1 for line in body if _LIST_ITEM.match(line) and len(line.split()) <= 5)
+    if len(body) >= 4:
+        score -= 4.0 * short_items / len(body)
+    # Prose (bios, research statements) has long lines
+    if sum(len(line.split()) for line in body) / len(body) >= 12:
+        score += 1.0
+
+    if stats is not None:
+        score -= 5.0 * stats.shared_fraction(body)
+
+    return score
+
+
+def condense_markdown(
+    markdown: str,
+    max_tokens: int = PROFILE_TOKEN_BUDGET,
+    stats: Optional[DepartmentLineStats] = None,
+) -> str:
+    """
+    Keep the most relevant sections of a profile within max_tokens (chars/4 estimate),
+    preserving page order. Template text recognised from the department's other pages
+    (stats) counts against a section. Pages that already fit and have no noise
+    sections come back unchanged.
+    """
+    if not markdown:
+        return markdown
+
+    sections = split_markdown_sections(markdown)
+    if len(sections) <= 1:
+        return markdown
+
+    scored = []
+    for idx, section in enumerate(sections):
+        text = "\n".join(section["lines"]).strip()
+        score = score_markdown_section(section, stats)
+        if idx == 0:
+            # Name, title and contact details usually lead the page: never drop it outright
+            score = max(score + 1.0, CONDENSE_DROP_SCORE + 0.5)
+        scored.append((score, idx, text))
+
+    keep = [s for s in scored if s[0] > CONDENSE_DROP_SCORE]
+    budget_chars = max_tokens * APPROX_CHARS_PER_TOKEN
+    if len(keep) == len(scored) and len(markdown) <= budget_chars:
+        return markdown
+    if not keep:
+        return approx_truncate(markdown, max_tokens)
+
+    chosen = []
+    remaining = budget_chars
+    for score, idx, text in sorted(keep, key=lambda s: (-s[0], s[1])):
+        cost = len(text) + 2
+        if cost <= remaining:
+            chosen.append((idx, text))
+            remaining -= cost
+        elif score > 0 and remaining >= 400:
+            # A relevant section that doesn't fit whole: keep its opening lines
+            cut = text[:remaining - 2].rsplit("\n", 1)[0]
+            chosen.append((idx, cut))
+            remaining -= len(cut) + 2
+
+    chosen.sort()
+    return "\n\n".join(text for _, text in chosen)
+
+
 class ProfileProcessor:
     """
     Universal Spoke for Phase 2: NLP Processing.
@@ -85,61 +440,34 @@ class ProfileProcessor:
         if not html_content:
             return None
             
-        soup = BeautifulSoup(html_content, 'html.parser')
-        email_links = soup.find_all("a", href=True)
-        
-        for link in email_links:
-            href = link['href']
-            
-            # 1. Standard mailto
-            if "mailto:" in href.lower():
-                return href.split(":", 1)[-1].strip()
-                
-            # 2. Cloudflare encoded
-            elif "email-protection#" in href:
-                try:
-                    encoded = href.split("#")[1]
-                    hex_bytes = bytes.fromhex(encoded)
-                    key = hex_bytes[0]
-                    decoded_email = ''.join(chr(b ^ key) for b in hex_bytes[1:])
-                    return decoded_email
-                except Exception as e:
-                    logger.debug(f"Failed to decode cloudflare email: {e}")
-                    
-        return None
-
-
-    def extract_with_llm(self, markdown: str, prof_name: str) -> Optional[Dict[str, Any]]:
+        return _email_from_soup(BeautifulSoup(html_content, 'html.parser'))
+
+    def process_html(self, html: str, previous_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Phase 2 page stage (content hash, email, Markdown); see process_page_html."""
+        return process_page_html(html, previous_hash)
+
+    def condense_markdown(self, markdown: str, department_stats: Optional[DepartmentLineStats] = None) -> str:
+        """Relevant sections of the profile packed into the LLM token budget; see condense_markdown."""
+        return condense_markdown(markdown, PROFILE_TOKEN_BUDGET, department_stats)
+
+    def extract_with_llm(
+        self, markdown: str, prof_name: str, department_stats: Optional[DepartmentLineStats] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Structured extraction using Ollama's JSON schema format.
+        The markdown is condensed to its most relevant sections first; pass the
+        department's DepartmentLineStats so shared template text is recognised.
         Returns a dict with bio, unique_interests, accepting_students,
         holistic_profile_string — or None on failure.
         """
         if not markdown or markdown in ["[UNAVAILABLE]", "[ERROR]"]:
             return None
 
-        prompt = (
-            f"Extract structured information about Professor {prof_name} "
-            f"from the following profile page content.\n\n"
-            f"Profile:\n{markdown[:10000]}"
-        )
-
         try:
-            raw = _llm_chat(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a precise academic profile extractor. "
-                            "Return only valid JSON matching the provided schema. "
-                            "For interests, use 1-4 word phrases only. "
-                            "For accepting_students, output exactly 'Yes', 'No', or 'NA'."
-                        ),
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                json_schema=EXTRACTION_SCHEMA,
-            )
+            profile_text = _budget_profile_text(self.condense_markdown(markdown, department_stats))
+            # Static prompt prefix first (prompt-cache hit), token-budgeted profile last
+            payload = build_payload(prof_name, profile_text, temperature=0.1)
+            raw = _llm_complete(payload)
 
             data = json.loads(raw)
 
@@ -272,13 +600,13 @@ class ProfileProcessor:
         if not html:
             return None, None, None
 
-        raw_text = trafilatura.extract(html, favor_recall=True)
-        if not raw_text:
-            return None, html, None
-
-        content_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+        raw_text, content_hash = self.hash_html(html)
         return raw_text, html, content_hash
 
+    def hash_html(self, html: str) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (raw_text, content_hash) for a page; see hash_page_text."""
+        return hash_page_text(html)
+
     def process_profile(self, profile_url: str, prof_name: str, department_name: str,
                         raw_text: Optional[str] = None, html: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -22,11 +22,9 @@ import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md_convert
-
 from pipeline.profile_processor import ProfileProcessor
 from universities.generic import GenericDirectoryScraper
+from core.browser_pool import close_browser_pool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -121,19 +119,12 @@ def fetch_profile(entry: dict, processor: ProfileProcessor) -> dict | None:
 
     for attempt in range(3):
         try:
-            _, html, _ = processor.fetch_and_hash(url)
+            html = processor._fetch_html(url)
             if not html:
                 logger.warning(f"  {name} — fetch returned empty")
                 return None
 
-            email = processor.extract_email(html)
-
-            soup = BeautifulSoup(html, "html.parser")
-            for tag in soup(["script", "style", "nav", "footer", "header", "aside", "meta", "noscript"]):
-                tag.decompose()
-            markdown = md_convert(str(soup), strip=["a", "img", "table"]).strip()
-            if len(markdown) > 10000:
-                markdown = markdown[:10000]
+            page = processor.process_html(html)
 
             return {
                 "name": entry["name"],
@@ -141,8 +132,8 @@ def fetch_profile(entry: dict, processor: ProfileProcessor) -> dict | None:
                 "faculty": entry["faculty"],
                 "department": entry["department"],
                 "profile_url": url,
-                "email": email,
-                "profile_markdown": markdown,
+                "email": page["email"],
+                "profile_markdown": page["markdown"],
             }
 
         except (ProfileProcessor.RateLimitError, ProfileProcessor.ThrottledError) as e:
@@ -248,4 +239,5 @@ if __name__ == "__main__":
         logger.info(f"\n{'='*60}\n  {uni}\n{'='*60}")
         run_export(uni, unis_data, delay=args.delay, workers=args.workers)
 
+    close_browser_pool()
     logger.info("\nAll done.")
@@ -0,0 +1,84 @@
+"""
+Phase 3 Batch Write Tests
+=========================
+The batched Phase 3 sink must store the same thing as the unbatched path:
+fields an LLM result leaves out keep their stored values.
+Needs a throwaway Postgres: the tests build their own tables in a private schema.
+
+Run:
+    TEST_DATABASE_URL=postgresql://localhost/scratch pytest scraper/tests/test_ai_batch_writes.py -v
+"""
+
+import os
+import uuid
+
+import psycopg2
+import pytest
+
+from scraper.db import connection
+from scraper.db.repositories import STATUS_EXTRACTED, batch_update_professor_ai_data
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def professors_db(monkeypatch):
+    """One extracted professor with a stored bio in a private schema; the repository pool is pointed at it."""
+    schema = f"ai_batch_test_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"""
+            CREATE TABLE {schema}.professors (
+                id serial PRIMARY KEY,
+                unique_interests text[], holistic_profile_string text, embedding text,
+                bio text, accepting_students boolean, search_vector tsvector,
+                pipeline_status smallint NOT NULL DEFAULT 0
+            )
+        """)
+        cur.execute(f"""
+            INSERT INTO {schema}.professors
+                (unique_interests, holistic_profile_string, bio, accepting_students, pipeline_status)
+            VALUES (ARRAY['optics'], 'Jane Doe studies optics', 'Jane Doe joined in 2010.', true, {STATUS_EXTRACTED})
+        """)
+
+    sep = "&" if "?" in TEST_DATABASE_URL else "?"
+    connection.close_pool()
+    monkeypatch.setenv("DATABASE_URL", f"{TEST_DATABASE_URL}{sep}options=-csearch_path%3D{schema}")
+    try:
+        yield admin, schema
+    finally:
+        connection.close_pool()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+def _row(admin, schema):
+    with admin.cursor() as cur:
+        cur.execute(f"SELECT unique_interests, bio, accepting_students, pipeline_status FROM {schema}.professors")
+        return cur.fetchone()
+
+
+def test_phase3_batch_keeps_fields_the_result_left_out(professors_db):
+    admin, schema = professors_db
+
+    batch_update_professor_ai_data([{
+        "id": 1, "unique_interests": ["quantum optics"], "holistic_profile_string": "Jane Doe studies quantum optics",
+        "bio": None, "accepting_students": None,
+    }], overwrite=False)
+
+    assert _row(admin, schema) == (["quantum optics"], "Jane Doe joined in 2010.", True, STATUS_EXTRACTED)
+
+
+def test_gpu_import_overwrites_every_field(professors_db):
+    admin, schema = professors_db
+
+    batch_update_professor_ai_data([{"id": 1, "unique_interests": None, "holistic_profile_string": None}])
+
+    interests, bio, accepting, status = _row(admin, schema)
+    assert (interests, bio, accepting) == (None, None, None)
+    assert status != STATUS_EXTRACTED
@@ -0,0 +1,121 @@
+"""
+Department Boilerplate Count Tests
+==================================
+Line counts must only grow for pages whose stripped markdown was actually stored.
+Needs a throwaway Postgres: the tests build their own tables in a private schema.
+
+Run:
+    TEST_DATABASE_URL=postgresql://localhost/scratch pytest scraper/tests/test_boilerplate_counts.py -v
+"""
+
+import os
+import uuid
+
+import psycopg2
+import pytest
+
+from scraper.db import connection
+from scraper.db.repositories import (
+    get_department_boilerplate_counts,
+    get_pending_boilerplate_pages,
+    replace_professor_markdown,
+    save_department_boilerplate,
+)
+from scraper.pipeline.profile_processor import page_line_fingerprints
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def boilerplate_db(monkeypatch):
+    """5 fetched pages of one department in a private schema; the repository pool is pointed at it."""
+    schema = f"boilerplate_test_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"""
+            CREATE TABLE {schema}.departments (
+                id serial PRIMARY KEY, name text, boilerplate_pages integer NOT NULL DEFAULT 0
+            )
+        """)
+        cur.execute(f"""
+            CREATE TABLE {schema}.professors (
+                id serial PRIMARY KEY,
+                department_id integer, content_hash text, profile_markdown text, email text,
+                http_etag text, http_last_modified text, last_crawled_at timestamptz, unique_interests text[],
+                pipeline_status smallint NOT NULL DEFAULT 1,
+                pipeline_attempts smallint NOT NULL DEFAULT 0, pipeline_error text,
+                boilerplate_stripped boolean NOT NULL DEFAULT false, boilerplate_lines bigint[]
+            )
+        """)
+        cur.execute(f"""
+            CREATE TABLE {schema}.department_boilerplate (
+                department_id integer, line_hash bigint, page_count integer NOT NULL,
+                PRIMARY KEY (department_id, line_hash)
+            )
+        """)
+        cur.execute(f"INSERT INTO {schema}.departments (name) VALUES ('Physics')")
+        cur.execute(f"""
+            INSERT INTO {schema}.professors (department_id, content_hash, profile_markdown)
+            SELECT 1, 'h' || n, E'* Home\\n* People\\n\\nQuantum optics ' || n FROM generate_series(1, 5) n
+        """)
+
+    sep = "&" if "?" in TEST_DATABASE_URL else "?"
+    connection.close_pool()
+    monkeypatch.setenv("DATABASE_URL", f"{TEST_DATABASE_URL}{sep}options=-csearch_path%3D{schema}")
+    try:
+        yield admin, schema
+    finally:
+        connection.close_pool()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+def _stripped(pages):
+    return [(prof_id, markdown, content_hash, page_line_fingerprints(markdown))
+            for prof_id, markdown, content_hash, _ in pages]
+
+
+def _fingerprint(line):
+    return next(iter(page_line_fingerprints(line)))
+
+
+def test_recrawled_and_already_stripped_pages_are_not_counted(boilerplate_db):
+    """A page re-crawled after it was read is skipped, and a second run over the same read counts nothing."""
+    admin, schema = boilerplate_db
+    pages = get_pending_boilerplate_pages(1)
+    with admin.cursor() as cur:
+        cur.execute(f"UPDATE {schema}.professors SET content_hash = 'recrawled' WHERE id = 5")
+
+    assert save_department_boilerplate(1, _stripped(pages)) == 4
+    # A concurrent pass that read the same pages finds them already stripped
+    assert save_department_boilerplate(1, _stripped(pages)) == 0
+
+    counts, total = get_department_boilerplate_counts(1)
+    assert total == 4
+    assert counts[_fingerprint("* Home")] == 4
+    # Lines seen on a single page are stored too, so later runs keep counting them
+    assert counts[_fingerprint("Quantum optics 1")] == 1
+    assert len(counts) == 2 + 4
+
+
+def test_recrawled_page_replaces_its_earlier_counts(boilerplate_db):
+    """Re-stripping a re-crawled page swaps its old lines for the new ones; the page total stays put."""
+    assert save_department_boilerplate(1, _stripped(get_pending_boilerplate_pages(1))) == 5
+
+    replace_professor_markdown(1, "* Home\n\nUltrafast lasers 1", "h1-new", None, None, None)
+    pages = get_pending_boilerplate_pages(1)
+    assert [(prof_id, counted is not None) for prof_id, _, _, counted in pages] == [(1, True)]
+    assert save_department_boilerplate(1, _stripped(pages)) == 1
+
+    counts, total = get_department_boilerplate_counts(1)
+    assert total == 5
+    assert counts[_fingerprint("* Home")] == 5
+    assert counts[_fingerprint("* People")] == 4
+    assert counts[_fingerprint("Ultrafast lasers 1")] == 1
+    # Lines that left the page are gone rather than left with a stale count
+    assert _fingerprint("Quantum optics 1") not in counts
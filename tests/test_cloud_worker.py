@@ -0,0 +1,161 @@
+"""
+Cloud Worker Tests
+==================
+Resume/checkpoint behaviour of the GPU cloud worker, without a llama-server.
+
+Run:
+    pytest scraper/tests/test_cloud_worker.py -v
+"""
+
+import importlib
+import json
+
+import pytest
+
+
+@pytest.fixture
+def cloud_worker(tmp_path, monkeypatch):
+    """The cloud_worker module, with cwd in tmp_path (it opens worker_sprint.log on import)."""
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("scraper.pipeline.cloud_worker")
+
+
+def _result(key, status="Jane Doe researches optics"):
+    return {"id": key, "bio": None, "unique_interests": [], "holistic_profile_string": status}
+
+
+def test_resume_truncates_torn_tail_and_skips_done_keys(cloud_worker, tmp_path):
+    """A crash mid-write leaves a partial last line: it is cut off, finished keys are skipped, [ERROR] rows retried."""
+    output = tmp_path / "cloud_output.jsonl"
+    writer = cloud_worker.CheckpointWriter(str(output), fsync_every=1)
+    writer.write(_result(1))
+    writer.write(_result(2, status="[ERROR]"))
+    writer.write(_result(3))
+    writer.close()
+    intact_size = output.stat().st_size
+    with open(output, "ab") as f:
+        f.write(json.dumps(_result(4)).encode()[:20])
+
+    done = cloud_worker.load_done_keys(str(output))
+
+    assert done == {1, 3}
+    assert output.stat().st_size == intact_size
+    # Appends after the resume start on a clean line
+    writer = cloud_worker.CheckpointWriter(str(output))
+    writer.write(_result(4))
+    writer.close()
+    assert cloud_worker.load_done_keys(str(output)) == {1, 3, 4}
+
+    inputs = tmp_path / "cloud_input.jsonl"
+    inputs.write_text("".join(json.dumps({"id": i, "profile_markdown": "x"}) + "\n" for i in range(1, 6)))
+    assert [data["id"] for _, data in cloud_worker._iter_input(str(inputs), done)] == [2, 4, 5]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _run_rounds(limiter, clock, rounds, service_time):
+    """Each round sends `limit` 100-token requests at once; service_time(limit) is how long they take."""
+    import asyncio
+
+    async def go():
+        history = []
+        for _ in range(rounds):
+            limit = limiter.limit
+            tickets = [await limiter.acquire() for _ in range(limit)]
+            clock.now += service_time(limit)
+            for ticket in tickets:
+                await limiter.release(ticket, ok=True, tokens=100)
+            history.append(limiter.limit)
+        return history
+
+    return asyncio.run(go())
+
+
+def test_adaptive_limiter_backs_off_when_latency_rises_at_flat_throughput(cloud_worker):
+    """Past the GPU's 8 slots throughput plateaus and requests only queue longer: the limit must settle near 8."""
+    clock = FakeClock()
+    limiter = cloud_worker.AdaptiveLimiter(2, max_limit=64, clock=clock)
+
+    history = _run_rounds(limiter, clock, rounds=60, service_time=lambda limit: max(1.0, limit / 8))
+
+    assert max(history) < 16
+    assert all(6 <= limit <= 14 for limit in history[-20:])
+
+
+def test_adaptive_limiter_cuts_on_errors(cloud_worker):
+    """A failure cuts the limit multiplicatively, once per round of requests."""
+    import asyncio
+
+    clock = FakeClock()
+    limiter = cloud_worker.AdaptiveLimiter(20, clock=clock)
+
+    async def go():
+        tickets = [await limiter.acquire() for _ in range(5)]
+        for ticket in tickets:
+            await limiter.release(ticket, ok=False)
+
+    asyncio.run(go())
+    assert limiter.limit == 14
+
+
+def test_sprint_retries_dead_letters_and_resumes(cloud_worker, tmp_path, monkeypatch):
+    """Transient failures are retried, persistent ones dead-lettered once, and a rerun touches neither again."""
+    import asyncio
+
+    calls = []
+
+    async def fake_process(session, data, current_idx, total_lines, limiter=None):
+        calls.append(data["id"])
+        if data["id"] == 3 or (data["id"] == 2 and calls.count(2) == 1):
+            return cloud_worker._empty_result(data["id"], status="[ERROR]", error="HTTP 503: busy")
+        return _result(data["id"])
+
+    monkeypatch.setattr(cloud_worker, "process_single_row", fake_process)
+    monkeypatch.setattr(cloud_worker, "_retry_delay", lambda attempt: 0)
+    inputs = tmp_path / "cloud_input.jsonl"
+    inputs.write_text("".join(json.dumps({"id": i, "profile_markdown": "x"}) + "\n" for i in range(1, 5)))
+    output = tmp_path / "cloud_output.jsonl"
+    dead = tmp_path / "cloud_output.jsonl.dead.jsonl"
+
+    def sprint():
+        asyncio.run(cloud_worker.run_cloud_sprint(str(inputs), str(output), parallel=2, max_attempts=3))
+
+    sprint()
+    assert sorted(json.loads(line)["id"] for line in output.read_text().splitlines()) == [1, 2, 4]
+    assert [json.loads(line)["id"] for line in dead.read_text().splitlines()] == [3]
+    assert calls.count(2) == 2 and calls.count(3) == 3
+
+    calls.clear()
+    sprint()
+    assert calls == []
+    assert len(dead.read_text().splitlines()) == 1
+
+
+def test_sprint_surfaces_worker_errors_instead_of_hanging(cloud_worker, tmp_path, monkeypatch):
+    """A failing output write stops the run with that error rather than leaving queue.join() waiting forever."""
+    import asyncio
+
+    async def fake_process(session, data, current_idx, total_lines, limiter=None):
+        return _result(data["id"])
+
+    def broken_write(self, res):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cloud_worker, "process_single_row", fake_process)
+    monkeypatch.setattr(cloud_worker.CheckpointWriter, "write", broken_write)
+    inputs = tmp_path / "cloud_input.jsonl"
+    inputs.write_text("".join(json.dumps({"id": i, "profile_markdown": "x"}) + "\n" for i in range(1, 50)))
+
+    async def sprint():
+        await asyncio.wait_for(
+            cloud_worker.run_cloud_sprint(str(inputs), str(tmp_path / "out.jsonl"), parallel=2), timeout=10,
+        )
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(sprint())
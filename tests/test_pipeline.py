@@ -7,6 +7,8 @@ Run:
     pytest scraper/tests/test_pipeline.py -v
 """
 
+import concurrent.futures
+
 import pytest
 from scraper.pipeline.profile_processor import ProfileProcessor
 
@@ -47,3 +49,90 @@ def test_profile_processor_smoke():
     
     # Should not contain empty research interests
     assert '""' not in holistic, f"Holistic string has empty research interests: {holistic}"
+
+
+# ============================================================
+# Page Store
+# ============================================================
+
+def test_page_store_record_and_replay(tmp_path):
+    """Recorded pages come back from replay; identical pages share a blob; unknown URLs miss."""
+    from scraper.core.page_store import PageStore, page_key
+
+    store = PageStore(str(tmp_path), mode="record")
+    store.record("https://example.ca/people", "<html>v1</html>", source="directory")
+    store.record("https://example.ca/people", "<html>v2</html>", source="directory")
+    store.record("https://example.ca/mirror", "<html>v2</html>", source="directory")
+    store.record(page_key("https://example.ca/people", part=1), "<html>page 2</html>", source="browser")
+    store.close()
+
+    replay = PageStore(str(tmp_path), mode="replay")
+    assert replay.get("https://example.ca/people") == "<html>v2</html>"
+    assert replay.get(page_key("https://example.ca/people", part=1)) == "<html>page 2</html>"
+    assert replay.get("https://example.ca/unknown") is None
+    assert len(replay.history("https://example.ca/people")) == 2
+    assert len(list(tmp_path.glob("blobs/*/*.html.gz"))) == 3
+    # Replay never writes
+    replay.record("https://example.ca/new", "<html>new</html>")
+    assert replay.get("https://example.ca/new") is None
+    replay.close()
+
+
+# ============================================================
+# HTTP Session
+# ============================================================
+
+def test_fetch_stats_count_connections_opened():
+    """Keep-alive requests to one host open a single connection, as counted by the session's adapter."""
+    import http.server
+    import threading
+    from scraper.core.http_session import fetch_stats, reset_fetch_stats, timed_request
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "5")
+            self.end_headers()
+            self.wfile.write(b"hello")
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        reset_fetch_stats()
+        for _ in range(5):
+            timed_request("GET", f"http://127.0.0.1:{server.server_address[1]}/")
+        stats = fetch_stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert stats["requests"] == 5 and stats["bytes"] == 25
+    assert stats["connections"] == 1
+
+
+# ============================================================
+# Phase 2 CPU Pool
+# ============================================================
+
+def test_cpu_pool_is_created_once_across_fetch_threads(tmp_path):
+    """Concurrent fetch threads share one process pool, and its workers can convert pages."""
+    from scraper.orchestrator import ScraperOrchestrator
+    from scraper.pipeline.profile_processor import process_page_html
+
+    orchestrator = ScraperOrchestrator(str(tmp_path / "universities.json"), cpu_workers=2)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            pools = list(executor.map(lambda _: orchestrator._get_cpu_pool(), range(16)))
+        assert all(pool is pools[0] for pool in pools)
+
+        page = pools[0].submit(process_page_html, "<h1>Jane Doe</h1><p>Quantum optics</p>").result(timeout=60)
+        assert "Quantum optics" in page["markdown"]
+    finally:
+        orchestrator.close()
+    assert orchestrator._cpu_pool is None
@@ -39,5 +39,141 @@ def test_phase_2():
     keywords = processor.extract_keywords(raw_text)
     print(json.dumps(keywords, indent=2))
 
+def test_process_html_derives_hash_email_and_markdown():
+    """process_html should derive the content hash, email and cleaned Markdown of a page."""
+    processor = ProfileProcessor()
+    html = """
+    <html><head><style>body {}</style></head><body>
+    <header>Site header</header><nav><ul><li>Home</li><li>People</li></ul></nav>
+    <main>
+      <h1>Jane Doe</h1>
+      <p>Professor of Physics. Contact: <a href="mailto:jane.doe@example.ca">jane.doe@example.ca</a></p>
+      <h2>Research Interests</h2>
+      <ul><li>Quantum optics</li><li>Ultrafast lasers</li></ul>
+      <p>Jane Doe leads a group studying light-matter interaction at ultrafast time scales,
+      with applications to quantum communication and precision measurement.</p>
+    </main>
+    <footer>Copyright</footer>
+    </body></html>
+    """
+
+    page = processor.process_html(html)
+
+    assert page["email"] == "jane.doe@example.ca"
+    assert page["content_hash"] == processor.hash_html(html)[1]
+    assert "Quantum optics" in page["markdown"]
+    assert "Site header" not in page["markdown"]
+    assert "Copyright" not in page["markdown"]
+
+
+def test_process_html_markdown_matches_legacy_pipeline():
+    """Malformed HTML must convert exactly as the old strip-then-markdownify(str(soup)) steps did."""
+    import trafilatura
+    from bs4 import BeautifulSoup
+    from markdownify import markdownify as md
+    from scraper.pipeline.profile_processor import LAYOUT_TAGS, process_page_html
+
+    def legacy_markdown(html):
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag in soup(LAYOUT_TAGS):
+            tag.decompose()
+        return md(str(soup), strip=['a', 'img', 'table']).strip()
+
+    pages = [
+        "<ul><li>a<li>b</ul>",
+        "<p>unclosed <em>italic\n\n<p>next</em>",
+        "<h2>Heading<p>para</h2>",
+        "<div><p>x<table><tr><td>c</table></div>",
+        "<b>bold <i>both</b> it</i>",
+        "<nav>menu</nav><h1>Jane Doe</h1><p>a &amp; b<br>c</p><ul><li>one<ul><li>two</ul></ul><footer>f</footer>",
+    ]
+    for html in pages:
+        page = process_page_html(html)
+        assert page["markdown"] == legacy_markdown(html)
+        # Content hashes stay comparable with the ones already stored
+        assert page["raw_text"] == trafilatura.extract(html, favor_recall=True)
+
+
+def test_condense_markdown_keeps_research_past_menus():
+    """Menus, course lists and department template text should give way to the research section."""
+    from scraper.pipeline.profile_processor import DepartmentLineStats, condense_markdown
+
+    def page(n):
+        return (
+            f"Jane Doe {n}\n==========\n\nProfessor, Department of Physics\n\n"
+            "Quick Links\n-----------\n\n" + "\n".join(f"* Link {i}" for i in range(40)) + "\n\n"
+            "## Courses\n\n" + "\n".join(f"* PHY {i}00 Introductory topic" for i in range(60)) + "\n\n"
+            "## Research Interests\n\n"
+            f"* Quantum optics {n}\n* Ultrafast lasers\n\n"
+            "**Biography**\n\n" + "She received her PhD from MIT and supervises graduate students. " * 5
+        )
+
+    stats = DepartmentLineStats()
+    pages = [page(n) for n in range(5)]
+    for markdown in pages:
+        stats.add(markdown)
+
+    condensed = condense_markdown(pages[0], max_tokens=400, stats=stats)
+
+    assert len(condensed) <= 400 * 4
+    assert "Quantum optics 0" in condensed
+    assert "supervises graduate students" in condensed
+    assert "Link 12" not in condensed and "PHY 100" not in condensed
+    # Short pages with nothing to drop pass through untouched
+    assert condense_markdown("Jane Doe\n\n## Research\n\nQuantum optics") == "Jane Doe\n\n## Research\n\nQuantum optics"
+
+def test_process_html_condenses_long_pages_to_storage_cap():
+    """Pages over MAX_MARKDOWN_CHARS are condensed to the cap, keeping a research section past it."""
+    from scraper.pipeline.profile_processor import MAX_MARKDOWN_CHARS, process_page_html
+
+    html = (
+        "<h1>Jane Doe</h1><p>Professor of Physics</p>"
+        "<h2>Courses</h2><ul>" + "".join(f"<li>PHY {i} Introductory topic number {i}</li>" for i in range(600)) + "</ul>"
+        "<h2>Research Interests</h2><p>Quantum optics and ultrafast lasers.</p>"
+    )
+
+    markdown = process_page_html(html)["markdown"]
+
+    assert len(markdown) <= MAX_MARKDOWN_CHARS
+    assert "Quantum optics" in markdown and "Jane Doe" in markdown
+
+
+def test_department_stats_from_stored_counts_match_counted_pages():
+    """Stats rebuilt from the boilerplate pass's stored counts judge lines like ones counted page by page."""
+    from scraper.pipeline.profile_processor import DepartmentLineStats, page_line_fingerprints
+
+    pages = [f"* Home\n* People\n\nQuantum optics {n}" for n in range(4)]
+    counted = DepartmentLineStats()
+    for markdown in pages:
+        counted.add(markdown)
+    stored = DepartmentLineStats.from_counts(dict(counted.counts), len(pages))
+
+    lines = ["* Home", "* People", "Quantum optics 0", "Something new"]
+    assert stored.shared_fraction(lines) == counted.shared_fraction(lines) == 0.5
+    assert page_line_fingerprints(pages[0]) <= set(stored.counts)
+
+
+def test_strip_boilerplate_keeps_headings_and_own_content():
+    """Lines shared by most of a department's pages go; headings and page-specific text stay."""
+    from collections import Counter
+    from scraper.pipeline.profile_processor import page_line_fingerprints, strip_boilerplate
+
+    template = "* Home\n* People\n* Research\n\nWe use cookies to improve your experience."
+    pages = [
+        f"Jane Doe {n}\n==========\n\n{template}\n\n## Research Interests\n\nQuantum optics {n}"
+        for n in range(5)
+    ]
+    counts = Counter()
+    for markdown in pages:
+        counts.update(page_line_fingerprints(markdown))
+    boilerplate = {h for h, n in counts.items() if n > 0.6 * len(pages)}
+
+    stripped = strip_boilerplate(pages[0], boilerplate)
+
+    assert stripped == "Jane Doe 0\n==========\n\n## Research Interests\n\nQuantum optics 0"
+    # A page made only of template text is kept as-is rather than emptied
+    assert strip_boilerplate(template, boilerplate) == template
+
+
 if __name__ == "__main__":
     test_phase_2()
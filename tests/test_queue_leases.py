@@ -0,0 +1,94 @@
+"""
+Work-Queue Lease Tests
+======================
+Two claimers sharing the Phase 2 queue, plus lease expiry and renewal.
+Needs a throwaway Postgres: the tests build their own tables in a private schema.
+
+Run:
+    TEST_DATABASE_URL=postgresql://localhost/scratch pytest scraper/tests/test_queue_leases.py -v
+"""
+
+import os
+import time
+import uuid
+
+import psycopg2
+import pytest
+
+from scraper.db import connection
+from scraper.db.repositories import (
+    claim_professors_missing_markdown,
+    release_professor_leases,
+    renew_professor_leases,
+)
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+@pytest.fixture
+def queue_db(monkeypatch):
+    """20 Phase 2 rows in a private schema; the repository pool is pointed at it."""
+    schema = f"lease_test_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"CREATE TABLE {schema}.departments (id serial PRIMARY KEY, name text)")
+        cur.execute(f"""
+            CREATE TABLE {schema}.professors (
+                id serial PRIMARY KEY,
+                first_name text, last_name text, profile_url text,
+                university_id integer, faculty_id integer, department_id integer,
+                content_hash text, profile_markdown text,
+                pipeline_status smallint NOT NULL DEFAULT 0,
+                lease_owner text, lease_expires_at timestamptz
+            )
+        """)
+        cur.execute(f"INSERT INTO {schema}.departments (name) VALUES ('Physics')")
+        cur.execute(f"""
+            INSERT INTO {schema}.professors (first_name, last_name, profile_url, university_id, department_id)
+            SELECT 'Prof', n::text, 'https://example.ca/' || n, 1, 1 FROM generate_series(1, 20) n
+        """)
+
+    sep = "&" if "?" in TEST_DATABASE_URL else "?"
+    connection.close_pool()
+    monkeypatch.setenv("DATABASE_URL", f"{TEST_DATABASE_URL}{sep}options=-csearch_path%3D{schema}")
+    try:
+        yield
+    finally:
+        connection.close_pool()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+def test_two_claimers_get_disjoint_rows(queue_db):
+    """Concurrent workers never hold the same row, and released rows are claimable again."""
+    first = claim_professors_missing_markdown("worker-a", limit=12)
+    second = claim_professors_missing_markdown("worker-b", limit=12)
+
+    first_ids = {row["id"] for row in first}
+    second_ids = {row["id"] for row in second}
+    assert len(first_ids) == 12 and len(second_ids) == 8
+    assert not first_ids & second_ids
+
+    assert claim_professors_missing_markdown("worker-b", limit=12) == []
+    assert release_professor_leases("worker-a") == 12
+    assert {row["id"] for row in claim_professors_missing_markdown("worker-b", limit=12)} == first_ids
+
+
+def test_expired_leases_are_reclaimed_unless_renewed(queue_db):
+    """A lease that runs out goes to the next claimer; a renewed one stays with its owner."""
+    rows = claim_professors_missing_markdown("worker-a", limit=4, lease_seconds=1)
+    kept = [row["id"] for row in rows[:2]]
+    assert renew_professor_leases("worker-a", kept, lease_seconds=60) == 2
+
+    time.sleep(1.5)
+    reclaimed = {row["id"] for row in claim_professors_missing_markdown("worker-b", limit=20)}
+
+    assert not reclaimed & set(kept)
+    assert {row["id"] for row in rows[2:]} <= reclaimed
+    # worker-a lost the expired rows, so renewing them is a no-op
+    assert renew_professor_leases("worker-a", [row["id"] for row in rows[2:]], lease_seconds=60) == 0
@@ -0,0 +1,53 @@
+"""
+Repository Helper Tests
+=======================
+Pure-Python checks for the DB and import helpers that don't need a live database.
+
+Run:
+    pytest scraper/tests/test_repositories.py -v
+"""
+
+import json
+import struct
+
+import numpy as np
+
+from scraper.db.repositories import encode_vector_copy
+from scraper.pipeline.jsonl import iter_json_objects, chunked
+
+
+def test_encode_vector_copy_layout():
+    """The COPY BINARY stream should decode back to the same ids and float32 values."""
+    ids = [7, 123456789012]
+    vectors = np.array([[0.5, -1.25, 3.0], [1e-3, 0.0, -2.5]], dtype=np.float32)
+
+    payload = encode_vector_copy(ids, vectors)
+
+    assert payload.startswith(b"PGCOPY\n\xff\r\n\x00")
+    assert payload.endswith(struct.pack(">h", -1))
+
+    offset = 19  # 11-byte signature + flags + header extension length
+    for expected_id, expected_vec in zip(ids, vectors):
+        nfields, id_len, pid, vec_len, dim, unused = struct.unpack_from(">hiqihh", payload, offset)
+        offset += struct.calcsize(">hiqihh")
+        values = struct.unpack_from(f">{dim}f", payload, offset)
+        offset += 4 * dim
+
+        assert (nfields, id_len, pid) == (2, 8, expected_id)
+        assert (vec_len, dim, unused) == (4 + 4 * 3, 3, 0)
+        assert np.array_equal(np.array(values, dtype=np.float32), expected_vec)
+
+    assert offset == len(payload) - 2
+
+
+def test_iter_json_objects_streams_across_chunks(tmp_path):
+    """Pretty-printed and compact objects split across read chunks should all decode."""
+    records = [{"id": i, "bio": "x" * (i * 7), "unique_interests": ["a", "b"]} for i in range(25)]
+    path = tmp_path / "cloud_output.jsonl"
+    path.write_text(
+        "".join(json.dumps(r, indent=2 if i % 2 else None) + "\n" for i, r in enumerate(records)),
+        encoding="utf-8",
+    )
+
+    assert list(iter_json_objects(path, chunk_chars=16)) == records
+    assert [len(c) for c in chunked(iter_json_objects(path, chunk_chars=16), 10)] == [10, 10, 5]
@@ -0,0 +1,101 @@
+"""
+UAlberta Coveo Fast Path Tests
+==============================
+Config and URL-fragment parsing from a saved page fixture, and the check that
+Coveo results really belong to the page's department facets. No network.
+
+Run:
+    pytest scraper/tests/test_ualberta.py -v
+"""
+
+from bs4 import BeautifulSoup
+
+from scraper.universities.ualberta import UAlbertaDirectoryScraper
+
+DIRECTORY_URL = (
+    "https://www.ualberta.ca/en/engineering/about/contact-us/find-a-person.html"
+    "#q=Professor&sort=%40ua__dir_name%20ascending"
+    "&f:DepartmentFacet=[Civil%20and%20Environmental%20Engineering%20Dept,Electrical%20%26%20Computer%20Engineering%20Dept]"
+)
+
+DIRECTORY_PAGE = """
+<html><head><script>
+  Coveo.SearchEndpoint.configureCloudV2Endpoint("", "");
+  var coveoSettings = {organizationId: "universityofalbertaproduction", accessToken: "xx-public-token-1234",
+                       searchHub: "Find a Person"};
+</script></head><body>
+  <div class="CoveoSearchInterface">
+    <div class="CoveoFacet" data-title="Department" data-id="DepartmentFacet" data-field="@ua__dir_department"></div>
+    <div class="CoveoFacet" data-title="Role" data-id="RoleFacet" data-field="@ua__dir_role"></div>
+    <div class="CoveoResultList"></div>
+  </div>
+</body></html>
+"""
+
+
+def _scraper(monkeypatch, results):
+    scraper = UAlbertaDirectoryScraper(university_id=1)
+    requests = []
+
+    def fetch_json(url, params=None, payload=None, headers=None):
+        requests.append(payload)
+        return {"totalCount": len(results), "results": results}
+
+    monkeypatch.setattr(scraper, "fetch_page", lambda url: BeautifulSoup(DIRECTORY_PAGE, "html.parser"))
+    monkeypatch.setattr(scraper, "fetch_json", fetch_json)
+    return scraper, requests
+
+
+def _person(name, department):
+    slug = name.lower().replace(" ", "-")
+    return {"title": name, "clickUri": f"/en/directory/{slug}", "raw": {"ua__dir_department": department}}
+
+
+def test_coveo_config_and_hash_query_from_page():
+    """Token, organization, hub and facet fields come from the page; the fragment becomes the query."""
+    config = UAlbertaDirectoryScraper._coveo_config(BeautifulSoup(DIRECTORY_PAGE, "html.parser"))
+
+    assert config == {
+        "access_token": "xx-public-token-1234",
+        "organization_id": "universityofalbertaproduction",
+        "search_hub": "Find a Person",
+        "facets": {"DepartmentFacet": "@ua__dir_department", "RoleFacet": "@ua__dir_role"},
+    }
+    assert UAlbertaDirectoryScraper._hash_query(DIRECTORY_URL, config["facets"]) == {
+        "q": "Professor",
+        "sortCriteria": "@ua__dir_name ascending",
+        "aq": '@ua__dir_department==("Civil and Environmental Engineering Dept",'
+              '"Electrical & Computer Engineering Dept")',
+    }
+    # A facet the page doesn't define can't be translated
+    assert UAlbertaDirectoryScraper._hash_query(DIRECTORY_URL + "&f:Unknown=[x]", config["facets"]) is None
+    assert UAlbertaDirectoryScraper._coveo_config(BeautifulSoup("<html></html>", "html.parser")) is None
+
+
+def test_fast_path_keeps_results_matching_the_page_facets(monkeypatch):
+    scraper, requests = _scraper(monkeypatch, [
+        _person("Jane Doe", "Civil and Environmental Engineering Dept"),
+        _person("John Roe", ["Electrical & Computer Engineering Dept", "Faculty of Engineering"]),
+    ])
+
+    professors = scraper.scrape_without_browser(DIRECTORY_URL, faculty_id=2, department_id=3)
+
+    assert [(p["first_name"], p["last_name"]) for p in professors] == [("Jane", "Doe"), ("John", "Roe")]
+    assert professors[0]["profile_url"] == "https://www.ualberta.ca/en/directory/jane-doe"
+    assert requests[0]["searchHub"] == "Find a Person"
+    assert requests[0]["fieldsToInclude"] == ["ua__dir_department"]
+
+
+def test_fast_path_falls_back_when_results_leave_the_department(monkeypatch):
+    """A token scoped differently from the page (here: the whole directory) must not be trusted."""
+    scraper, _ = _scraper(monkeypatch, [
+        _person("Jane Doe", "Civil and Environmental Engineering Dept"),
+        _person("Sam Poe", "Department of English and Film Studies"),
+    ])
+    assert scraper.scrape_without_browser(DIRECTORY_URL, faculty_id=2, department_id=3) == []
+
+    # Nor results without the facet field, or a page URL without any facet selection
+    scraper, _ = _scraper(monkeypatch, [{"title": "Jane Doe", "clickUri": "/en/directory/jane-doe"}])
+    assert scraper.scrape_without_browser(DIRECTORY_URL, faculty_id=2, department_id=3) == []
+    scraper, _ = _scraper(monkeypatch, [_person("Jane Doe", "Civil and Environmental Engineering Dept")])
+    assert scraper.scrape_without_browser(DIRECTORY_URL.split("&f:")[0], faculty_id=2, department_id=3) == []
@@ -1,17 +1,10 @@
 from typing import List, Dict, Any
 import logging
-import time
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from ..core.interfaces import BaseDirectoryScraper
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
+from ..core.browser_pool import browser
+from ..core.page_ready import wait_until_ready
 
 logger = logging.getLogger(__name__)
 
@@ -24,30 +17,24 @@ class CarletonDirectoryScraper(BaseDirectoryScraper):
       - Name in h3/h2 heading
       - "View Profile" button: a.cu-button--red
     """
+    READY_SELECTOR = "a.cu-button, li.listing-item"
+
     def __init__(self, university_id: int):
         super().__init__(university_id)
-        self.options = Options()
-        self.options.add_argument("--headless")
 
     def _scrape_with_selenium(self, url: str) -> str:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.options)
         try:
-            driver.get(url)
-            time.sleep(4)  # Wait for page load
-            # Scroll down to trigger lazy-loading
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            return driver.page_source
+            with browser() as driver:
+                driver.get(url)
+                # Cards render dynamically and lazy-load further down the page
+                wait_until_ready(driver, self.READY_SELECTOR, scroll=True)
+                return driver.page_source
         except Exception as e:
             logger.error(f"Selenium error fetching {url}: {e}")
             return ""
-        finally:
-            driver.quit()
 
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
-        html_source = self._scrape_with_selenium(url)
+        html_source = self.rendered_html(url, self._scrape_with_selenium)
         page = BeautifulSoup(html_source, 'html.parser')
 
         professors = []
@@ -11,21 +11,19 @@ Instead of hand-crafted CSS selectors per university, this scraper:
 
 import re
 import logging
-import time
 from typing import List, Dict, Any, Optional
 from urllib.parse import urljoin, urlparse
 from collections import Counter
 from bs4 import BeautifulSoup
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-
 try:
     from ..core.interfaces import BaseDirectoryScraper
+    from ..core.browser_pool import browser
+    from ..core.page_ready import wait_until_ready
 except ImportError:
     from core.interfaces import BaseDirectoryScraper
+    from core.browser_pool import browser
+    from core.page_ready import wait_until_ready
 
 logger = logging.getLogger(__name__)
 
@@ -202,26 +200,22 @@ class GenericDirectoryScraper(BaseDirectoryScraper):
         super().__init__(university_id)
         self.min_cluster_size = min_cluster_size
 
-    def _fetch_with_selenium(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch a page using headless Chrome for JS-rendered content."""
-        opts = Options()
-        opts.add_argument("--headless")
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=opts,
-        )
+    def _render_with_selenium(self, url: str) -> str:
+        """Page source from a pooled headless Chrome, "" on failure."""
         try:
-            driver.get(url)
-            time.sleep(4)
-            # Scroll to trigger lazy-loading
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            return BeautifulSoup(driver.page_source, "html.parser")
+            with browser() as driver:
+                driver.get(url)
+                # No known selector here: wait for the DOM to settle, scrolling until lazy-loading stops
+                wait_until_ready(driver, scroll=True)
+                return driver.page_source
         except Exception as e:
             logger.error(f"Selenium error fetching {url}: {e}")
-            return None
-        finally:
-            driver.quit()
+            return ""
+
+    def _fetch_with_selenium(self, url: str) -> Optional[BeautifulSoup]:
+        """Fetch a page using a pooled headless Chrome for JS-rendered content."""
+        html = self.rendered_html(url, self._render_with_selenium)
+        return BeautifulSoup(html, "html.parser") if html else None
 
     def _extract_links(self, soup: BeautifulSoup, url: str) -> List[tuple]:
         """Extract all (full_url, anchor_text) pairs from a parsed page."""
@@ -1,17 +1,10 @@
 import re
-import time
 import logging
 from typing import List, Dict, Any
 from bs4 import BeautifulSoup
 from ..core.interfaces import BaseDirectoryScraper
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
+from ..core.browser_pool import browser
+from ..core.page_ready import wait_until_ready
 
 logger = logging.getLogger(__name__)
 
@@ -22,32 +15,40 @@ class QueensDirectoryScraper(BaseDirectoryScraper):
     Uses Selenium for initial page load (JS-rendered content),
     then parses with BeautifulSoup. Three department-specific patterns.
     """
+    READY_SELECTOR = "div.col-sm h3, div.views-row, div.dirItem"
+
     def __init__(self, university_id: int):
         super().__init__(university_id)
         self.BASE_URL = "https://www.queensu.ca"
-        self.options = Options()
-        self.options.add_argument("--headless")
 
     def _get_page_with_selenium(self, url: str) -> str:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.options)
         try:
-            driver.get(url)
-            time.sleep(2)
-            return driver.page_source
+            with browser() as driver:
+                driver.get(url)
+                wait_until_ready(driver, self.READY_SELECTOR)
+                return driver.page_source
         except Exception as e:
             logger.error(f"Selenium error fetching {url}: {e}")
             return ""
-        finally:
-            driver.quit()
 
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
-        html = self._get_page_with_selenium(url)
+        return self.scrape_with_browser_fallback(url, faculty_id, department_id, self._scrape_with_browser)
+
+    def scrape_without_browser(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
+        """Most Queens directories are server-rendered Drupal; only some need the browser."""
+        soup = self.fetch_page(url)
+        if not soup:
+            return []
+        return self._parse_directory(soup, url, faculty_id, department_id)
+
+    def _scrape_with_browser(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
+        html = self.rendered_html(url, self._get_page_with_selenium)
         if not html:
             return []
+        return self._parse_directory(BeautifulSoup(html, 'html.parser'), url, faculty_id, department_id)
 
-        soup = BeautifulSoup(html, 'html.parser')
+    def _parse_directory(self, soup: BeautifulSoup, url: str, faculty_id: int,
+                         department_id: int) -> List[Dict[str, Any]]:
         professors = []
 
         # Pattern 1: col-sm divs with h3 name + profile link (Geology, Math/Stats)
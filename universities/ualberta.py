@@ -1,62 +1,175 @@
-import time
+import re
 import logging
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional
+from urllib.parse import urlsplit, parse_qsl
 from bs4 import BeautifulSoup
 from ..core.interfaces import BaseDirectoryScraper
+from ..core.browser_pool import browser
+from ..core.page_ready import wait_for_page_change, wait_until_ready
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 
 logger = logging.getLogger(__name__)
 
+COVEO_SEARCH_URL = "https://platform.cloud.coveo.com/rest/search/v2"
+COVEO_PAGE_SIZE = 100
+
+# Search-page settings the Coveo JS UI is initialised with (inline config or data-* attributes)
+_COVEO_SETTINGS = {
+    "access_token": re.compile(r"""(?:accessToken|data-access-token)["']?\s*[:=]\s*["']([\w.\-]+)["']"""),
+    "organization_id": re.compile(r"""(?:organizationId|data-organization-id)["']?\s*[:=]\s*["']([\w\-]+)["']"""),
+    "search_hub": re.compile(r"""(?:searchHub|data-search-hub)["']?\s*[:=]\s*["']([^"']+)["']"""),
+}
+
 
 class UAlbertaDirectoryScraper(BaseDirectoryScraper):
     """
     University of Alberta directory scraper.
     Uses Selenium to paginate through Coveo search results.
     Result cards use div.CoveoResult with a.CoveoResultLink for name+link.
+    Before starting a browser it queries the Coveo search REST API directly,
+    using the public search token and facet fields from the page's own config.
     """
+    READY_SELECTOR = "a.CoveoResultLink"
+
     def __init__(self, university_id: int):
         super().__init__(university_id)
-        self.options = Options()
-        self.options.add_argument("--headless=new")
-        self.options.add_argument("--no-sandbox")
-        self.options.add_argument("--disable-dev-shm-usage")
-        self.options.add_argument("--window-size=1920,1080")
-        self.options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
 
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.options)
+        return self.scrape_with_browser_fallback(url, faculty_id, department_id, self._scrape_with_browser)
+
+    @staticmethod
+    def _coveo_config(soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+        """Token, organization and facet fields of the page's Coveo search UI, or None if not found."""
+        html = str(soup)
+        config = {}
+        for key, pattern in _COVEO_SETTINGS.items():
+            match = pattern.search(html)
+            config[key] = match.group(1) if match else None
+        if not config["access_token"] or not config["organization_id"]:
+            return None
+
+        # Facet id (as used in the URL hash) -> indexed field
+        config["facets"] = {
+            el["data-id"]: el["data-field"]
+            for el in soup.find_all(attrs={"data-id": True, "data-field": True})
+        }
+        return config
+
+    @staticmethod
+    def _hash_facets(url: str, facets: Dict[str, str]) -> Optional[Dict[str, List[str]]]:
+        """
+        Facet selections in the URL fragment (f:Facet=[a,b]) as {field: [values]}.
+        None if it filters on a facet we can't map to a field.
+        """
+        selected: Dict[str, List[str]] = {}
+        for key, value in parse_qsl(urlsplit(url).fragment):
+            if key.startswith("f:"):
+                field = facets.get(key[2:])
+                if not field:
+                    return None
+                selected[field] = [v.strip() for v in value.strip("[]").split(",") if v.strip()]
+        return selected
+
+    @classmethod
+    def _hash_query(cls, url: str, facets: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Turn the Coveo UI state in the URL fragment (#q=...&sort=...&f:Facet=[a,b])
+        into a search request body. None if it filters on a facet we can't map to a field.
+        """
+        selected = cls._hash_facets(url, facets)
+        if selected is None:
+            return None
+        body: Dict[str, Any] = {"q": ""}
+        for key, value in parse_qsl(urlsplit(url).fragment):
+            if key == "q":
+                body["q"] = value
+            elif key == "sort":
+                body["sortCriteria"] = value
+        filters = []
+        for field, values in selected.items():
+            quoted = ",".join('"' + v.replace('"', '\\"') + '"' for v in values)
+            filters.append(f"{field}==({quoted})")
+        if filters:
+            body["aq"] = " AND ".join(filters)
+        return body
+
+    @staticmethod
+    def _matches_facets(result: Dict[str, Any], selected: Dict[str, List[str]]) -> bool:
+        """Whether a search result carries one of the selected values of every faceted field."""
+        raw = result.get("raw") or {}
+        for field, values in selected.items():
+            value = raw.get(field.lstrip("@"))
+            found = value if isinstance(value, list) else [value]
+            wanted = {v.casefold() for v in values}
+            if not any(isinstance(v, str) and v.casefold() in wanted for v in found):
+                return False
+        return True
+
+    def scrape_without_browser(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
+        """
+        Page through the Coveo search API that backs the directory's result list.
+        Every result must carry the department facet values the page filters on: if the
+        token or search hub scopes the query differently from the rendered page, the
+        results are discarded and the browser path runs instead.
+        """
+        soup = self.fetch_page(url)
+        config = self._coveo_config(soup) if soup else None
+        body = self._hash_query(url, config["facets"]) if config else None
+        selected = self._hash_facets(url, config["facets"]) if body else None
+        if not selected:
+            # Without a facet filter there is nothing to check the results against
+            return []
+
+        if config["search_hub"]:
+            body["searchHub"] = config["search_hub"]
+        body["fieldsToInclude"] = [field.lstrip("@") for field in selected]
+        headers = {"Authorization": f"Bearer {config['access_token']}"}
+        params = {"organizationId": config["organization_id"]}
 
         professors = []
         visited = set()
+        first = 0
+        for _ in range(100):  # Safety limit, as in the browser path
+            data = self.fetch_json(COVEO_SEARCH_URL, params=params, headers=headers,
+                                   payload={**body, "firstResult": first, "numberOfResults": COVEO_PAGE_SIZE})
+            results = (data or {}).get("results") or []
+            for result in results:
+                if not self._matches_facets(result, selected):
+                    logger.warning(f"UAlberta Coveo API returned results outside the page's facets for {url}, "
+                                   f"falling back to the browser")
+                    return []
+                name = (result.get("title") or "").strip()
+                link = result.get("clickUri") or ""
+                if not name or not link or link in visited:
+                    continue
+                if not link.startswith("http"):
+                    link = f"https://www.ualberta.ca{link}"
+                visited.add(link)
 
-        try:
-            driver.get(url)
-            wait = WebDriverWait(driver, 20)
+                name_parts = name.split(" ")
+                professors.append({
+                    "first_name": name_parts[0] if name_parts else "",
+                    "last_name": " ".join(name_parts[1:]) if len(name_parts) > 1 else "",
+                    "profile_url": link,
+                    "university_id": self.university_id,
+                    "faculty_id": faculty_id,
+                    "department_id": department_id
+                })
 
-            # Wait explicitly for Coveo results to appear
-            try:
-                wait.until(EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "a.CoveoResultLink")))
-                logger.info("Coveo results loaded successfully")
-            except Exception:
-                logger.warning("Timed out waiting for CoveoResultLink — trying longer wait")
-                time.sleep(10)
+            first += len(results)
+            if not results or first >= (data or {}).get("totalCount", 0):
+                break
 
-            page_num = 0
-            max_pages = 100  # Safety limit
+        logger.info(f"UAlberta Coveo API: {len(professors)} profs")
+        return professors
+
+    def _scrape_with_browser(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
+        professors = []
+        visited = set()
 
-            while page_num < max_pages:
-                page_num += 1
-                source = driver.page_source
+        try:
+            for page_num, source in enumerate(self.rendered_pages(url, self._browse), start=1):
                 soup = BeautifulSoup(source, 'html.parser')
 
                 # Find result cards — try multiple selectors
@@ -122,10 +235,31 @@ class UAlbertaDirectoryScraper(BaseDirectoryScraper):
                     logger.info("No new results found, stopping pagination")
                     break
 
+        except Exception as e:
+            logger.error(f"UAlberta scraper error: {e}")
+
+        return professors
+
+    def _browse(self, url: str) -> Iterator[str]:
+        """Yields the page source of each Coveo results page, clicking Next in between."""
+        with browser() as driver:
+            driver.get(url)
+
+            # Wait explicitly for Coveo results to appear (and the page to settle either way)
+            if wait_until_ready(driver, self.READY_SELECTOR, timeout=20):
+                logger.info("Coveo results loaded successfully")
+            else:
+                logger.warning("Timed out waiting for CoveoResultLink — parsing whatever rendered")
+
+            max_pages = 100  # Safety limit
+
+            for _ in range(max_pages):
+                yield driver.page_source
+
                 # Try clicking next page
                 try:
                     # Get reference to first result to detect page change
-                    first_result = driver.find_element(By.CSS_SELECTOR, "a.CoveoResultLink")
+                    first_result = driver.find_element(By.CSS_SELECTOR, self.READY_SELECTOR)
                     
                     next_button = driver.find_element(
                         By.CSS_SELECTOR,
@@ -134,25 +268,14 @@ class UAlbertaDirectoryScraper(BaseDirectoryScraper):
                         ".coveo-pager-next .coveo-accessible-button"
                     )
                     driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-                    time.sleep(0.5)
                     driver.execute_script("arguments[0].click();", next_button)
                     
-                    # Wait for the old results to become stale (new page loads)
-                    try:
-                        WebDriverWait(driver, 10).until(
-                            EC.staleness_of(first_result))
+                    # Wait for the old results to become stale, then for the new ones to render
+                    if wait_for_page_change(driver, first_result, self.READY_SELECTOR, timeout=10):
                         logger.info("Page results changed after clicking next")
-                    except Exception:
+                    else:
                         logger.info("Results didn't change — might be last page")
-                    time.sleep(2)  # Extra wait for new results to render
                     
                 except Exception as e:
                     logger.info(f"No more pages to navigate: {e}")
                     break
-
-        except Exception as e:
-            logger.error(f"UAlberta scraper error: {e}")
-        finally:
-            driver.quit()
-
-        return professors
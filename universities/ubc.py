@@ -1,19 +1,19 @@
-import time
 import logging
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 from bs4 import BeautifulSoup
 from ..core.interfaces import BaseDirectoryScraper
+from ..core.browser_pool import browser
+from ..core.page_ready import wait_for_page_change, wait_until_ready
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 
 logger = logging.getLogger(__name__)
 
+# Engineering directory result items
+ENGINEERING_READY_SELECTOR = "li.my-atom-4"
+
 
 class UBCDirectoryScraper(BaseDirectoryScraper):
     """
@@ -23,8 +23,6 @@ class UBCDirectoryScraper(BaseDirectoryScraper):
     """
     def __init__(self, university_id: int):
         super().__init__(university_id)
-        self.options = Options()
-        self.options.add_argument("--headless")
 
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
         # Engineering faculty needs Selenium pagination
@@ -96,67 +94,69 @@ class UBCDirectoryScraper(BaseDirectoryScraper):
 
     def _scrape_engineering(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
         """Engineering faculty — Selenium pagination with rel=next buttons."""
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.options)
-
         professors = []
         visited = set()
 
-        try:
+        for source in self.rendered_pages(url, self._browse_engineering):
+            soup = BeautifulSoup(source, 'html.parser')
+            profiles = soup.find_all("li", class_="my-atom-4")
+
+            for li in profiles:
+                a = li.find("a", href=True)
+                if not a:
+                    continue
+
+                href = a["href"]
+                if href in visited:
+                    continue
+                visited.add(href)
+
+                name = a.get_text(strip=True)
+                # Get department from sibling <p> if available
+                h3 = a.find_parent()
+                dept_text = ""
+                if h3:
+                    p = h3.find_next_sibling("p")
+                    if p:
+                        dept_text = p.get_text(strip=True)
+
+                # Skip nursing faculty
+                if "nursing" in dept_text.lower():
+                    continue
+
+                name_parts = name.split(" ")
+                first_name = name_parts[0] if name_parts else ""
+                last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
+
+                professors.append({
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "profile_url": href,
+                    "university_id": self.university_id,
+                    "faculty_id": faculty_id,
+                    "department_id": department_id
+                })
+
+        return professors
+
+    def _browse_engineering(self, url: str) -> Iterator[str]:
+        """Yields the page source of each Engineering results page, following rel=next."""
+        with browser() as driver:
             driver.get(url)
+            wait_until_ready(driver, ENGINEERING_READY_SELECTOR)
             wait = WebDriverWait(driver, 10)
 
             while True:
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                profiles = soup.find_all("li", class_="my-atom-4")
-
-                for li in profiles:
-                    a = li.find("a", href=True)
-                    if not a:
-                        continue
-
-                    href = a["href"]
-                    if href in visited:
-                        continue
-                    visited.add(href)
-
-                    name = a.get_text(strip=True)
-                    # Get department from sibling <p> if available
-                    h3 = a.find_parent()
-                    dept_text = ""
-                    if h3:
-                        p = h3.find_next_sibling("p")
-                        if p:
-                            dept_text = p.get_text(strip=True)
-
-                    # Skip nursing faculty
-                    if "nursing" in dept_text.lower():
-                        continue
-
-                    name_parts = name.split(" ")
-                    first_name = name_parts[0] if name_parts else ""
-                    last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-
-                    professors.append({
-                        "first_name": first_name,
-                        "last_name": last_name,
-                        "profile_url": href,
-                        "university_id": self.university_id,
-                        "faculty_id": faculty_id,
-                        "department_id": department_id
-                    })
+                yield driver.page_source
 
                 # Try to click "next" pagination
                 try:
                     next_button = wait.until(
                         EC.element_to_be_clickable(
                             (By.CSS_SELECTOR, 'a[rel="next"]')))
+                    old_items = driver.find_elements(By.CSS_SELECTOR, ENGINEERING_READY_SELECTOR)
                     next_button.click()
-                    time.sleep(2)
+                    wait_for_page_change(driver, old_items[0] if old_items else None, ENGINEERING_READY_SELECTOR,
+                                         timeout=10)
                 except Exception:
                     break
-        finally:
-            driver.quit()
-
-        return professors
@@ -1,16 +1,13 @@
-import time
 import logging
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 from bs4 import BeautifulSoup
 from ..core.interfaces import BaseDirectoryScraper
+from ..core.browser_pool import browser
+from ..core.page_ready import wait_for_dom_quiet, wait_until_ready
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 
 logger = logging.getLogger(__name__)
 
@@ -21,57 +18,60 @@ class UCalgaryDirectoryScraper(BaseDirectoryScraper):
     Uses Selenium to paginate through faculty member listings.
     Pages use pager__item--next for navigation.
     """
+    READY_SELECTOR = "ol.profile-items-list li.profile"
+
     def __init__(self, university_id: int):
         super().__init__(university_id)
-        self.options = Options()
-        self.options.add_argument("--headless")
 
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.options)
-
         professors = []
         visited = set()
 
-        try:
-            driver.get(url)
-            wait = WebDriverWait(driver, 60)  # UCalgary can be slow
-            time.sleep(3)
+        for source in self.rendered_pages(url, self._browse):
+            soup = BeautifulSoup(source, 'html.parser')
 
-            while True:
-                current_source = driver.page_source
-                soup = BeautifulSoup(current_source, 'html.parser')
+            ol = soup.find("ol", class_="profile-items-list")
+            if not ol:
+                logger.warning(f"No profile-items-list found at {url}")
+                break
 
-                ol = soup.find("ol", class_="profile-items-list")
-                if not ol:
-                    logger.warning(f"No profile-items-list found at {url}")
-                    break
+            for li in ol.find_all("li", class_="profile"):
+                a = li.find("a", href=True)
+                if not a:
+                    continue
+
+                link = a["href"]
+                name = a.text.strip()
 
-                for li in ol.find_all("li", class_="profile"):
-                    a = li.find("a", href=True)
-                    if not a:
-                        continue
+                if link in visited:
+                    continue
+                visited.add(link)
 
-                    link = a["href"]
-                    name = a.text.strip()
+                name_parts = name.split(" ")
+                first_name = name_parts[0] if name_parts else ""
+                last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
 
-                    if link in visited:
-                        continue
-                    visited.add(link)
+                professors.append({
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "profile_url": link,
+                    "university_id": self.university_id,
+                    "faculty_id": faculty_id,
+                    "department_id": department_id
+                })
 
-                    name_parts = name.split(" ")
-                    first_name = name_parts[0] if name_parts else ""
-                    last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
+        return professors
+
+    def _browse(self, url: str) -> Iterator[str]:
+        """Yields the page source of each listing page, clicking the pager's next link in between."""
+        with browser() as driver:
+            driver.get(url)
+            wait = WebDriverWait(driver, 60)  # UCalgary can be slow
+            wait_until_ready(driver, self.READY_SELECTOR, timeout=60)
 
-                    professors.append({
-                        "first_name": first_name,
-                        "last_name": last_name,
-                        "profile_url": link,
-                        "university_id": self.university_id,
-                        "faculty_id": faculty_id,
-                        "department_id": department_id
-                    })
+            while True:
+                current_source = driver.page_source
+                yield current_source
 
                 # Try to click the "next page" link
                 try:
@@ -91,10 +91,6 @@ class UCalgaryDirectoryScraper(BaseDirectoryScraper):
 
                     # Wait for page content to change
                     wait.until(lambda d: d.page_source != current_source)
-                    time.sleep(1)
+                    wait_for_dom_quiet(driver)
                 except Exception:
                     break
-        finally:
-            driver.quit()
-
-        return professors
@@ -1,21 +1,21 @@
 import re
-import time
 import logging
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from ..core.interfaces import BaseDirectoryScraper
+from ..core.browser_pool import browser
+from ..core.page_ready import wait_for_page_change, wait_until_ready
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 
 logger = logging.getLogger(__name__)
 
+# ECE faculty grid (Beaver Builder content grid), re-rendered on each page
+ECE_READY_SELECTOR = "a.pp-post-link"
+
 
 class UofTDirectoryScraper(BaseDirectoryScraper):
     """
@@ -25,8 +25,6 @@ class UofTDirectoryScraper(BaseDirectoryScraper):
     """
     def __init__(self, university_id: int):
         super().__init__(university_id)
-        self.options = Options()
-        self.options.add_argument("--headless")
         self.base_url_map = {
             "Department of Chemical Engineering and Applied Chemistry": "https://chem-eng.utoronto.ca",
             "Department of Mathematics": "http://mathematics.utoronto.ca",
@@ -35,9 +33,9 @@ class UofTDirectoryScraper(BaseDirectoryScraper):
     def scrape_directory(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
         professors = []
 
-        # ECE needs Selenium pagination
+        # ECE paginates its grid in JS; try its server-rendered pages before Selenium
         if "ece.utoronto.ca" in url:
-            return self._scrape_ece(url, faculty_id, department_id)
+            return self.scrape_with_browser_fallback(url, faculty_id, department_id, self._scrape_ece)
 
         page = self.fetch_page(url)
         if not page:
@@ -129,58 +127,102 @@ class UofTDirectoryScraper(BaseDirectoryScraper):
 
         return professors
 
+    @staticmethod
+    def _ece_grid(soup: BeautifulSoup):
+        """The content grid under the "Faculty Directory" heading, or None."""
+        for span in soup.find_all("span"):
+            if span.text == "Faculty Directory":
+                return span.find_next("div", class_="fl-module-pp-content-grid")
+        return None
+
+    def _parse_ece_grid(self, soup: BeautifulSoup, visited: set, faculty_id: int,
+                        department_id: int) -> List[Dict[str, Any]]:
+        """Professors on one page of the ECE Faculty Directory grid that aren't in `visited` yet."""
+        professors = []
+        div = self._ece_grid(soup)
+        if div:
+            for a in div.find_all("a", class_="pp-post-link", href=True):
+                href = a["href"]
+                if href not in visited:
+                    visited.add(href)
+                    name = href.rstrip("/").split("/")[-1].replace("-", " ").title()
+                    name_parts = name.split(" ")
+                    first_name = name_parts[0] if name_parts else ""
+                    last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
+
+                    professors.append({
+                        "first_name": first_name,
+                        "last_name": last_name,
+                        "profile_url": href,
+                        "university_id": self.university_id,
+                        "faculty_id": faculty_id,
+                        "department_id": department_id
+                    })
+        return professors
+
+    def scrape_without_browser(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
+        """
+        ECE over plain HTTP: the grid's first page is server-rendered, and its pager
+        links (/page/N/) work without JS. If the pager is JS-only (a "next" control
+        without a real href), return [] so the Selenium path runs instead of
+        silently stopping at page one.
+        """
+        professors = []
+        visited: set = set()
+        seen_pages = set()
+        page_url = url
+
+        while page_url and page_url not in seen_pages and len(seen_pages) < 50:
+            seen_pages.add(page_url)
+            soup = self.fetch_page(page_url)
+            if not soup:
+                return []
+            grid = self._ece_grid(soup)
+            if grid is None:
+                return []
+            professors.extend(self._parse_ece_grid(soup, visited, faculty_id, department_id))
+
+            next_link = grid.find("a", class_="next")
+            if next_link is None:
+                break
+            href = next_link.get("href", "")
+            if not href or href.startswith("#") or href.startswith("javascript"):
+                logger.info("ECE pager is JS-only, falling back to Selenium")
+                return []
+            page_url = urljoin(page_url, href)
+
+        return professors
+
     def _scrape_ece(self, url: str, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
         """ECE department uses Selenium pagination with 'next' button."""
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.options)
         professors = []
         visited = set()
 
-        try:
+        for source in self.rendered_pages(url, self._browse_ece):
+            soup = BeautifulSoup(source, 'html.parser')
+            professors.extend(self._parse_ece_grid(soup, visited, faculty_id, department_id))
+
+        return professors
+
+    def _browse_ece(self, url: str) -> Iterator[str]:
+        """Yields the page source of each ECE results page, clicking 'next' in between."""
+        with browser() as driver:
             driver.get(url)
+            wait_until_ready(driver, ECE_READY_SELECTOR)
             wait = WebDriverWait(driver, 10)
 
             while True:
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-                # Look for the Faculty Directory section
-                div = None
-                for span in soup.find_all("span"):
-                    if span.text == "Faculty Directory":
-                        div = span.find_next("div", class_="fl-module-pp-content-grid")
-                        break
-
-                if div:
-                    for a in div.find_all("a", class_="pp-post-link", href=True):
-                        href = a["href"]
-                        if href not in visited:
-                            visited.add(href)
-                            name = href.rstrip("/").split("/")[-1].replace("-", " ").title()
-                            name_parts = name.split(" ")
-                            first_name = name_parts[0] if name_parts else ""
-                            last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-
-                            professors.append({
-                                "first_name": first_name,
-                                "last_name": last_name,
-                                "profile_url": href,
-                                "university_id": self.university_id,
-                                "faculty_id": faculty_id,
-                                "department_id": department_id
-                            })
+                yield driver.page_source
 
                 try:
                     next_button = wait.until(
                         EC.element_to_be_clickable((By.CLASS_NAME, "next")))
+                    old_links = driver.find_elements(By.CSS_SELECTOR, ECE_READY_SELECTOR)
                     next_button.click()
-                    time.sleep(2)
+                    wait_for_page_change(driver, old_links[0] if old_links else None, ECE_READY_SELECTOR,
+                                         timeout=10)
                 except Exception:
                     break
-        finally:
-            driver.quit()
-
-        return professors
 
     def _scrape_cs(self, page: BeautifulSoup, faculty_id: int, department_id: int) -> List[Dict[str, Any]]:
         """CS department has a table with inline research areas — extract directly."""